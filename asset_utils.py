@@ -1,10 +1,13 @@
 
 from typing import Dict, Any, Optional, List
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 from pydantic import BaseModel, validator
 from enum import Enum
+from sqlalchemy import or_, asc, desc
+from fastapi import HTTPException
 from .models import Assets
+from .services import data_quality, depreciation
 
 
 def add_namedep_asset(asset: Assets) -> dict:
@@ -16,6 +19,62 @@ def add_namedep_asset(asset: Assets) -> dict:
         ),
     }
 
+
+def asset_search_filters(params) -> list:
+    """where clauses for AssetSearchParams, shared by the advanced search n the register export"""
+    clauses = [Assets.is_deleted == False]
+    if params.query:
+        search_term = f"%{params.query}%"
+        clauses.append(
+            or_(
+                Assets.description.ilike(search_term),
+                Assets.tag_number.ilike(search_term),
+                Assets.serial_number.ilike(search_term)
+            )
+        )
+    if params.category:
+        clauses.append(Assets.category == params.category)
+    if params.status:
+        clauses.append(Assets.status == params.status)
+    if params.condition:
+        clauses.append(Assets.condition == params.condition)
+    if params.department_id:
+        clauses.append(Assets.department_id == params.department_id)
+    if params.responsible_officer_id:
+        clauses.append(Assets.responsible_officer_id == params.responsible_officer_id)
+    if params.location:
+        clauses.append(Assets.location.ilike(f"%{params.location}%"))
+    if params.min_value:
+        clauses.append(Assets.current_value >= params.min_value)
+    if params.max_value:
+        clauses.append(Assets.current_value <= params.max_value)
+    if params.acquisition_date_from:
+        clauses.append(Assets.acquisition_date >= params.acquisition_date_from)
+    if params.acquisition_date_to:
+        clauses.append(Assets.acquisition_date <= params.acquisition_date_to)
+    if params.idle_days is not None:
+        clauses.append(Assets.last_activity_at < idle_cutoff(params.idle_days))
+    if params.missing:
+        if params.missing not in data_quality.FIELD_BITS:
+            raise HTTPException(status_code=400, detail=f"missing must be one of: {', '.join(data_quality.FIELD_BITS)}")
+        clauses.append(Assets.data_quality_flags.in_(data_quality.flags_missing(params.missing)))
+    if params.max_quality_score is not None:
+        clauses.append(Assets.data_quality_score <= params.max_quality_score)
+    return clauses
+
+
+def idle_cutoff(days: int) -> datetime:
+    """assets with last_activity_at before this have been idle for days"""
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def asset_search_order(params):
+    sort_column = getattr(Assets, params.sort_by, Assets.created_at)
+    if params.sort_order == "asc":
+        return asc(sort_column)
+    return desc(sort_column)
+
+
 class StandardAssetAttributes(BaseModel):
     make_model: Optional[str] = None
     date_of_delivery: Optional[date] = None
@@ -148,26 +207,15 @@ def extract_searchable_text(category: str, attributes: Dict[str, Any]) -> str:
     
     return " ".join(searchable_values)
 
-def calculate_depreciation(
-    acquisition_cost: Decimal, 
-    depreciation_rate: Decimal, 
-    acquisition_date: date,
-    calculation_date: Optional[date] = None
-) -> Dict[str, Decimal]:
-    """calc depreciation vals"""
-    if calculation_date is None:
-        calculation_date = date.today()
-    
-    years_elapsed = Decimal((calculation_date - acquisition_date).days) / Decimal("365.25")
-    annual_depreciation = acquisition_cost * (depreciation_rate / Decimal("100"))
-    accumulated_depreciation = min(annual_depreciation * years_elapsed, acquisition_cost)
-    net_book_value = acquisition_cost - accumulated_depreciation
-    
-    return {
-        "annual_depreciation": annual_depreciation,
-        "accumulated_depreciation": accumulated_depreciation,
-        "net_book_value": net_book_value
-    }
+# the fields nbv depends on, a change to any of them revalues the asset
+DEPRECIATION_FIELDS = (
+    "acquisition_cost", "depreciation_rate", "acquisition_date", "useful_life_years",
+    "depreciation_method", "useful_life_units", "units_used",
+)
+
+def calculate_depreciation(asset: Assets, calculation_date: Optional[date] = None) -> Dict[str, Decimal]:
+    """calc depreciation vals for one asset, same engine the reports n the recompute use"""
+    return depreciation.value_asset(asset, calculation_date)
 
 def generate_tag_number(category: str, department_code: str, sequence: int) -> str:
     """Generate asset tag number based on category and department"""
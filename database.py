@@ -1,6 +1,12 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError, OperationalError, DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import os
+import time
+import threading
+import itertools
 from dotenv import load_dotenv
 
 
@@ -13,12 +19,290 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
 DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DB_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# read replicas, comma separated postgresql:// urls. empty = everything reads from primary
+DB_REPLICA_URLS = [u.strip() for u in os.getenv("DB_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 10))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", 15))
+
+# sql echo only when debugging, its very noisy and slow under load
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+if DB_ECHO:
+    print(f"\n\n\n\n{DB_URL}\n\n\n")
+
+
+def _env_int(key: str, default: int) -> int:
+    return int(os.getenv(key, default))
+
+def _pool_settings(name: str, size: int, overflow: int, timeout: int, recycle: int, statement_timeout_ms: int) -> dict:
+    """pool settings for a workload, override with DB_POOL_<NAME>_* env vars"""
+    prefix = f"DB_POOL_{name.upper()}_"
+    return {
+        "pool_size": _env_int(prefix + "SIZE", size),
+        "max_overflow": _env_int(prefix + "MAX_OVERFLOW", overflow),
+        "pool_timeout": _env_int(prefix + "TIMEOUT", timeout),
+        "pool_recycle": _env_int(prefix + "RECYCLE", recycle),
+        "pool_pre_ping": os.getenv(prefix + "PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "statement_timeout_ms": _env_int(prefix + "STATEMENT_TIMEOUT_MS", statement_timeout_ms),
+    }
+
+# oltp - logins, scans, crud. reporting - heavy report scans. jobs - background writers n schedulers
+POOL_CONFIG = {
+    "oltp": _pool_settings("oltp", size=10, overflow=10, timeout=10, recycle=1800, statement_timeout_ms=15000),
+    "reporting": _pool_settings("reporting", size=4, overflow=2, timeout=30, recycle=1800, statement_timeout_ms=120000),
+    "jobs": _pool_settings("jobs", size=2, overflow=2, timeout=60, recycle=1800, statement_timeout_ms=0),
+}
+
+
+class PoolStats:
+    """checkout/wait/overflow counters for one named pool"""
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.overflow_peak = 0
+
+    def record_wait(self, waited: float, overflow: int, timed_out: bool = False):
+        with self.lock:
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool=None) -> dict:
+        with self.lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.wait_total * 1000, 2),
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+                "overflow_peak": self.overflow_peak,
+            }
+        if pool is not None and hasattr(pool, "size"):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+POOL_STATS = {}
+
+def _pool_stats(name: str) -> PoolStats:
+    if name not in POOL_STATS:
+        POOL_STATS[name] = PoolStats(name)
+    return POOL_STATS[name]
+
+
+class _TimedGetMixin:
+    # times the wait for a free connection, logging_name carries the pool name
+    def _do_get(self):
+        stats = _pool_stats(self.logging_name)
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            stats.record_wait(time.perf_counter() - started, self.overflow(), timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - started, self.overflow())
+        return conn
+
+class InstrumentedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _attach_pool_events(sync_engine, name: str):
+    stats = _pool_stats(name)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        with stats.lock:
+            stats.connects += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        with stats.lock:
+            stats.checkouts += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        with stats.lock:
+            stats.checkins += 1
+
+
+def _engine_kwargs(cfg: dict) -> dict:
+    return {
+        "pool_size": cfg["pool_size"],
+        "max_overflow": cfg["max_overflow"],
+        "pool_timeout": cfg["pool_timeout"],
+        "pool_recycle": cfg["pool_recycle"],
+        "pool_pre_ping": cfg["pool_pre_ping"],
+        "echo": DB_ECHO,
+    }
+
+def make_engine(name: str, url: str = DB_URL, stats_name: str = None):
+    cfg = POOL_CONFIG[name]
+    stats_name = stats_name or name
+    connect_args = {}
+    if cfg["statement_timeout_ms"]:
+        connect_args["options"] = f"-c statement_timeout={cfg['statement_timeout_ms']}"
+    eng = create_engine(url, poolclass=InstrumentedQueuePool, pool_logging_name=stats_name, connect_args=connect_args, **_engine_kwargs(cfg))
+    _attach_pool_events(eng, stats_name)
+    return eng
+
+def make_async_engine(name: str, url: str = ASYNC_DB_URL, stats_name: str = None):
+    cfg = POOL_CONFIG[name]
+    stats_name = stats_name or f"{name}_async"
+    connect_args = {}
+    if cfg["statement_timeout_ms"]:
+        connect_args["server_settings"] = {"statement_timeout": str(cfg["statement_timeout_ms"])}
+    eng = create_async_engine(url, poolclass=InstrumentedAsyncQueuePool, pool_logging_name=stats_name, connect_args=connect_args, **_engine_kwargs(cfg))
+    _attach_pool_events(eng.sync_engine, stats_name)
+    return eng
+
+
+engines = {name: make_engine(name) for name in POOL_CONFIG}
+engine = engines["oltp"]
+report_engine = engines["reporting"]
+job_engine = engines["jobs"]
 
-print(f"\n\n\n\n{DB_URL}\n\n\n")
-engine = create_engine(DB_URL, echo=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=report_engine)
+JobSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=job_engine)
 Base = declarative_base()
 
+# asyncpg engine for async routes, queries here dont block the event loop
+async_engine = make_async_engine("oltp")
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+class Replica:
+    def __init__(self, index: int, url: str):
+        self.name = f"replica{index}"
+        self.url = url
+        self.engine = make_engine("reporting", url, stats_name=f"{self.name}_reporting")
+        self.async_engine = make_async_engine("oltp", url.replace("postgresql://", "postgresql+asyncpg://", 1), stats_name=f"{self.name}_async")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        # unhealthy until the first lag check passes
+        self.healthy = False
+        self.lag_seconds = None
+        self.last_check = None
+        self.last_error = None
+
+    def status(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_check": self.last_check,
+            "last_error": self.last_error,
+        }
+
+# 0 lag when replay caught up with what was received, else age of the last replayed txn
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReadRouter:
+    """sends read only sessions to healthy replicas, falls back to the primary pools"""
+    def __init__(self, urls):
+        self.replicas = [Replica(i, url) for i, url in enumerate(urls)]
+        self._rr = itertools.count()
+        self._monitor = None
+        self._stop = threading.Event()
+
+    def check(self, replica: Replica):
+        try:
+            with replica.engine.connect() as conn:
+                lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+            replica.lag_seconds = round(lag, 3)
+            replica.healthy = lag <= DB_REPLICA_MAX_LAG_SECONDS
+            replica.last_error = None if replica.healthy else f"lag {lag:.1f}s over {DB_REPLICA_MAX_LAG_SECONDS}s"
+        except Exception as e:
+            replica.healthy = False
+            replica.last_error = str(e)[:200]
+        replica.last_check = time.time()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _monitor_loop(self):
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(DB_REPLICA_CHECK_INTERVAL)
+
+    def start(self):
+        if not self.replicas or self._monitor:
+            return
+        self._monitor = threading.Thread(target=self._monitor_loop, name="replica-monitor", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def pick(self):
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._rr) % len(healthy)]
+
+    def mark_down(self, replica: Replica, err: Exception):
+        replica.healthy = False
+        replica.last_error = str(err)[:200]
+        replica.last_check = time.time()
+
+    def status(self) -> dict:
+        return {r.name: r.status() for r in self.replicas}
+
+read_router = ReadRouter(DB_REPLICA_URLS)
+
+
+def _replica_session(fallback_factory):
+    """replica session when one is healthy n reachable, else a session from fallback_factory"""
+    replica = read_router.pick()
+    if replica:
+        db = replica.SessionLocal()
+        try:
+            db.connection()
+            return db
+        except (OperationalError, DBAPIError) as e:
+            db.close()
+            read_router.mark_down(replica, e)
+    return fallback_factory()
+
+async def _replica_async_session(fallback_factory):
+    replica = read_router.pick()
+    if replica:
+        db = replica.AsyncSessionLocal()
+        try:
+            await db.connection()
+            return db
+        except (OperationalError, DBAPIError) as e:
+            await db.close()
+            read_router.mark_down(replica, e)
+    return fallback_factory()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,3 +310,41 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """read only list endpoints, replica or the oltp primary"""
+    db = _replica_session(SessionLocal)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def open_report_session():
+    """report session for work that outlives the request dependencies (streamed exports), caller closes it"""
+    return _replica_session(ReportSessionLocal)
+
+def get_report_db():
+    """reports, replica or the reporting pool on primary"""
+    db = _replica_session(ReportSessionLocal)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    db = await _replica_async_session(AsyncSessionLocal)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def get_pool_metrics() -> dict:
+    pools = {name: eng.pool for name, eng in engines.items()}
+    pools["oltp_async"] = async_engine.sync_engine.pool
+    for replica in read_router.replicas:
+        pools[f"{replica.name}_reporting"] = replica.engine.pool
+        pools[f"{replica.name}_async"] = replica.async_engine.sync_engine.pool
+    return {name: _pool_stats(name).snapshot(pool) for name, pool in pools.items()}
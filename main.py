@@ -1,14 +1,16 @@
 from fastapi import FastAPI
-from .database import  engine
+from .database import  engine, read_router
 from . import models
 from .services.logger_queue import setup_background_logging
+from .services.password_hasher import password_hasher
+from .services.scheduler import start_scheduler, stop_scheduler
 from .system_vars import sys_logger
 
 from .routers import a_crude, auth,roles,users,departments,location,a_transfer,a_supp_routes,a_lifecycle,a_tracking,a_assignment,a_maintainance,a_disposal
 from .routers.reports import assets_r,complience_r,departments_r,exec_r,maintainance_r,reports,sec_r,transdispo_r,utils_r
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import other_supp_routes,auth22
+from .routers import other_supp_routes,auth22,metrics,report_jobs,exports
 
 
 
@@ -19,6 +21,17 @@ if sys_logger:
  
 models.Base.metadata.create_all(bind=engine)
 
+@app.on_event("startup")
+async def start_services():
+    read_router.start()
+    start_scheduler()
+
+@app.on_event("shutdown")
+async def stop_services():
+    stop_scheduler()
+    read_router.stop()
+    password_hasher.shutdown()
+
 
 origins = [
     "http://localhost:8080",
@@ -64,4 +77,8 @@ app.include_router(maintainance_r.router)
 app.include_router(transdispo_r.router)
 app.include_router(exec_r.router)
 app.include_router(complience_r.router)
-app.include_router(sec_r.router)
\ No newline at end of file
+app.include_router(sec_r.router)
+app.include_router(report_jobs.router)
+app.include_router(exports.router)
+
+app.include_router(metrics.router)
\ No newline at end of file
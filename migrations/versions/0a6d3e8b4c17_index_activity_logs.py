@@ -0,0 +1,32 @@
+"""index activity logs
+
+Revision ID: 0a6d3e8b4c17
+Revises: f52c8a1d7e39
+Create Date: 2026-10-17 19:32:44.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d3e8b4c17'
+down_revision: Union[str, Sequence[str], None] = 'f52c8a1d7e39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_activity_logs_created_at', 'activity_logs', ['created_at'], unique=False)
+    op.create_index('ix_activity_logs_user_created', 'activity_logs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_activity_logs_action_created', 'activity_logs', ['action', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activity_logs_action_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_user_created', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_created_at', table_name='activity_logs')
@@ -0,0 +1,57 @@
+"""add asset rollups
+
+Revision ID: 29f4a84e148d
+Revises: 4f5ea7d39c98
+Create Date: 2026-10-17 11:02:51.730916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '29f4a84e148d'
+down_revision: Union[str, Sequence[str], None] = '4f5ea7d39c98'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('asset_rollups',
+    sa.Column('department_id', sa.String(length=60), nullable=False),
+    sa.Column('category', sa.String(length=60), nullable=False),
+    sa.Column('status', sa.String(length=60), nullable=False),
+    sa.Column('condition', sa.String(length=60), nullable=False),
+    sa.Column('county_code', sa.String(length=10), nullable=False),
+    sa.Column('asset_count', sa.Integer(), nullable=False),
+    sa.Column('unassigned_count', sa.Integer(), nullable=False),
+    sa.Column('total_value', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('department_id', 'category', 'status', 'condition', 'county_code')
+    )
+
+    # initial fill, same query as services.asset_rollups.REBUILD_SQL
+    op.execute("""
+        INSERT INTO asset_rollups (
+            department_id, category, status, condition, county_code,
+            asset_count, unassigned_count, total_value, updated_at
+        )
+        SELECT
+            coalesce(department_id, ''), category::text, status::text,
+            coalesce(condition::text, ''), coalesce(county_code, ''),
+            count(*),
+            count(*) FILTER (WHERE responsible_officer_id IS NULL),
+            coalesce(sum(coalesce(nullif(current_value, 0), acquisition_cost, 0)), 0),
+            now()
+        FROM assets
+        WHERE is_deleted = false
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('asset_rollups')
@@ -0,0 +1,37 @@
+"""add asset data quality
+
+Revision ID: 3c9e5b2f8a61
+Revises: 0a6d3e8b4c17
+Create Date: 2026-10-17 20:18:09.671254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5b2f8a61'
+down_revision: Union[str, Sequence[str], None] = '0a6d3e8b4c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # left null here, services.data_quality.backfill_data_quality scores existing rows in batches at startup
+    op.add_column('assets', sa.Column('data_quality_flags', sa.Integer(), nullable=True))
+    op.add_column('assets', sa.Column('data_quality_score', sa.Numeric(precision=5, scale=2), nullable=True))
+    op.create_index(op.f('ix_assets_data_quality_flags'), 'assets', ['data_quality_flags'], unique=False)
+    op.create_index(op.f('ix_assets_data_quality_score'), 'assets', ['data_quality_score'], unique=False)
+    op.create_index('ix_assets_dept_data_quality', 'assets', ['department_id', 'data_quality_flags'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_assets_dept_data_quality', table_name='assets')
+    op.drop_index(op.f('ix_assets_data_quality_score'), table_name='assets')
+    op.drop_index(op.f('ix_assets_data_quality_flags'), table_name='assets')
+    op.drop_column('assets', 'data_quality_score')
+    op.drop_column('assets', 'data_quality_flags')
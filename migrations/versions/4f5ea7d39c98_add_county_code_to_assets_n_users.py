@@ -0,0 +1,90 @@
+"""add county_code to assets n users
+
+Revision ID: 4f5ea7d39c98
+Revises: 15bf5ca82f0f
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+import json
+import os
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f5ea7d39c98'
+down_revision: Union[str, Sequence[str], None] = '15bf5ca82f0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _truthy(expr: str) -> str:
+    """the jsonb value, or NULL where python would find it falsy (null, {}, [], "", false, 0)"""
+    return f"""(CASE WHEN ({expr})::text IN ('null', '{{}}', '[]', '""', 'false', '0') THEN NULL ELSE {expr} END)"""
+
+
+def county_keys_sql(table: str) -> str:
+    """(id, key) per located row, services.location_service.county_code_from_location n county_code_for
+    in sql: the first non empty of administrative_location / administrative (then its county), county,
+    county_name, falling through empty values like the python `or` does, normalised like
+    normalize_county_key n the leading zeros off an all digit key ("047" -> "47")"""
+    return f"""
+        SELECT id, CASE WHEN key ~ '^[0-9]+$' THEN regexp_replace(key, '^0+(?=[0-9])', '') ELSE key END AS key
+        FROM (
+            SELECT id, regexp_replace(lower(coalesce(
+                {_truthy("admin->'county'")} #>> '{{}}',
+                {_truthy("loc->'county'")} #>> '{{}}',
+                {_truthy("loc->'county_name'")} #>> '{{}}'
+            )), '[^a-z0-9]', '', 'g') AS key
+            FROM (
+                SELECT id, loc, coalesce(
+                    {_truthy("loc->'administrative_location'")},
+                    {_truthy("loc->'administrative'")}
+                ) AS admin
+                FROM (SELECT id, location::jsonb AS loc FROM {table} WHERE location IS NOT NULL) located
+            ) shaped
+        ) named
+    """
+
+
+def _county_values() -> str:
+    fpath = os.path.join(os.path.dirname(__file__), "..", "..", "services", "counties.json")
+    with open(fpath, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    rows = []
+    for county in data:
+        key = re.sub(r"[^a-z0-9]", "", county["county_name"].lower())
+        rows.append(f"('{key}', '{county['county_code']}')")
+        rows.append(f"('{county['county_code']}', '{county['county_code']}')")
+    return ", ".join(rows)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('assets', sa.Column('county_code', sa.String(length=10), nullable=True))
+    op.add_column('users', sa.Column('county_code', sa.String(length=10), nullable=True))
+
+    values = _county_values()
+    for table in ("assets", "users"):
+        op.execute(f"""
+            UPDATE {table} t SET county_code = c.code
+            FROM ({county_keys_sql(table)}) k
+            JOIN (VALUES {values}) AS c(key, code) ON c.key = k.key
+            WHERE t.id = k.id
+        """)
+
+    op.create_index(op.f('ix_assets_county_code'), 'assets', ['county_code'], unique=False)
+    op.create_index('ix_assets_county_dept_category', 'assets', ['county_code', 'department_id', 'category'], unique=False)
+    op.create_index(op.f('ix_users_county_code'), 'users', ['county_code'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_county_code'), table_name='users')
+    op.drop_index('ix_assets_county_dept_category', table_name='assets')
+    op.drop_index(op.f('ix_assets_county_code'), table_name='assets')
+    op.drop_column('users', 'county_code')
+    op.drop_column('assets', 'county_code')
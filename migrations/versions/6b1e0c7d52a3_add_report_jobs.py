@@ -0,0 +1,50 @@
+"""add report jobs
+
+Revision ID: 6b1e0c7d52a3
+Revises: 29f4a84e148d
+Create Date: 2026-10-17 13:41:08.215374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1e0c7d52a3'
+down_revision: Union[str, Sequence[str], None] = '29f4a84e148d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('report_jobs',
+    sa.Column('id', sa.String(length=60), nullable=False),
+    sa.Column('report_id', sa.String(length=100), nullable=False),
+    sa.Column('filters', sa.JSON(), nullable=True),
+    sa.Column('requested_by', sa.String(length=60), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'DONE', 'FAILED', name='reportjobstatus'), nullable=False),
+    sa.Column('backend', sa.String(length=10), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('result_bytes', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_jobs_requested_by'), 'report_jobs', ['requested_by'], unique=False)
+    op.create_index('ix_report_jobs_status_created', 'report_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_report_jobs_status_created', table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_requested_by'), table_name='report_jobs')
+    op.drop_table('report_jobs')
+    sa.Enum(name='reportjobstatus').drop(op.get_bind(), checkfirst=True)
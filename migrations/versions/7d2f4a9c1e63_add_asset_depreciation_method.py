@@ -0,0 +1,38 @@
+"""add asset depreciation method
+
+Revision ID: 7d2f4a9c1e63
+Revises: 3c9e5b2f8a61
+Create Date: 2026-10-17 21:42:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4a9c1e63'
+down_revision: Union[str, Sequence[str], None] = '3c9e5b2f8a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+depreciation_method_enum = sa.Enum('STRAIGHT_LINE', 'REDUCING_BALANCE', 'UNITS_OF_USE', name='depreciationmethod')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    depreciation_method_enum.create(op.get_bind(), checkfirst=True)
+    # existing rows stay null, the engine reads null as straight line which is what they were valued with
+    op.add_column('assets', sa.Column('depreciation_method', depreciation_method_enum, nullable=True))
+    op.add_column('assets', sa.Column('useful_life_units', sa.DECIMAL(precision=18, scale=2), nullable=True))
+    op.add_column('assets', sa.Column('units_used', sa.DECIMAL(precision=18, scale=2), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('assets', 'units_used')
+    op.drop_column('assets', 'useful_life_units')
+    op.drop_column('assets', 'depreciation_method')
+    depreciation_method_enum.drop(op.get_bind(), checkfirst=True)
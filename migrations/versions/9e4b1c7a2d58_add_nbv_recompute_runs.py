@@ -0,0 +1,48 @@
+"""add nbv recompute runs
+
+Revision ID: 9e4b1c7a2d58
+Revises: 7d2f4a9c1e63
+Create Date: 2026-10-17 22:31:54.206719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b1c7a2d58'
+down_revision: Union[str, Sequence[str], None] = '7d2f4a9c1e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('nbv_recompute_runs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'DONE', 'FAILED', name='nbvrunstatus'), nullable=False),
+    sa.Column('last_asset_id', sa.String(length=60), nullable=False),
+    sa.Column('chunks', sa.Integer(), nullable=False),
+    sa.Column('assets_scanned', sa.Integer(), nullable=False),
+    sa.Column('assets_updated', sa.Integer(), nullable=False),
+    sa.Column('assets_skipped', sa.Integer(), nullable=False),
+    sa.Column('skipped_ids', sa.JSON(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('value_change', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_nbv_recompute_runs_status_started', 'nbv_recompute_runs', ['status', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_nbv_recompute_runs_status_started', table_name='nbv_recompute_runs')
+    op.drop_table('nbv_recompute_runs')
+    sa.Enum(name='nbvrunstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""index maintenance request date
+
+Revision ID: b83f1d9e6c27
+Revises: 6b1e0c7d52a3
+Create Date: 2026-10-17 15:12:36.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83f1d9e6c27'
+down_revision: Union[str, Sequence[str], None] = '6b1e0c7d52a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_maintenance_requests_request_date'), 'maintenance_requests', ['request_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_maintenance_requests_request_date'), table_name='maintenance_requests')
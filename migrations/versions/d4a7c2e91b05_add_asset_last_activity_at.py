@@ -0,0 +1,45 @@
+"""add asset last_activity_at
+
+Revision ID: d4a7c2e91b05
+Revises: b83f1d9e6c27
+Create Date: 2026-10-17 16:04:18.221350
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e91b05'
+down_revision: Union[str, Sequence[str], None] = 'b83f1d9e6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# latest of the asset's own timestamps n anything written against it
+BACKFILL_SQL = """
+    UPDATE assets a
+    SET last_activity_at = greatest(
+        coalesce(a.updated_at, a.created_at),
+        (SELECT max(e.event_date) FROM asset_lifecycle_events e WHERE e.asset_id = a.id),
+        (SELECT max(greatest(m.request_date, m.started_at, m.completed_at, m.resolved_date))
+            FROM maintenance_requests m WHERE m.asset_id = a.id),
+        (SELECT max(greatest(t.initiated_date, t.approval_date, t.completed_date))
+            FROM asset_transfers t WHERE t.asset_id = a.id)
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('assets', sa.Column('last_activity_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.execute(BACKFILL_SQL)
+    op.create_index(op.f('ix_assets_last_activity_at'), 'assets', ['last_activity_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_assets_last_activity_at'), table_name='assets')
+    op.drop_column('assets', 'last_activity_at')
@@ -0,0 +1,45 @@
+"""add kpi snapshots
+
+Revision ID: e19b6f3a0d48
+Revises: d4a7c2e91b05
+Create Date: 2026-10-17 17:26:51.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b6f3a0d48'
+down_revision: Union[str, Sequence[str], None] = 'd4a7c2e91b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('kpi_snapshots',
+    sa.Column('scope', sa.String(length=20), nullable=False),
+    sa.Column('scope_id', sa.String(length=60), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('total_assets', sa.Integer(), nullable=False),
+    sa.Column('total_value', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.Column('operational_count', sa.Integer(), nullable=False),
+    sa.Column('under_maintenance', sa.Integer(), nullable=False),
+    sa.Column('attention_count', sa.Integer(), nullable=False),
+    sa.Column('unassigned_count', sa.Integer(), nullable=False),
+    sa.Column('acquired_30d', sa.Integer(), nullable=False),
+    sa.Column('maintenance_requests_30d', sa.Integer(), nullable=False),
+    sa.Column('overdue_maintenance', sa.Integer(), nullable=False),
+    sa.Column('disposals_30d', sa.Integer(), nullable=False),
+    sa.Column('pending_transfers', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('scope', 'scope_id', 'snapshot_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('kpi_snapshots')
@@ -0,0 +1,32 @@
+"""index failed login attempts
+
+Revision ID: f52c8a1d7e39
+Revises: e19b6f3a0d48
+Create Date: 2026-10-17 18:41:07.553192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f52c8a1d7e39'
+down_revision: Union[str, Sequence[str], None] = 'e19b6f3a0d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_login_attempts_failed_email_ts', 'login_attempts', ['email', 'timestamp'], unique=False, postgresql_where=sa.text('success = false'))
+    op.create_index('ix_login_attempts_failed_ip_ts', 'login_attempts', ['ip_address', 'timestamp'], unique=False, postgresql_where=sa.text('success = false'))
+    op.create_index('ix_login_attempts_failed_fp_ts', 'login_attempts', ['fingerprint_hash', 'timestamp'], unique=False, postgresql_where=sa.text('success = false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_login_attempts_failed_fp_ts', table_name='login_attempts', postgresql_where=sa.text('success = false'))
+    op.drop_index('ix_login_attempts_failed_ip_ts', table_name='login_attempts', postgresql_where=sa.text('success = false'))
+    op.drop_index('ix_login_attempts_failed_email_ts', table_name='login_attempts', postgresql_where=sa.text('success = false'))
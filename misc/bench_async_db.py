@@ -0,0 +1,75 @@
+"""concurrency bench for the async db routes
+
+runs a slow report in the background and hammers a lookup route at the
+same time, prints latency percentiles + throughput. run once against a
+build before the async switch and once after, compare the numbers.
+
+    python misc/bench_async_db.py --base http://localhost:8000 --token <jwt> --tag STD-ICT-00001
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def timed_get(session, url, headers):
+    t0 = time.perf_counter()
+    try:
+        status = session.get(url, headers=headers, timeout=120).status_code
+    except requests.RequestException:
+        status = None  # reset / timed out, a server with a blocked loop drops connections
+    return time.perf_counter() - t0, status
+
+
+def slow_report_loop(base, headers, stop):
+    s = requests.Session()
+    while not stop.is_set():
+        try:
+            s.get(f"{base}/api/v1/r/reports/asset-summary-dashboard", headers=headers, timeout=300)
+        except requests.RequestException:
+            pass
+
+
+def percentile(vals, pct):
+    vals = sorted(vals)
+    k = max(0, min(len(vals) - 1, int(round(pct / 100 * (len(vals) - 1)))))
+    return vals[k]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--token", required=True)
+    ap.add_argument("--tag", required=True, help="tag number used for the /by-tag lookup")
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--report-threads", type=int, default=2, help="parallel slow report callers")
+    args = ap.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    url = f"{args.base}/api/v1/assets/by-tag/{args.tag}"
+
+    stop = threading.Event()
+    bg = [threading.Thread(target=slow_report_loop, args=(args.base, headers, stop), daemon=True) for _ in range(args.report_threads)]
+    for t in bg:
+        t.start()
+
+    session = requests.Session()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: timed_get(session, url, headers), range(args.requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    lat = [r[0] * 1000 for r in results]
+    errors = len([r for r in results if r[1] != 200])
+    print(f"requests: {len(results)}  errors: {errors}  concurrency: {args.concurrency}  report threads: {args.report_threads}")
+    print(f"throughput: {len(results) / elapsed:.1f} req/s")
+    print(f"latency ms  p50: {statistics.median(lat):.1f}  p95: {percentile(lat, 95):.1f}  p99: {percentile(lat, 99):.1f}  max: {max(lat):.1f}")
+
+
+if __name__ == "__main__":
+    main()
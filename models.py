@@ -8,6 +8,9 @@ import uuid
 import enum
 from sqlalchemy.dialects.postgresql import UUID,JSONB
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import event, inspect, text
+from .services.location_service import county_code_from_location
+from .services import data_quality
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
@@ -119,6 +122,13 @@ class LoginAttempt(Base):
     
     user = relationship("User", back_populates="login_attempts")
 
+    __table_args__ = (
+        # failures only, in time order per key, what the failed login window queries partition n sort by
+        Index("ix_login_attempts_failed_email_ts", "email", "timestamp", postgresql_where=text("success = false")),
+        Index("ix_login_attempts_failed_ip_ts", "ip_address", "timestamp", postgresql_where=text("success = false")),
+        Index("ix_login_attempts_failed_fp_ts", "fingerprint_hash", "timestamp", postgresql_where=text("success = false")),
+    )
+
 class MFACode(Base):
     __tablename__ = "mfa_codes"
     
@@ -172,6 +182,7 @@ class User(Base):
     entity_type = Column(SQLEnum(EntityType), default=EntityType.department, nullable=False)
     entity_name = Column(String(80), nullable=False)
     location = Column(JSON, nullable=True)
+    county_code = Column(String(10), nullable=True, index=True) # from location, kept in sync by listener below
     assigned_perms = Column(JSON)
     access_scope = Column(JSON)
     is_two_factor_enabled = Column(Boolean, default=False)
@@ -251,6 +262,13 @@ class ActivityLog(Base):
     
     user = relationship("User", back_populates="activitylogs")
 
+    __table_args__ = (
+        # newest first keyset pages, overall n narrowed to a user or an action
+        Index("ix_activity_logs_created_at", "created_at"),
+        Index("ix_activity_logs_user_created", "user_id", "created_at"),
+        Index("ix_activity_logs_action_created", "action", "created_at"),
+    )
+
 class PolicyEffect(str, enum.Enum):
     ALLOW = "allow"
     DENY = "deny"
@@ -308,6 +326,11 @@ class AssetCondition(str, enum.Enum):
     FAIR = "fair"
     POOR = "poor"
 
+class DepreciationMethod(str, enum.Enum):
+    STRAIGHT_LINE = "straight_line"
+    REDUCING_BALANCE = "reducing_balance"
+    UNITS_OF_USE = "units_of_use"
+
 class TransferStatus(str, enum.Enum):
     INITIATED = "initiated"
     APPROVED = "approved"
@@ -348,6 +371,7 @@ class Assets(Base):
     department_id = Column(String(60), ForeignKey('departments.dept_id'), nullable=True)
     responsible_officer_id = Column(String(60), ForeignKey('users.id'), nullable=True)
     location = Column(JSON,nullable = True)
+    county_code = Column(String(10), nullable=True, index=True) # from location, kept in sync by listener below
     
     status = Column(SQLEnum(AssetStatus), default=AssetStatus.OPERATIONAL, nullable=False, index=True)
     condition = Column(SQLEnum(AssetCondition), default=AssetCondition.GOOD)
@@ -359,6 +383,9 @@ class Assets(Base):
     current_value = Column(DECIMAL(18, 2))# smthin called Net Book Value
     depreciation_rate = Column(DECIMAL(5, 2))
     useful_life_years = Column(Integer)
+    depreciation_method = Column(SQLEnum(DepreciationMethod), default=DepreciationMethod.STRAIGHT_LINE, nullable=True) # null is straight line
+    useful_life_units = Column(DECIMAL(18, 2), nullable=True) # units of use only, km / hours / cycles the asset is good for
+    units_used = Column(DECIMAL(18, 2), nullable=True)
     
     # Dispose
     disposal_date = Column(Date)
@@ -375,6 +402,9 @@ class Assets(Base):
     # audit
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now(), index=True) # bumped by the listeners below on lifecycle, maintenance, transfer n location writes
+    data_quality_flags = Column(Integer, nullable=True, index=True) # bit per missing field, see services.data_quality, set by listener below
+    data_quality_score = Column(Numeric(5, 2), nullable=True, index=True)
     created_by = Column(String(60), ForeignKey('users.id'))
     is_deleted = Column(Boolean, default=False)
     checked_by = Column(String(60), ForeignKey('users.id'), nullable=True)
@@ -390,6 +420,52 @@ class Assets(Base):
     checked_by_user = relationship("User", foreign_keys=[checked_by], back_populates="assets_checked")
     authorized_by_user = relationship("User", foreign_keys=[authorized_by], back_populates="assets_authorized")
 
+    __table_args__ = (
+        Index("ix_assets_county_dept_category", "county_code", "department_id", "category"),
+        Index("ix_assets_dept_data_quality", "department_id", "data_quality_flags"),
+    )
+
+
+# county_code mirrors the county in location so scope filters can use an index
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+@event.listens_for(Assets, "before_insert")
+@event.listens_for(Assets, "before_update")
+def _sync_county_code(mapper, connection, target):
+    target.county_code = county_code_from_location(target.location)
+
+
+# data quality flags n score follow every insert/update, the missing data report just aggregates them
+@event.listens_for(Assets, "before_insert")
+@event.listens_for(Assets, "before_update")
+def _score_data_quality(mapper, connection, target):
+    target.data_quality_flags = data_quality.flags_for(target)
+    target.data_quality_score = data_quality.score_for(target.data_quality_flags)
+
+
+# a location change counts as activity, see _touch_asset_activity below for the child rows
+@event.listens_for(Assets, "before_update")
+def _touch_on_location_change(mapper, connection, target):
+    if inspect(target).attrs.location.history.has_changes():
+        target.last_activity_at = func.now()
+
+
+class AssetRollup(Base):
+    """count n value of live assets per dept x category x status x condition x county
+    kept current by services.asset_rollups, '' stands in for a missing dim so the pk works"""
+    __tablename__ = "asset_rollups"
+
+    department_id = Column(String(60), primary_key=True, default="")
+    category = Column(String(60), primary_key=True)  # enum names, same as the assets columns store
+    status = Column(String(60), primary_key=True)
+    condition = Column(String(60), primary_key=True, default="")
+    county_code = Column(String(10), primary_key=True, default="")
+
+    asset_count = Column(Integer, nullable=False, default=0)
+    unassigned_count = Column(Integer, nullable=False, default=0)
+    total_value = Column(Numeric(20, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class AssetLifecycleEvents(Base): #logging 2, work alongside the other
     __tablename__ = "asset_lifecycle_events"
 
@@ -475,7 +551,7 @@ class MaintenanceRequests(Base):
     id = Column(String(60), primary_key=True, index=True)
     asset_id = Column(String(60), ForeignKey("assets.id"), nullable=False)
     requested_by = Column(String(60), ForeignKey("users.id"))
-    request_date = Column(DateTime, default=func.now())
+    request_date = Column(DateTime, default=func.now(), index=True)
     issue_type = Column(String(50))
     description = Column(Text)
     status =  Column(SQLEnum(MaintenanceStatus), default=MaintenanceStatus.INITIATED, nullable=True, index=True)
@@ -500,6 +576,25 @@ class MaintenanceRequests(Base):
     requester = relationship("User", foreign_keys=[requested_by])
     assignee = relationship("User", foreign_keys=[assigned_to])
 
+
+# last_activity_at on the asset is bumped whenever one of these is written,
+# so idle detection n the idle_days search filter are a range scan on its index
+@event.listens_for(AssetLifecycleEvents, "after_insert")
+@event.listens_for(MaintenanceRequests, "after_insert")
+@event.listens_for(MaintenanceRequests, "after_update")
+@event.listens_for(AssetTransfers, "after_insert")
+@event.listens_for(AssetTransfers, "after_update")
+def _touch_asset_activity(mapper, connection, target):
+    # flushing connection, commits or rolls back with the row
+    # updated_at set to itself or its onupdate would fire for a bookkeeping column
+    assets = Assets.__table__
+    connection.execute(
+        assets.update()
+        .where(assets.c.id == target.asset_id)
+        .values(last_activity_at=func.now(), updated_at=assets.c.updated_at)
+    )
+
+
 class AssetDisposals(Base):# define further, saw donations etc for dispose
     __tablename__ = "asset_disposals"
 
@@ -531,3 +626,88 @@ class AssetRevaluations(Base):
 
     asset = relationship("Assets")
     revaluator = relationship("User")
+
+
+class ReportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class ReportJob(Base):
+    """a report run outside the request, services.report_jobs queues it n a worker stores the result here"""
+    __tablename__ = "report_jobs"
+
+    id = Column(String(60), primary_key=True, default=lambda: str(uuid.uuid4()))
+    report_id = Column(String(100), nullable=False)
+    filters = Column(JSON, nullable=True)
+    requested_by = Column(String(60), ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(SQLEnum(ReportJobStatus), nullable=False, default=ReportJobStatus.QUEUED)
+    backend = Column(String(10), nullable=False, default="db")  # rq or db
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSONB, nullable=True)
+    result_bytes = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    requester = relationship("User")
+
+    __table_args__ = (
+        # the db worker claims the oldest queued job
+        Index("ix_report_jobs_status_created", "status", "created_at"),
+    )
+
+class NbvRunStatus(str, enum.Enum):
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class NbvRecomputeRun(Base):
+    """one pass of services.nbv_recompute over the depreciable assets, committed with every chunk
+    so last_asset_id is where an interrupted run picks up"""
+    __tablename__ = "nbv_recompute_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    as_of = Column(Date, nullable=False)
+    status = Column(SQLEnum(NbvRunStatus), nullable=False, default=NbvRunStatus.RUNNING)
+    last_asset_id = Column(String(60), nullable=False, default="")
+    chunks = Column(Integer, nullable=False, default=0)
+    assets_scanned = Column(Integer, nullable=False, default=0)
+    assets_updated = Column(Integer, nullable=False, default=0)
+    assets_skipped = Column(Integer, nullable=False, default=0)  # row locked by someone else at the time
+    skipped_ids = Column(JSON, nullable=True)  # those rows, retried once the pass is done
+    attempts = Column(Integer, nullable=False, default=0)
+    value_change = Column(Numeric(20, 2), nullable=False, default=0)  # new nbv minus old, summed
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_nbv_recompute_runs_status_started", "status", "started_at"),
+    )
+
+class KpiSnapshot(Base):
+    """the executive kpis as of one night, per department, per entity type n overall
+    written by services.kpi_snapshots, scope_id is '' for the overall row"""
+    __tablename__ = "kpi_snapshots"
+
+    # pk order serves both lookups, latest row for a scope n a scope's date range
+    scope = Column(String(20), primary_key=True)  # all, entity, department
+    scope_id = Column(String(60), primary_key=True, default="")  # entity type name or dept_id
+    snapshot_date = Column(Date, primary_key=True)
+
+    total_assets = Column(Integer, nullable=False, default=0)
+    total_value = Column(Numeric(20, 2), nullable=False, default=0)
+    operational_count = Column(Integer, nullable=False, default=0)
+    under_maintenance = Column(Integer, nullable=False, default=0)
+    attention_count = Column(Integer, nullable=False, default=0)
+    unassigned_count = Column(Integer, nullable=False, default=0)
+    acquired_30d = Column(Integer, nullable=False, default=0)
+    maintenance_requests_30d = Column(Integer, nullable=False, default=0)
+    overdue_maintenance = Column(Integer, nullable=False, default=0)
+    disposals_30d = Column(Integer, nullable=False, default=0)
+    pending_transfers = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func, desc, asc
+from sqlalchemy import or_, func, desc, asc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import  Optional, Dict
 from sqlalchemy.exc import IntegrityError
 
 import uuid
 
 from decimal import Decimal
-from ..database import get_db
+from ..database import get_db, get_async_db, get_async_read_db
 from ..models import User, Departments,Assets, AssetLifecycleEvents
 from ..schemas.assets import (
     AssetCreate, AssetUpdate, AssetResponse, AssetListResponse,
@@ -15,11 +16,11 @@ from ..schemas.assets import (
 )
 from ..asset_utils import (
     validate_category_attributes,
-    calculate_depreciation,
+    calculate_depreciation, DEPRECIATION_FIELDS,
     generate_tag_number,get_required_fields,StandardAssetAttributes,LandAttributes,BuildingAttributes
 )
 
-from ..asset_utils import add_namedep_asset
+from ..asset_utils import add_namedep_asset, asset_search_filters, asset_search_order
 from ..utilities import get_current_user
 
 router = APIRouter(
@@ -48,6 +49,10 @@ def create_lifecycle_event(
     db.add(event)
     return event
 
+async def count_rows(db: AsyncSession, stmt) -> int:
+    result = await db.execute(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    return result.scalar_one()
+
 def gen_asset_tag(db: Session, category: str, department_id: str) -> str:
     dept = db.query(Departments).filter(Departments.dept_id == department_id).first()
     dept_code = dept.name[:3].upper() if dept else "DEP"
@@ -89,10 +94,8 @@ async def create_a_new_asset(asset_data: AssetCreate,db: Session = Depends(get_d
     
     asset = Assets(id=str(uuid.uuid4()), created_by=current_user.id, **asset_data.dict())
     
-    if asset.acquisition_cost and asset.depreciation_rate and asset.acquisition_date:
-
-        depreciation = calculate_depreciation(asset.acquisition_cost, asset.depreciation_rate, asset.acquisition_date)
-        asset.current_value = depreciation["net_book_value"]
+    if asset.acquisition_cost:
+        asset.current_value = calculate_depreciation(asset)["net_book_value"]
     else:
         asset.current_value = asset.acquisition_cost
     try:
@@ -144,19 +147,19 @@ async def list_assets_search_func(
     status: Optional[str] = None,
     department_id: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Assets).filter(Assets.is_deleted == False)
+    stmt = select(Assets).filter(Assets.is_deleted == False)
 
     if category:
-        query = query.filter(Assets.category == category)
+        stmt = stmt.filter(Assets.category == category)
     if status:
-        query = query.filter(Assets.status == status)
+        stmt = stmt.filter(Assets.status == status)
     if department_id:
-        query = query.filter(Assets.department_id == department_id)
+        stmt = stmt.filter(Assets.department_id == department_id)
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
+        stmt = stmt.filter(
             or_(
                 Assets.description.ilike(search_term),
                 Assets.tag_number.ilike(search_term),
@@ -165,12 +168,13 @@ async def list_assets_search_func(
             )
         )
     
-    total = query.count()
+    total = await count_rows(db, stmt)
     offset = (page - 1) * size
-    assets = query.options(
+    result = await db.execute(stmt.options(
         joinedload(Assets.department),
         joinedload(Assets.responsible_officer)
-    ).offset(offset).limit(size).all()
+    ).offset(offset).limit(size))
+    assets = result.scalars().all()
     
     total_pages = (total + size - 1) // size
     
@@ -179,13 +183,14 @@ async def list_assets_search_func(
 @router.get("/{asset_id}", response_model=AssetResponse)
 async def get_asset_by_id(
     asset_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):  
-    asset = db.query(Assets).options(
+    result = await db.execute(select(Assets).options(
         joinedload(Assets.department),
         joinedload(Assets.responsible_officer)
-    ).filter(Assets.id == asset_id, Assets.is_deleted == False).first()
+    ).filter(Assets.id == asset_id, Assets.is_deleted == False))
+    asset = result.scalars().first()
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -222,10 +227,9 @@ async def update_asset(asset_id: str, asset_data: AssetUpdate, db: Session = Dep
             setattr(asset, field, nval)
     
     # Recalculate depreciation if changes
-    if any(field in changes for field in ['acquisition_cost', 'depreciation_rate', 'acquisition_date']):
-        if asset.acquisition_cost and asset.depreciation_rate and asset.acquisition_date:
-            depreciation = calculate_depreciation(asset.acquisition_cost,  asset.depreciation_rate,  asset.acquisition_date)
-            asset.current_value = depreciation["net_book_value"]
+    if any(field in changes for field in DEPRECIATION_FIELDS):
+        if asset.acquisition_cost:
+            asset.current_value = calculate_depreciation(asset)["net_book_value"]
             changes['current_value'] = {"new": str(asset.current_value)}
     
     if changes:
@@ -280,54 +284,16 @@ async def delete_asset(asset_id: str, db: Session = Depends(get_db), current_use
     return {"message": "Asset deleted successfully"}
 
 @router.get("/a/search/advanced", response_model=AssetListResponse)
-async def advanced_asset_search_adm(params: AssetSearchParams = Depends(),db: Session = Depends(get_db), cu: User =  Depends(get_current_user)):
+async def advanced_asset_search_adm(params: AssetSearchParams = Depends(),db: AsyncSession = Depends(get_async_read_db), cu: User =  Depends(get_current_user)):
  
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-
-    if params.query:
-        search_term = f"%{params.query}%"
-        query = query.filter(
-            or_(
-                Assets.description.ilike(search_term),
-                Assets.tag_number.ilike(search_term),
-                Assets.serial_number.ilike(search_term)
-       
-            )
-        )
-    
-    if params.category:
-        query = query.filter(Assets.category == params.category)
-    if params.status:
-        query = query.filter(Assets.status == params.status)
-    if params.condition:
-        query = query.filter(Assets.condition == params.condition)
-    if params.department_id:
-        query = query.filter(Assets.department_id == params.department_id)
-    if params.responsible_officer_id:
-        query = query.filter(Assets.responsible_officer_id == params.responsible_officer_id)
-    if params.location:
-        query = query.filter(Assets.location.ilike(f"%{params.location}%"))
-    if params.min_value:
-        query = query.filter(Assets.current_value >= params.min_value)
-    if params.max_value:
-        query = query.filter(Assets.current_value <= params.max_value)
-    if params.acquisition_date_from:
-        query = query.filter(Assets.acquisition_date >= params.acquisition_date_from)
-    if params.acquisition_date_to:
-        query = query.filter(Assets.acquisition_date <= params.acquisition_date_to)
+    stmt = select(Assets).filter(*asset_search_filters(params)).order_by(asset_search_order(params))
     
-    sort_column = getattr(Assets, params.sort_by, Assets.created_at)
-    if params.sort_order == "asc":
-        query = query.order_by(asc(sort_column))
-    else:
-        query = query.order_by(desc(sort_column))
-    
-    total = query.count()
+    total = await count_rows(db, stmt)
     
     offset = (params.page - 1) * params.size
-    assets = query.options(joinedload(Assets.department),joinedload(Assets.responsible_officer)).offset(offset).limit(params.size).all()
+    result = await db.execute(stmt.options(joinedload(Assets.department),joinedload(Assets.responsible_officer)).offset(offset).limit(params.size))
+    assets = result.scalars().all()
     
     total_pages = (total + params.size - 1) // params.size
     
     return AssetListResponse(assets=assets, total=total, page=params.page, size=params.size, total_pages=total_pages)
-
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends,HTTPException
 from sqlalchemy.orm import Session,joinedload
 from ..models import Assets,User
-from ..database import get_db
+from ..database import get_db, get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..schemas.assets import QRCodeResponse,AssetResponse,AssetLocationUpdate
 from ..utilities import get_current_user
 from datetime import datetime
@@ -70,13 +72,14 @@ async def update_asset_location(asset_id: str, location_data: AssetLocationUpdat
 
 # lookup 
 @router.get("/by-tag/{tag_number}", response_model=AssetResponse)
-async def get_asset_by_tag_no(tag_number: str,db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
+async def get_asset_by_tag_no(tag_number: str,db: AsyncSession = Depends(get_async_db),current_user: User = Depends(get_current_user)):
 
-    asset = db.query(Assets).options(joinedload(Assets.department),joinedload(Assets.responsible_officer)
+    result = await db.execute(select(Assets).options(joinedload(Assets.department),joinedload(Assets.responsible_officer)
     ).filter(
         Assets.tag_number == tag_number,
         Assets.is_deleted == False
-    ).first()
+    ))
+    asset = result.scalars().first()
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -84,13 +87,14 @@ async def get_asset_by_tag_no(tag_number: str,db: Session = Depends(get_db),curr
     return AssetResponse(**add_namedep_asset(asset))
 
 @router.get("/by-barcode/{barcode}", response_model=AssetResponse)
-async def get_asset_by_barcode(barcode: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_asset_by_barcode(barcode: str, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     
-    asset = db.query(Assets).options( joinedload(Assets.department), joinedload(Assets.responsible_officer)
+    result = await db.execute(select(Assets).options( joinedload(Assets.department), joinedload(Assets.responsible_officer)
     ).filter(
         Assets.barcode == barcode,
         Assets.is_deleted == False
-    ).first()
+    ))
+    asset = result.scalars().first()
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -100,15 +104,16 @@ async def get_asset_by_barcode(barcode: str, db: Session = Depends(get_db), curr
 @router.get("/by-serial/{serial_number}", response_model=AssetResponse)
 async def get_asset_by_serial_no(
     serial_number: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
 
-    asset = db.query(Assets).options(joinedload(Assets.department),joinedload(Assets.responsible_officer)
+    result = await db.execute(select(Assets).options(joinedload(Assets.department),joinedload(Assets.responsible_officer)
     ).filter(
         Assets.serial_number == serial_number,
         Assets.is_deleted == False
-    ).first()
+    ))
+    asset = result.scalars().first()
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -1,7 +1,7 @@
 from fastapi import status, Depends,HTTPException,APIRouter
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..utilities import generate_id,get_current_user
 
 from ..schemas.assets import AssetTransfereInitiate,TransferStatusEnum,TransSearchParams
@@ -43,7 +43,7 @@ async def transfer_an_asset(det: AssetTransfereInitiate,curr_user : User = Depen
 
 
 @router.get("/",status_code=200)
-async def list_transfers_param( p : TransSearchParams = Depends() ,curr_user: User = Depends(get_current_user),db: Session = Depends(get_db)):
+async def list_transfers_param( p : TransSearchParams = Depends() ,curr_user: User = Depends(get_current_user),db: Session = Depends(get_read_db)):
     """_summary_
 
     Args:
@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status, APIRouter, Query, Request, BackgroundTasks
 from ..models import User, TokenBase,PasswordResetToken
-from ..utilities import get_current_user, pwd_context, generate_id, authenticate_user, create_access_token, create_refresh_token,oauth2_scheme, check_token,revoke_tokens, SECRET_KEY,ALGORITHM, get_user_id,create_password_reset_token, validate_reset_token,revoke_tokens_byid
+from ..utilities import get_current_user, pwd_context, generate_id, authenticate_user, authenticate_user_async, create_access_token, create_refresh_token,oauth2_scheme, check_token,revoke_tokens, SECRET_KEY,ALGORITHM, get_user_id,create_password_reset_token, validate_reset_token,revoke_tokens_byid
 from ..schemas.main import CreateUser,AuthMethod, UserOut, TokenOut,TokenOutId, LoginRequest,UserOutProfile, UserStatus, ChangePassword,PasswordResetResponse, PasswordResetRequest,PasswordReset
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta, timezone
 from ..system_vars import ACCESS_TOKEN_EXPIERY,default_new_user_status, send_emails,sys_logger,default_role_id
 from jose import jwt,JWTError
 from ..services.emailsender import AssetFlowEmailService
+from ..services.password_hasher import password_hasher
+from ..services.principal_cache import principal_cache
 import os
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Optional
@@ -31,7 +33,7 @@ def user_register(user: CreateUser ,background_tasks: BackgroundTasks,   db: Ses
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
  
-    hashed_pass = pwd_context.hash(user.password)
+    hashed_pass = password_hasher.hash_sync(user.password)
     user_id = generate_id()
 
     new_user = User(
@@ -132,7 +134,7 @@ async def login_oauth2(
     remember_me: Optional[bool] = Query(default=False),
     db: Session = Depends(get_db)
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user_async(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     if user.status != "active":
@@ -216,7 +218,9 @@ async def refresh_token(
             TokenBase.user_id == user_id,
             TokenBase.revoked == False
         ).update({"revoked": True})
-        db.commit()     
+        db.commit()
+        # bulk update skips the orm events, cached principals would still accept the old access tokens
+        principal_cache.invalidate_user(user_id)
 
         original_expiry = token_record.exp
         now = datetime.now(timezone.utc)
@@ -251,14 +255,14 @@ async def prifile_change_password(req : ChangePassword, curr_user :User = Depend
     if req.old_password != req.old_password2:
         raise  HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, detail="Old Passwords dont match")
    
-    user = authenticate_user(curr_user.email,req.old_password, db)
+    user = await authenticate_user_async(curr_user.email,req.old_password, db)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if req.old_password == req.new_password:
          raise HTTPException(status_code=401, detail="Old password and new password cannot be thesame")
     
-    password_hash = pwd_context.hash(req.new_password)
+    password_hash = await password_hasher.hash(req.new_password)
     user.password_hash = password_hash
     db.commit()
     db.refresh(user)
@@ -344,7 +348,7 @@ async def reset_password(reset_data: PasswordReset, db: Session = Depends(get_db
         )
     
 
-    hashed_password = pwd_context.hash(reset_data.new_password)
+    hashed_password = await password_hasher.hash(reset_data.new_password)
     
     user.password_hash = hashed_password
     
@@ -18,6 +18,7 @@ from ..system_vars import (
     IP_WHITELIST_THRESHOLD, MFA_CODE_EXPIRY_MINUTES
 )
 from ..services.logger_queue import enqueue_log
+from ..services.password_hasher import password_hasher
 from ..schemas.main import  ActionType, LogLevel
 import os
 from typing import List
@@ -54,7 +55,11 @@ async def login(login_req: LoginRequestSecurity, request: Request, background_ta
     
     user = db.query(User).filter(User.email == login_req.email).first()
     
-    if not user or not pwd_context.verify(login_req.password, user.password_hash):
+    password_ok, new_hash = await password_hasher.verify(login_req.password, user.password_hash) if user else (False, None)
+    if password_ok and new_hash:
+        user.password_hash = new_hash # cost changed, saved with the login commit
+    
+    if not user or not password_ok:
         if user:
             login_attempt = LoginAttempt(
                 id=generate_id(),
@@ -427,7 +432,7 @@ async def force_password_change(pass_req: ForcePasswordChangeRequest, request: R
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    hashed_pass = pwd_context.hash(pass_req.new_password)
+    hashed_pass = await password_hasher.hash(pass_req.new_password)
     user.password_hash = hashed_pass
     user.last_password_change = datetime.now(timezone.utc)
     user.login_attempts = 0
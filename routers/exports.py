@@ -0,0 +1,265 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from typing import Optional
+from datetime import date
+
+from ..models import User, Assets, Departments, MaintenanceRequests, AssetTransfers, AssetDisposals
+from ..schemas.assets import AssetSearchParams
+from ..schemas.main import ActionType, LogLevel
+from ..asset_utils import asset_search_filters, asset_search_order
+from ..utilities import get_current_user
+from ..system_vars import sys_logger
+from ..services.logger_queue import enqueue_log_nowait
+from ..services.exporter import stream_export
+from ..services import report_aggregates as agg
+
+router = APIRouter(
+    prefix="/api/v1/exports",
+    tags=["Exports"]
+    )
+
+
+# (header, column) pairs, plain columns only so the cursor yields small tuples not orm objects
+ASSET_COLUMNS = [
+    ("id", Assets.id),
+    ("tag_number", Assets.tag_number),
+    ("name", Assets.name),
+    ("description", Assets.description),
+    ("category", Assets.category),
+    ("status", Assets.status),
+    ("condition", Assets.condition),
+    ("serial_number", Assets.serial_number),
+    ("barcode", Assets.barcode),
+    ("department_id", Assets.department_id),
+    ("department_name", Departments.name),
+    ("responsible_officer_id", Assets.responsible_officer_id),
+    ("county_code", Assets.county_code),
+    ("location", Assets.location),
+    ("acquisition_date", Assets.acquisition_date),
+    ("acquisition_cost", Assets.acquisition_cost),
+    ("current_value", Assets.current_value),
+    ("depreciation_rate", Assets.depreciation_rate),
+    ("useful_life_years", Assets.useful_life_years),
+    ("source_of_funds", Assets.source_of_funds),
+    ("created_at", Assets.created_at),
+    ("updated_at", Assets.updated_at),
+]
+
+ASSET_BRIEF = [
+    ("id", Assets.id),
+    ("tag_number", Assets.tag_number),
+    ("description", Assets.description),
+    ("category", Assets.category),
+    ("status", Assets.status),
+    ("condition", Assets.condition),
+    ("department_name", Departments.name),
+]
+
+
+def _select(columns):
+    return select(*(col for _, col in columns)), [name for name, _ in columns]
+
+
+def _asset_rows(columns, filters, order_by=Assets.id):
+    stmt, headers = _select(columns)
+    stmt = stmt.select_from(Assets).outerjoin(*agg.DEPARTMENT_JOIN).where(*filters).order_by(order_by)
+    return stmt, headers
+
+
+def _depreciation(department_id, category, date_from, date_to):
+    return _asset_rows(
+        ASSET_BRIEF + [
+            ("acquisition_date", Assets.acquisition_date),
+            ("acquisition_cost", Assets.acquisition_cost),
+            ("current_value", Assets.current_value),
+            ("depreciation_rate", Assets.depreciation_rate),
+            ("useful_life_years", Assets.useful_life_years),
+        ],
+        agg.asset_filters(department_id, category, date_from, date_to, Assets.depreciation_rate.isnot(None)),
+    )
+
+
+def _unassigned(department_id, category, date_from, date_to):
+    return _asset_rows(
+        ASSET_BRIEF + [("value", agg.ASSET_VALUE), ("acquisition_date", Assets.acquisition_date)],
+        agg.asset_filters(department_id, category, date_from, date_to, Assets.responsible_officer_id.is_(None)),
+    )
+
+
+def _requiring_attention(department_id, category, date_from, date_to):
+    return _asset_rows(
+        ASSET_BRIEF + [("responsible_officer_id", Assets.responsible_officer_id), ("value", agg.ASSET_VALUE)],
+        agg.asset_filters(department_id, category, date_from, date_to, agg.attention_clause()),
+    )
+
+
+def _asset_age(department_id, category, date_from, date_to):
+    today = date.today()
+    return _asset_rows(
+        ASSET_BRIEF + [
+            ("acquisition_date", Assets.acquisition_date),
+            ("age_years", agg.age_years(today)),
+            ("age_bracket", agg.age_bracket(today)),
+            ("useful_life_years", Assets.useful_life_years),
+            ("value", agg.ASSET_VALUE),
+        ],
+        agg.asset_filters(department_id, category, date_from, date_to, Assets.acquisition_date.isnot(None)),
+        order_by=Assets.acquisition_date,
+    )
+
+
+def _maintenance(department_id, category, date_from, date_to):
+    stmt, headers = _select([
+        ("id", MaintenanceRequests.id),
+        ("asset_id", MaintenanceRequests.asset_id),
+        ("tag_number", Assets.tag_number),
+        ("category", Assets.category),
+        ("department_id", Assets.department_id),
+        ("status", MaintenanceRequests.status),
+        ("maintenance_type", MaintenanceRequests.maintenance_type),
+        ("issue_category", MaintenanceRequests.issue_category),
+        ("priority", MaintenanceRequests.priority),
+        ("severity", MaintenanceRequests.severity),
+        ("request_date", MaintenanceRequests.request_date),
+        ("maintenance_date", MaintenanceRequests.maintenance_date),
+        ("completed_at", MaintenanceRequests.completed_at),
+        ("cost", MaintenanceRequests.cost),
+        ("outcome", MaintenanceRequests.outcome),
+    ])
+    stmt = stmt.join(Assets, Assets.id == MaintenanceRequests.asset_id).where(
+        *agg.asset_filters(department_id, category)
+    )
+    if date_from:
+        stmt = stmt.where(MaintenanceRequests.request_date >= date_from)
+    if date_to:
+        stmt = stmt.where(MaintenanceRequests.request_date <= date_to)
+    return stmt.order_by(MaintenanceRequests.request_date), headers
+
+
+def _transfers(department_id, category, date_from, date_to):
+    stmt, headers = _select([
+        ("id", AssetTransfers.id),
+        ("asset_id", AssetTransfers.asset_id),
+        ("tag_number", Assets.tag_number),
+        ("category", Assets.category),
+        ("from_dept_id", AssetTransfers.from_dept_id),
+        ("to_dept_id", AssetTransfers.to_dept_id),
+        ("from_user_id", AssetTransfers.from_user_id),
+        ("to_user_id", AssetTransfers.to_user_id),
+        ("status", AssetTransfers.status),
+        ("initiated_date", AssetTransfers.initiated_date),
+        ("approval_date", AssetTransfers.approval_date),
+        ("completed_date", AssetTransfers.completed_date),
+        ("transfer_reason", AssetTransfers.transfer_reason),
+    ])
+    stmt = stmt.join(Assets, Assets.id == AssetTransfers.asset_id)
+    if department_id:
+        stmt = stmt.where(
+            (AssetTransfers.from_dept_id == department_id) | (AssetTransfers.to_dept_id == department_id)
+        )
+    if category:
+        stmt = stmt.where(Assets.category == category)
+    if date_from:
+        stmt = stmt.where(AssetTransfers.initiated_date >= date_from)
+    if date_to:
+        stmt = stmt.where(AssetTransfers.initiated_date <= date_to)
+    return stmt.order_by(AssetTransfers.initiated_date), headers
+
+
+def _disposals(department_id, category, date_from, date_to):
+    stmt, headers = _select([
+        ("id", AssetDisposals.id),
+        ("asset_id", AssetDisposals.asset_id),
+        ("tag_number", Assets.tag_number),
+        ("category", Assets.category),
+        ("department_id", Assets.department_id),
+        ("status", AssetDisposals.status),
+        ("disposal_method", AssetDisposals.disposal_method),
+        ("disposal_date", AssetDisposals.disposal_date),
+        ("proceeds_amount", AssetDisposals.proceeds_amount),
+        ("disposal_cost", AssetDisposals.disposal_cost),
+        ("approved_by", AssetDisposals.approved_by),
+    ])
+    stmt = stmt.join(Assets, Assets.id == AssetDisposals.asset_id)
+    if department_id:
+        stmt = stmt.where(Assets.department_id == department_id)
+    if category:
+        stmt = stmt.where(Assets.category == category)
+    if date_from:
+        stmt = stmt.where(AssetDisposals.disposal_date >= date_from)
+    if date_to:
+        stmt = stmt.where(AssetDisposals.disposal_date <= date_to)
+    return stmt.order_by(AssetDisposals.disposal_date), headers
+
+
+# detail rows behind the /api/v1/r/reports summaries, ids follow the report paths
+REPORT_EXPORTS = {
+    "depreciation": _depreciation,
+    "unassigned-assets": _unassigned,
+    "asset-status-condition": _requiring_attention,
+    "asset-age-analysis": _asset_age,
+    "maintenance-summary": _maintenance,
+    "transfer-history": _transfers,
+    "disposal-history": _disposals,
+}
+
+
+def _log_export(user: User, target: str, details: dict):
+    if sys_logger:
+        enqueue_log_nowait(
+            user_id=user.id,
+            action=ActionType.EXPORT,
+            target_table="exports",
+            target_id=target,
+            details=details,
+            level=LogLevel.INFO
+        )
+
+
+@router.get("/assets")
+async def export_asset_register(
+    params: AssetSearchParams = Depends(),
+    format: str = "csv",
+    gzip: bool = False,
+    curr: User = Depends(get_current_user)
+):
+    """full asset register as csv / ndjson / xlsx, same filters n sort as the advanced search, paging ignored"""
+    stmt, headers = _select(ASSET_COLUMNS)
+    stmt = (
+        stmt.select_from(Assets)
+        .outerjoin(*agg.DEPARTMENT_JOIN)
+        .where(*asset_search_filters(params))
+        .order_by(asset_search_order(params), Assets.id)
+    )
+    response = stream_export(stmt, headers, format, "asset-register", gzip)
+    _log_export(curr, "asset_register", {"format": format, "filters": params.model_dump(mode="json", exclude={"page", "size"}, exclude_none=True)})
+    return response
+
+
+@router.get("/reports")
+async def list_report_exports(curr: User = Depends(get_current_user)):
+    return {"reports": list(REPORT_EXPORTS), "formats": ["csv", "ndjson", "xlsx"]}
+
+
+@router.get("/reports/{report_id}")
+async def export_report_rows(
+    report_id: str,
+    department_id: Optional[str] = None,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: str = "csv",
+    gzip: bool = False,
+    curr: User = Depends(get_current_user)
+):
+    """row level detail behind a report, streamed"""
+    build = REPORT_EXPORTS.get(report_id)
+    if build is None:
+        raise HTTPException(status_code=404, detail=f"No export for report: {report_id}")
+    stmt, headers = build(department_id, category, date_from, date_to)
+    response = stream_export(stmt, headers, format, report_id, gzip)
+    _log_export(curr, report_id, {
+        "format": format,
+        "filters": {"department_id": department_id, "category": category, "date_from": str(date_from), "date_to": str(date_to)},
+    })
+    return response
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..models import User
+from ..database import get_db, get_pool_metrics, read_router
+from ..utilities import get_current_user
+from ..services.policy_eval import require_specific_role, policy_index_stats
+from ..services.principal_cache import principal_cache
+from ..services.password_hasher import password_hasher
+from ..services.logger_queue import log_writer
+from ..services.asset_rollups import rollup_stats
+from ..services.scheduler import scheduler_status
+from ..services.report_cache import report_cache
+from ..services.asset_snapshot import snapshot_status
+from ..services.nbv_recompute import recent_runs
+
+router = APIRouter(
+    prefix="/api/v1/metrics",
+    tags=["System Metrics"]
+    )
+
+METRICS_ROLES = ["super_user_do", "admin"]
+
+def check_metrics_access(user: User):
+    allowed, det = require_specific_role(user, METRICS_ROLES)
+    if not allowed:
+        raise HTTPException(status_code=403, detail=det)
+
+
+@router.get("/db-pools", status_code=200)
+async def db_pool_metrics(curr: User = Depends(get_current_user)):
+    """checkouts, wait time n overflow per named pool"""
+    check_metrics_access(curr)
+    return get_pool_metrics()
+
+
+@router.get("/db-replicas", status_code=200)
+async def db_replica_status(curr: User = Depends(get_current_user)):
+    """health n replication lag per read replica, reads go to primary when none are healthy"""
+    check_metrics_access(curr)
+    return read_router.status()
+
+
+@router.get("/principal-cache", status_code=200)
+async def principal_cache_stats(curr: User = Depends(get_current_user)):
+    """hit ratio n size of the get_current_user cache"""
+    check_metrics_access(curr)
+    return principal_cache.stats()
+
+
+@router.get("/abac-index", status_code=200)
+async def abac_index_stats(curr: User = Depends(get_current_user)):
+    """version n size of the compiled policy index"""
+    check_metrics_access(curr)
+    return policy_index_stats()
+
+
+@router.get("/password-hashing", status_code=200)
+async def password_hashing_stats(curr: User = Depends(get_current_user)):
+    """queue depth, wait n work time of the bcrypt pool"""
+    check_metrics_access(curr)
+    return password_hasher.stats()
+
+
+@router.get("/activity-log-writer", status_code=200)
+async def activity_log_writer_stats(curr: User = Depends(get_current_user)):
+    """throughput, spill n loss counters of the activity log writer"""
+    check_metrics_access(curr)
+    return log_writer.stats()
+
+
+@router.get("/asset-rollups", status_code=200)
+async def asset_rollup_stats(curr: User = Depends(get_current_user)):
+    """delta n rebuild counters of the asset rollups, plus the scheduled jobs"""
+    check_metrics_access(curr)
+    return {**rollup_stats.as_dict(), "scheduler": scheduler_status()}
+
+
+@router.get("/report-cache", status_code=200)
+async def report_cache_stats(curr: User = Depends(get_current_user)):
+    """hit/miss, coalesced n invalidation counters of the report result cache"""
+    check_metrics_access(curr)
+    return report_cache.stats()
+
+
+@router.get("/asset-snapshot", status_code=200)
+async def asset_snapshot_status(curr: User = Depends(get_current_user)):
+    """where the analytics snapshot is, when it was written n how big"""
+    check_metrics_access(curr)
+    return snapshot_status()
+
+
+@router.get("/nbv-recompute", status_code=200)
+async def nbv_recompute_runs(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    curr: User = Depends(get_current_user),
+):
+    """the latest net book value recompute runs, counts n how far an unfinished one got"""
+    check_metrics_access(curr)
+    return {"runs": recent_runs(db, limit), "scheduler": scheduler_status()}
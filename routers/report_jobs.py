@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, defer
+from typing import List
+
+from ..database import get_db
+from ..models import User, ReportJob, ReportJobStatus
+from ..utilities import get_current_user
+from ..system_vars import sys_logger
+from ..schemas.main import ActionType, LogLevel
+from ..schemas.reports import ReportJobCreate, ReportJobOut
+from ..services.logger_queue import enqueue_log_nowait
+from ..services.policy_eval import require_specific_role
+from ..services.report_jobs import submit_report_job, report_registry
+
+router = APIRouter(
+    prefix="/api/v1/r/report-jobs",
+    tags=["Report Jobs"]
+    )
+
+ALL_JOBS_ROLES = ["super_user_do", "admin"]
+
+
+def _job_out(job: ReportJob) -> ReportJobOut:
+    return ReportJobOut(
+        id=job.id,
+        report_id=job.report_id,
+        filters=job.filters,
+        status=job.status.value,
+        backend=job.backend,
+        attempts=job.attempts,
+        result_bytes=job.result_bytes,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _get_own_job(db: Session, job_id: str, user: User, with_result: bool = False) -> ReportJob:
+    query = db.query(ReportJob)
+    if not with_result:
+        query = query.options(defer(ReportJob.result))
+    job = query.filter(ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.requested_by != user.id:
+        allowed, _ = require_specific_role(user, ALL_JOBS_ROLES)
+        if not allowed:
+            raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.get("/reports", status_code=200)
+async def list_job_reports(curr: User = Depends(get_current_user)):
+    """reports that can run as jobs n the filters each one takes"""
+    return [
+        {"report_id": spec.report_id, "path": spec.path, "filters": list(spec.params)}
+        for spec in report_registry().values()
+    ]
+
+
+@router.post("/", response_model=ReportJobOut, status_code=status.HTTP_202_ACCEPTED)
+def create_report_job(req: ReportJobCreate, db: Session = Depends(get_db), curr: User = Depends(get_current_user)):
+    """queue a report, poll GET /{job_id} then fetch /{job_id}/result once done"""
+    job = submit_report_job(db, curr, req.report_id, req.filters)
+    if sys_logger:
+        enqueue_log_nowait(
+            user_id=curr.id,
+            action=ActionType.CREATE,
+            target_table="report_jobs",
+            target_id=job.id,
+            details={"report_id": req.report_id, "filters": req.filters, "backend": job.backend},
+            level=LogLevel.INFO
+        )
+    return _job_out(job)
+
+
+@router.get("/", response_model=List[ReportJobOut], status_code=200)
+def list_my_report_jobs(limit: int = 50, db: Session = Depends(get_db), curr: User = Depends(get_current_user)):
+    jobs = (
+        db.query(ReportJob)
+        .options(defer(ReportJob.result))
+        .filter(ReportJob.requested_by == curr.id)
+        .order_by(ReportJob.created_at.desc())
+        .limit(min(limit, 200))
+        .all()
+    )
+    return [_job_out(j) for j in jobs]
+
+
+@router.get("/{job_id}", response_model=ReportJobOut, status_code=200)
+def get_report_job(job_id: str, db: Session = Depends(get_db), curr: User = Depends(get_current_user)):
+    return _job_out(_get_own_job(db, job_id, curr))
+
+
+@router.get("/{job_id}/result", status_code=200)
+def download_report_job_result(job_id: str, db: Session = Depends(get_db), curr: User = Depends(get_current_user)):
+    """stored report output, same json the report endpoint returns"""
+    job = _get_own_job(db, job_id, curr, with_result=True)
+    if job.status == ReportJobStatus.FAILED:
+        raise HTTPException(status_code=422, detail=f"Report job failed: {job.error}")
+    if job.status != ReportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status.value}")
+    return JSONResponse(
+        content=job.result,
+        headers={"Content-Disposition": f'attachment; filename="{job.report_id}-{job.id}.json"'},
+    )
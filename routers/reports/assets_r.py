@@ -1,91 +1,105 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime, date
 from collections import defaultdict
 
-from ...database import get_db
-from ...models import Assets, User
+from ...database import get_report_db
+from ...models import Assets, User, Departments, AssetRollup, DepreciationMethod
 from ...utilities import get_current_user
 from ...asset_utils import format_attributes_for_display, get_category_specific_reports_fields
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
-from sqlalchemy import  or_
+from ...services import report_aggregates as agg
+from ...services import asset_rollups as rollups
+from ...services.report_cache import report_cache
+from ...services import snapshot_analytics
+from ...services import depreciation
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import  or_, select
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Basic Reports"])
 
+def _asset_summary_dashboard(db: Session, department_id: Optional[str], date_from: Optional[date], date_to: Optional[date]):
+    if date_from or date_to:
+        # rollups have no acquisition date, date windows still go to the assets table
+        total, breakdown = agg.grouped(
+            db,
+            {
+                "category": Assets.category,
+                "status": Assets.status,
+                "condition": Assets.condition,
+                "department": Departments.name,
+            },
+            agg.asset_filters(department_id, None, date_from, date_to),
+            joins=[agg.DEPARTMENT_JOIN],
+        )
+    else:
+        total, breakdown = rollups.rollup_grouped(
+            db,
+            {
+                "category": AssetRollup.category,
+                "status": AssetRollup.status,
+                "condition": AssetRollup.condition,
+                "department": Departments.name,
+            },
+            rollups.rollup_filters(department_id),
+            joins=[rollups.ROLLUP_DEPARTMENT_JOIN],
+        )
+
+    return {
+        "total_assets": total["count"],
+        "total_value": float(total["value"]),
+        "by_category": agg.as_float_buckets(breakdown["category"]),
+        "by_status": agg.as_float_buckets(breakdown["status"]),
+        "by_condition": agg.as_float_buckets(breakdown["condition"], default="unknown"),
+        "by_department": agg.as_float_buckets(breakdown["department"], skip_null=True),
+        "generated_at": datetime.now(),
+        "filters_applied": {
+            "department_id": department_id,
+            "date_from": date_from,
+            "date_to": date_to
+        }
+    }
+
+
 @router.get("/asset-summary-dashboard")
 async def get_asset_summary_dashboard(
     department_id: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    db: Session = Depends(get_db),
+    source: str = "live",
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """1. Asset Summary Dashboard - Overview of all assets"""
-    
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-    
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    if date_from:
-        query = query.filter(Assets.acquisition_date >= date_from)
-    if date_to:
-        query = query.filter(Assets.acquisition_date <= date_to)
-    
-    assets = query.all()
-    
-    total_assets = len(assets)
-    total_value = sum(asset.current_value or asset.acquisition_cost or Decimal(0) for asset in assets)
-    
-    by_category = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    for asset in assets:
-        by_category[asset.category]["count"] += 1
-        by_category[asset.category]["value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
-    
-    by_status = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    for asset in assets:
-        by_status[asset.status.value]["count"] += 1
-        by_status[asset.status.value]["value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
-    
-    by_condition = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    for asset in assets:
-        condition = asset.condition.value if asset.condition else "unknown"
-        by_condition[condition]["count"] += 1
-        by_condition[condition]["value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
-    
-    dept_breakdown = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    for asset in assets:
-        if asset.department:
-            dept_breakdown[asset.department.name]["count"] += 1
-            dept_breakdown[asset.department.name]["value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
+    """1. Asset Summary Dashboard - Overview of all assets, source=snapshot reads the parquet snapshot"""
+    
+    if snapshot_analytics.check_source(source):
+        result = await run_in_threadpool(snapshot_analytics.asset_summary, department_id, date_from, date_to)
+    else:
+        # polled by dashboards, served from the report cache until an asset write in scope drops it
+        result = await report_cache.get_or_compute(
+            "asset_summary_dashboard",
+            {"department_id": department_id, "date_from": date_from, "date_to": date_to},
+            current_user,
+            lambda: _asset_summary_dashboard(db, department_id, date_from, date_to),
+            tables=("assets",),
+            department_id=department_id,
+        )
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="asset_summary_dashboard",
-            details={"filters": {"department_id": department_id, "date_from": str(date_from), "date_to": str(date_to)}},
+            details={"filters": {"department_id": department_id, "date_from": str(date_from), "date_to": str(date_to)}, "source": source},
             level=LogLevel.INFO
         )
     
-    return {
-        "total_assets": total_assets,
-        "total_value": float(total_value),
-        "by_category": {k: {"count": v["count"], "value": float(v["value"])} for k, v in by_category.items()},
-        "by_status": {k: {"count": v["count"], "value": float(v["value"])} for k, v in by_status.items()},
-        "by_condition": {k: {"count": v["count"], "value": float(v["value"])} for k, v in by_condition.items()},
-        "by_department": {k: {"count": v["count"], "value": float(v["value"])} for k, v in dept_breakdown.items()},
-        "generated_at": datetime.now(),
-        "filters_applied": {
-            "department_id": department_id,
-            "date_from": date_from,
-            "date_to": date_to
-        }
-    }
+    return result
 
 
 @router.get("/depreciation")
@@ -93,67 +107,64 @@ async def get_depreciation_report(
     department_id: Optional[str] = None,
     category: Optional[str] = None,
     min_depreciation_rate: Optional[float] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """2. Depreciation Report - Asset values and depreciation analysis"""
-    
-    query = db.query(Assets).filter(
-        Assets.is_deleted == False,
-        Assets.depreciation_rate.isnot(None),
-        Assets.acquisition_date.isnot(None)
-    )
-    
+    today = date.today()
+    filters = [Assets.is_deleted == False, Assets.acquisition_cost > 0, depreciation.depreciable_clause()]
     if department_id:
-        query = query.filter(Assets.department_id == department_id)
+        filters.append(Assets.department_id == department_id)
     if category:
-        query = query.filter(Assets.category == category)
+        filters.append(Assets.category == category)
     if min_depreciation_rate:
-        query = query.filter(Assets.depreciation_rate >= min_depreciation_rate)
-    
-    assets = query.all()
+        filters.append(Assets.depreciation_rate >= min_depreciation_rate)
+
+    rows = db.execute(
+        select(
+            Assets.id, Assets.tag_number, Assets.description, Assets.category, Departments.name.label("department"),
+            *depreciation.INPUT_COLUMNS,
+        )
+        .select_from(Assets)
+        .outerjoin(*agg.DEPARTMENT_JOIN)
+        .where(*filters)
+    ).all()
+    values = depreciation.depreciate(rows, today)
     
     depreciation_details = []
-    total_original_value = Decimal(0)
-    total_current_value = Decimal(0)
-    total_depreciated = Decimal(0)
-    
-    for asset in assets:
-        if asset.acquisition_cost:
-            original_value = asset.acquisition_cost
-            current_value = asset.current_value or original_value
-            depreciated_amount = original_value - current_value
-            depreciation_pct = (depreciated_amount / original_value * 100) if original_value > 0 else 0
-            
-            years_owned = (datetime.now().date() - asset.acquisition_date).days / 365.25 if asset.acquisition_date else 0
-            
-            depreciation_details.append({
-                "asset_id": asset.id,
-                "tag_number": asset.tag_number,
-                "description": asset.description,
-                "category": asset.category.value,
-                "department": asset.department.name if asset.department else None,
-                "acquisition_date": asset.acquisition_date,
-                "years_owned": round(years_owned, 2),
-                "original_value": float(original_value),
-                "current_value": float(current_value),
-                "depreciation_rate": float(asset.depreciation_rate),
-                "depreciated_amount": float(depreciated_amount),
-                "depreciation_percentage": round(float(depreciation_pct), 2),
-                "useful_life_years": asset.useful_life_years,
-                "remaining_life_years": max(0, (asset.useful_life_years or 0) - years_owned) if asset.useful_life_years else None
-            })
-            
-            total_original_value += original_value
-            total_current_value += current_value
-            total_depreciated += depreciated_amount
+    for i, asset in enumerate(rows):
+        original_value = asset.acquisition_cost
+        depreciated_amount = values["accumulated_depreciation"][i]
+        years_owned = values["years"][i]
+        depreciation_details.append({
+            "asset_id": asset.id,
+            "tag_number": asset.tag_number,
+            "description": asset.description,
+            "category": asset.category.value,
+            "department": asset.department,
+            "acquisition_date": asset.acquisition_date,
+            "years_owned": years_owned,
+            "original_value": float(original_value),
+            "current_value": float(values["net_book_value"][i]),
+            "depreciation_method": (asset.depreciation_method or DepreciationMethod.STRAIGHT_LINE).value,
+            "depreciation_rate": float(asset.depreciation_rate) if asset.depreciation_rate is not None else None,
+            "annual_depreciation": float(values["annual_depreciation"][i]),
+            "depreciated_amount": float(depreciated_amount),
+            "depreciation_percentage": round(float(depreciated_amount / original_value * 100), 2),
+            "useful_life_years": asset.useful_life_years,
+            "remaining_life_years": max(0, asset.useful_life_years - years_owned) if asset.useful_life_years else None
+        })
     
     depreciation_details.sort(key=lambda x: x["depreciation_percentage"], reverse=True)
+    totals = values["totals"]
+    total_original_value = totals["cost"]
+    total_current_value = totals["net_book_value"]
+    total_depreciated = totals["accumulated_depreciation"]
     
     nearly_depreciated = [a for a in depreciation_details if a["depreciation_percentage"] > 80]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -175,6 +186,7 @@ async def get_depreciation_report(
         },
         "assets": depreciation_details,
         "assets_near_full_depreciation": nearly_depreciated[:10],
+        "as_of": today,
         "generated_at": datetime.now()
     }
 
@@ -183,62 +195,40 @@ async def get_depreciation_report(
 async def get_asset_status_condition_report(
     department_id: Optional[str] = None,
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """3. Asset Status & Condition Report"""
     
-    query = db.query(Assets).filter(Assets.is_deleted == False)
+    filters = agg.asset_filters(department_id, category)
     
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    if category:
-        query = query.filter(Assets.category == category)
+    total, breakdown = agg.grouped(db, {"status": Assets.status, "condition": Assets.condition}, filters)
     
-    assets = query.all()
-    
-    status_breakdown = defaultdict(lambda: {"count": 0, "value": Decimal(0), "assets": []})
-    for asset in assets:
-        status = asset.status.value
-        value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        status_breakdown[status]["count"] += 1
-        status_breakdown[status]["value"] += value
-        if len(status_breakdown[status]["assets"]) < 5:
-            status_breakdown[status]["assets"].append({
-                "id": asset.id,
-                "tag_number": asset.tag_number,
-                "description": asset.description
-            })
-    
-    condition_breakdown = defaultdict(lambda: {"count": 0, "value": Decimal(0), "assets": []})
-    for asset in assets:
-        condition = asset.condition.value if asset.condition else "unknown"
-        value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        condition_breakdown[condition]["count"] += 1
-        condition_breakdown[condition]["value"] += value
-        if len(condition_breakdown[condition]["assets"]) < 5:
-            condition_breakdown[condition]["assets"].append({
-                "id": asset.id,
-                "tag_number": asset.tag_number,
-                "description": asset.description
-            })
+    sample_cols = [Assets.id, Assets.tag_number, Assets.description]
+    status_samples = agg.sample_rows(db, Assets.status, filters, sample_cols)
+    condition_samples = agg.sample_rows(db, Assets.condition, filters, sample_cols)
     
     requiring_attention = [
         {
-            "id": a.id,
-            "tag_number": a.tag_number,
-            "description": a.description,
-            "status": a.status.value,
-            "condition": a.condition.value if a.condition else None,
-            "department": a.department.name if a.department else None
+            "id": row.id,
+            "tag_number": row.tag_number,
+            "description": row.description,
+            "status": row.status.value,
+            "condition": row.condition.value if row.condition else None,
+            "department": row.department
         }
-        for a in assets
-        if (a.condition and a.condition.value in ["poor", "fair"]) or 
-           a.status.value in ["Under Maintenance", "Impaired", "Lost/Stolen"]
+        for row in db.execute(
+            select(
+                Assets.id, Assets.tag_number, Assets.description,
+                Assets.status, Assets.condition, Departments.name.label("department")
+            )
+            .outerjoin(*agg.DEPARTMENT_JOIN)
+            .where(*filters, agg.attention_clause())
+        )
     ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -249,13 +239,13 @@ async def get_asset_status_condition_report(
     
     return {
         "summary": {
-            "total_assets": len(assets),
+            "total_assets": total["count"],
             "requiring_attention": len(requiring_attention)
         },
-        "by_status": {k: {"count": v["count"], "value": float(v["value"]), "sample_assets": v["assets"]} 
-                      for k, v in status_breakdown.items()},
-        "by_condition": {k: {"count": v["count"], "value": float(v["value"]), "sample_assets": v["assets"]} 
-                         for k, v in condition_breakdown.items()},
+        "by_status": {k.value: {"count": v["count"], "value": float(v["value"]), "sample_assets": status_samples.get(k, [])} 
+                      for k, v in breakdown["status"].items()},
+        "by_condition": {agg.enum_key(k, "unknown"): {"count": v["count"], "value": float(v["value"]), "sample_assets": condition_samples.get(k, [])} 
+                         for k, v in breakdown["condition"].items()},
         "assets_requiring_attention": requiring_attention,
         "generated_at": datetime.now()
     }
@@ -265,12 +255,12 @@ async def get_asset_status_condition_report(
 async def get_category_specific_report(
     category: str,
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """4. Category-Specific Reports (Land, Buildings, Standard Assets)"""
     
-    query = db.query(Assets).filter(
+    query = db.query(Assets).options(joinedload(Assets.department)).filter(
         Assets.category == category,
         Assets.is_deleted == False
     )
@@ -282,7 +272,7 @@ async def get_category_specific_report(
     
     if not assets:
         if sys_logger:
-            await enqueue_log(
+            enqueue_log_nowait(
                 user_id=current_user.id,
                 action=ActionType.VIEW,
                 target_table="reports",
@@ -322,7 +312,7 @@ async def get_category_specific_report(
     total_value = sum(asset.current_value or asset.acquisition_cost or Decimal(0) for asset in assets)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -344,7 +334,7 @@ async def get_category_specific_report(
 @router.get("/unassigned-assets")
 async def get_unassigned_assets_report(
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """5. Unassigned Assets +++
@@ -352,43 +342,44 @@ async def get_unassigned_assets_report(
     
     Report"""
     
-    query = db.query(Assets).filter(
-        Assets.is_deleted == False,
+    filters = agg.asset_filters(
+        None, category, None, None,
         or_(
             Assets.responsible_officer_id.is_(None),
             Assets.department_id.is_(None)
         )
     )
     
-    if category:
-        query = query.filter(Assets.category == category)
-    
-    assets = query.all()
-    
-    no_officer = [a for a in assets if a.responsible_officer_id is None]
-    no_department = [a for a in assets if a.department_id is None]
-    no_both = [a for a in assets if a.responsible_officer_id is None and a.department_id is None]
-    
-    total_value = sum(a.current_value or a.acquisition_cost or Decimal(0) for a in assets)
+    total = agg.totals(db, filters, {
+        **agg.BASE_MEASURES,
+        "no_officer": agg.count_where(Assets.responsible_officer_id.is_(None)),
+        "no_department": agg.count_where(Assets.department_id.is_(None)),
+        "no_both": agg.count_where(Assets.responsible_officer_id.is_(None), Assets.department_id.is_(None)),
+    })
     
     asset_details = [
         {
-            "id": a.id,
-            "tag_number": a.tag_number,
-            "description": a.description,
-            "category": a.category.value,
-            "status": a.status.value,
-            "current_value": float(a.current_value or a.acquisition_cost or 0),
+            "id": row.id,
+            "tag_number": row.tag_number,
+            "description": row.description,
+            "category": row.category.value,
+            "status": row.status.value,
+            "current_value": float(row.value),
             "missing": {
-                "responsible_officer": a.responsible_officer_id is None,
-                "department": a.department_id is None
+                "responsible_officer": row.responsible_officer_id is None,
+                "department": row.department_id is None
             }
         }
-        for a in assets
+        for row in db.execute(
+            select(
+                Assets.id, Assets.tag_number, Assets.description, Assets.category, Assets.status,
+                Assets.responsible_officer_id, Assets.department_id, agg.ASSET_VALUE.label("value")
+            ).where(*filters)
+        )
     ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -399,11 +390,11 @@ async def get_unassigned_assets_report(
     
     return {
         "summary": {
-            "total_unassigned": len(assets),
-            "no_officer": len(no_officer),
-            "no_department": len(no_department),
-            "no_both": len(no_both),
-            "total_value": float(total_value)
+            "total_unassigned": total["count"],
+            "no_officer": total["no_officer"],
+            "no_department": total["no_department"],
+            "no_both": total["no_both"],
+            "total_value": float(total["value"])
         },
         "assets": asset_details,
         "generated_at": datetime.now()
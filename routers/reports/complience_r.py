@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime
-from collections import defaultdict
 
-from ...database import get_db
-from ...models import Assets, User
+from ...database import get_report_db
+from ...models import Assets, User, Departments, AssetRollup
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
+from ...services import asset_rollups as rollups
+from ...services import report_aggregates as agg
+from ...services import data_quality as dq
+from ...services.location_service import county_name_for
+from ...services.report_cache import report_cache
+from ...services import snapshot_analytics
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Complience Reports"])
@@ -18,144 +25,146 @@ router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Complience Reports"]
 @router.get("/missing-data")
 async def get_missing_data_report(
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    missing: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """16. Missing Data Report - Assets with incomplete information"""
-    
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-    
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    
-    assets = query.all()
-    
-    issues = []
-    for asset in assets:
-        missing_fields = []
-        
-        if not asset.acquisition_cost:
-            missing_fields.append("acquisition_cost")
-        if not asset.acquisition_date:
-            missing_fields.append("acquisition_date")
-        if not asset.responsible_officer_id:
-            missing_fields.append("responsible_officer")
-        if not asset.department_id:
-            missing_fields.append("department")
-        if not asset.location:
-            missing_fields.append("location")
-        if not asset.serial_number and asset.category.value not in ["Land", "Buildings and building improvements"]:
-            missing_fields.append("serial_number")
-        
-        if missing_fields:
-            issues.append({
-                "asset_id": asset.id,
-                "tag_number": asset.tag_number,
-                "description": asset.description,
-                "category": asset.category.value,
-                "department": asset.department.name if asset.department else None,
-                "missing_fields": missing_fields,
-                "completeness_score": round((1 - len(missing_fields) / 6) * 100, 2)
-            })
-    
-    if assets:
-        avg_completeness = sum(i["completeness_score"] for i in issues) / len(issues) if issues else 100
-        overall_score = round(((len(assets) - len(issues)) / len(assets) * 100 + avg_completeness) / 2, 2)
-    else:
-        overall_score = 100
-    
-    by_field = defaultdict(int)
-    for issue in issues:
-        for field in issue["missing_fields"]:
-            by_field[field] += 1
-    
-    issues.sort(key=lambda x: len(x["missing_fields"]), reverse=True)
+    """16. Missing Data Report - Assets with incomplete information
+    reads the data quality flags kept on each asset, missing= narrows the list to one field
+    the list is the worst scored `limit` assets, truncated says when there were more"""
+    
+    if missing is not None and missing not in dq.FIELD_BITS:
+        raise HTTPException(status_code=400, detail=f"missing must be one of: {', '.join(dq.FIELD_BITS)}")
+    
+    filters = agg.asset_filters(department_id)
+    
+    # at most 64 groups, (department_id, data_quality_flags) finds the rows but is_deleted isnt in that
+    # index so each one is still a heap visit, cheap next to scoring every asset here like it used to
+    counts = dict(db.execute(
+        select(Assets.data_quality_flags, func.count(Assets.id))
+        .where(*filters)
+        .group_by(Assets.data_quality_flags)
+    ).all())
+    unscored = counts.pop(None, 0)
+    summary = dq.expand_flag_counts(counts)
+    
+    flagged = Assets.data_quality_flags.in_(dq.flags_missing(missing)) if missing else Assets.data_quality_flags > 0
+    rows = db.execute(
+        select(
+            Assets.id, Assets.tag_number, Assets.description, Assets.category,
+            Assets.data_quality_flags, Assets.data_quality_score, Departments.name.label("department"),
+        )
+        .select_from(Assets)
+        .outerjoin(*agg.DEPARTMENT_JOIN)
+        .where(*filters, flagged)
+        .order_by(Assets.data_quality_score, Assets.id)
+        .limit(limit + 1)  # one extra to tell a full list from a cut off one
+    ).all()
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+    
+    issues = [
+        {
+            "asset_id": r.id,
+            "tag_number": r.tag_number,
+            "description": r.description,
+            "category": r.category.value,
+            "department": r.department,
+            "missing_fields": dq.missing_fields(r.data_quality_flags),
+            "completeness_score": float(r.data_quality_score)
+        }
+        for r in rows
+    ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="missing_data",
-            details={"filters": {"department_id": department_id}},
+            details={"filters": {"department_id": department_id, "missing": missing}},
             level=LogLevel.INFO
         )
     
     return {
         "summary": {
-            "total_assets": len(assets),
-            "assets_with_issues": len(issues),
-            "overall_data_quality_score": overall_score,
-            "by_missing_field": dict(by_field)
+            **summary,
+            "not_yet_scored": unscored
         },
         "assets_with_missing_data": issues,
+        "limit": limit,
+        "truncated": truncated,  # more flagged assets than listed, the summary counts cover all of them
         "generated_at": datetime.now()
     }
 
 
-@router.get("/geographic-distribution")
-async def get_geographic_distribution_report(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """17. Geographic Distribution Report"""
-    
-    assets = db.query(Assets).filter(Assets.is_deleted == False).all()
-    
-    by_county = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    by_entity = defaultdict(lambda: {"count": 0, "value": Decimal(0)})
-    
-    for asset in assets:
-        county = "Unknown"
-        if asset.location and isinstance(asset.location, dict):
-            county = asset.location.get("county", "Unknown")
-        
-        value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        by_county[county]["count"] += 1
-        by_county[county]["value"] += value
-        
-        if asset.department and asset.department.entity_type:
-            entity = asset.department.entity_type.value
-            by_entity[entity]["count"] += 1
-            by_entity[entity]["value"] += value
+def _geographic_distribution(db: Session):
+    total, breakdown = rollups.rollup_grouped(
+        db,
+        {"county": AssetRollup.county_code, "entity": Departments.entity_type},
+        joins=[rollups.ROLLUP_DEPARTMENT_JOIN],
+    )
     
     county_list = [
         {
-            "county": county,
+            "county": county_name_for(county) or "Unknown",
             "asset_count": data["count"],
             "total_value": float(data["value"])
         }
-        for county, data in by_county.items()
+        for county, data in breakdown["county"].items()
     ]
     county_list.sort(key=lambda x: x["total_value"], reverse=True)
     
     entity_list = [
         {
-            "entity_type": entity,
+            "entity_type": entity.value,
             "asset_count": data["count"],
             "total_value": float(data["value"])
         }
-        for entity, data in by_entity.items()
+        for entity, data in breakdown["entity"].items() if entity is not None
     ]
     entity_list.sort(key=lambda x: x["total_value"], reverse=True)
     
+    return {
+        "summary": {
+            "total_assets": total["count"],
+            "counties_covered": len(county_list),
+            "entity_types": len(entity_list)
+        },
+        "by_county": county_list,
+        "by_entity_type": entity_list,
+        "generated_at": datetime.now()
+    }
+
+
+@router.get("/geographic-distribution")
+async def get_geographic_distribution_report(
+    source: str = "live",
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    """17. Geographic Distribution Report, source=snapshot reads the parquet snapshot"""
+    
+    if snapshot_analytics.check_source(source):
+        result = await run_in_threadpool(snapshot_analytics.geographic_distribution)
+    else:
+        result = await report_cache.get_or_compute(
+            "geographic_distribution",
+            None,
+            current_user,
+            lambda: _geographic_distribution(db),
+            tables=("assets",),
+        )
+    
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="geographic_distribution",
-            details=None,
+            details={"source": source},
             level=LogLevel.INFO
         )
     
-    return {
-        "summary": {
-            "total_assets": len(assets),
-            "counties_covered": len(by_county),
-            "entity_types": len(by_entity)
-        },
-        "by_county": county_list,
-        "by_entity_type": entity_list,
-        "generated_at": datetime.now()
-    }
+    return result
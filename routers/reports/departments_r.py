@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime
 from collections import defaultdict
 
-from ...database import get_db
+from ...database import get_report_db
 from ...models import (
     Assets, User, Departments
 )
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
+from ...services import report_aggregates as agg
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Departments Reports"])
 
@@ -21,7 +23,7 @@ async def get_department_asset_report(
     dept_id: str,
     include_top_assets: bool = Query(True),
     top_assets_limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """6. Department Asset Report"""
@@ -30,42 +32,29 @@ async def get_department_asset_report(
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    assets = db.query(Assets).filter(
-        Assets.department_id == dept_id,
-        Assets.is_deleted == False
-    ).all()
-    
-    total_assets = len(assets)
-    total_value = sum(asset.current_value or asset.acquisition_cost or Decimal(0) for asset in assets)
-    
-    by_category = defaultdict(int)
-    for asset in assets:
-        by_category[asset.category.value] += 1
-    
-    by_status = defaultdict(int)
-    for asset in assets:
-        by_status[asset.status.value] += 1
+    filters = agg.asset_filters(dept_id)
+    total, breakdown = agg.grouped(db, {"category": Assets.category, "status": Assets.status}, filters)
     
     top_assets = []
     if include_top_assets:
-        sorted_assets = sorted(
-            assets,
-            key=lambda x: x.current_value or x.acquisition_cost or Decimal(0),
-            reverse=True
-        )[:top_assets_limit]
         top_assets = [
             {
-                "id": a.id,
-                "tag_number": a.tag_number,
-                "description": a.description,
-                "category": a.category.value,
-                "value": float(a.current_value or a.acquisition_cost or 0)
+                "id": row.id,
+                "tag_number": row.tag_number,
+                "description": row.description,
+                "category": row.category.value,
+                "value": float(row.value)
             }
-            for a in sorted_assets
+            for row in db.execute(
+                select(Assets.id, Assets.tag_number, Assets.description, Assets.category, agg.ASSET_VALUE.label("value"))
+                .where(*filters)
+                .order_by(agg.ASSET_VALUE.desc())
+                .limit(top_assets_limit)
+            )
         ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -77,10 +66,10 @@ async def get_department_asset_report(
     return {
         "department_id": dept_id,
         "department_name": department.name,
-        "total_assets": total_assets,
-        "total_value": float(total_value),
-        "by_category": dict(by_category),
-        "by_status": dict(by_status),
+        "total_assets": total["count"],
+        "total_value": float(total["value"]),
+        "by_category": {k.value: v["count"] for k, v in breakdown["category"].items()},
+        "by_status": {k.value: v["count"] for k, v in breakdown["status"].items()},
         "top_assets": top_assets,
         "generated_at": datetime.now()
     }
@@ -89,37 +78,37 @@ async def get_department_asset_report(
 @router.get("/user-responsibility")
 async def get_user_responsibility_report(
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """7. User Responsibility Report - Assets assigned per user"""
     
-    query = db.query(Assets).filter(
-        Assets.is_deleted == False,
-        Assets.responsible_officer_id.isnot(None)
+    # one joined column select instead of lazy loading officer n department per asset
+    rows = db.execute(
+        select(
+            Assets.id, Assets.tag_number, Assets.description, agg.ASSET_VALUE.label("value"),
+            User.id.label("user_id"), User.first_name, User.last_name, User.email,
+            Departments.name.label("department")
+        )
+        .join(User, User.id == Assets.responsible_officer_id)
+        .outerjoin(*agg.DEPARTMENT_JOIN)
+        .where(*agg.asset_filters(department_id))
     )
     
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    
-    assets = query.all()
-    
     user_assets = defaultdict(lambda: {"count": 0, "value": Decimal(0), "assets": []})
-    for asset in assets:
-        if asset.responsible_officer:
-            user_id = asset.responsible_officer.id
-            user_name = f"{asset.responsible_officer.first_name} {asset.responsible_officer.last_name}"
-            user_assets[user_id]["user_name"] = user_name
-            user_assets[user_id]["email"] = asset.responsible_officer.email
-            user_assets[user_id]["department"] = asset.department.name if asset.department else None
-            user_assets[user_id]["count"] += 1
-            user_assets[user_id]["value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
-            user_assets[user_id]["assets"].append({
-                "id": asset.id,
-                "tag_number": asset.tag_number,
-                "description": asset.description,
-                "value": float(asset.current_value or asset.acquisition_cost or 0)
-            })
+    for row in rows:
+        data = user_assets[row.user_id]
+        data["user_name"] = f"{row.first_name} {row.last_name}"
+        data["email"] = row.email
+        data["department"] = row.department
+        data["count"] += 1
+        data["value"] += row.value
+        data["assets"].append({
+            "id": row.id,
+            "tag_number": row.tag_number,
+            "description": row.description,
+            "value": float(row.value)
+        })
     
     user_list = [
         {
@@ -136,7 +125,7 @@ async def get_user_responsibility_report(
     user_list.sort(key=lambda x: x["total_value"], reverse=True)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
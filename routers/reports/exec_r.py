@@ -1,91 +1,58 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 
-from ...database import get_db
-from ...models import (
-    Assets, User, MaintenanceRequests, AssetTransfers, 
-    AssetDisposals,AssetStatus
-)
+from ...database import get_report_db
+from ...models import User, AssetRollup
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
+from ...services import asset_rollups as rollups
+from ...services.report_cache import report_cache
+from ...services import kpi_snapshots as kpi
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Executive Reports"])
 
-@router.get("/executive-summary")
-async def get_executive_summary_report(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """18. Executive Summary - High-level overview for decision makers"""
-    
-    assets = db.query(Assets).filter(Assets.is_deleted == False).all()
-    
-    total_assets = len(assets)
-    total_value = sum(a.current_value or a.acquisition_cost or Decimal(0) for a in assets)
-    
-    operational_count = len([a for a in assets if a.status == AssetStatus.OPERATIONAL])
-    operational_pct = (operational_count / total_assets * 100) if total_assets > 0 else 0
-    
-    under_maintenance = len([a for a in assets if a.status == AssetStatus.UNDER_MAINTENANCE])
-    
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_maintenance = db.query(MaintenanceRequests).filter(
-        MaintenanceRequests.request_date >= thirty_days_ago
-    ).all()
-    maintenance_rate = len(recent_maintenance)
-    
-    recent_disposals = db.query(AssetDisposals).filter(
-        AssetDisposals.disposal_date >= thirty_days_ago.date()
-    ).count()
-    
-    last_month_start = (datetime.now() - timedelta(days=60)).date()
-    last_month_end = (datetime.now() - timedelta(days=30)).date()
-    this_month_start = (datetime.now() - timedelta(days=30)).date()
-    
-    last_month_assets = db.query(Assets).filter(
-        Assets.acquisition_date.between(last_month_start, last_month_end),
-        Assets.is_deleted == False
-    ).count()
-    
-    this_month_assets = db.query(Assets).filter(
-        Assets.acquisition_date >= this_month_start,
-        Assets.is_deleted == False
-    ).count()
+def _current_kpis(db: Session):
+    """latest nightly snapshot, or computed live until the first one is written"""
+    kpis = kpi.latest_kpis(db)
+    if kpis is None:
+        kpis = {"snapshot_date": None, **kpi.compute_kpis(db)[("all", "")]}
+    return kpis
+
+
+def _executive_summary(db: Session):
+    kpis = _current_kpis(db)
     
-    mom_change = this_month_assets - last_month_assets
+    total_assets = kpis["total_assets"]
+    operational_count = kpis["operational_count"]
     
-    category_values = defaultdict(Decimal)
-    for asset in assets:
-        category_values[asset.category.value] += asset.current_value or asset.acquisition_cost or Decimal(0)
+    # register size against the snapshot a month earlier, not acquisitions by date
+    as_of = kpis["snapshot_date"] or date.today()
+    month_ago = kpi.latest_kpis(db, as_of=as_of - timedelta(days=30))
+    mom_change = total_assets - month_ago["total_assets"] if month_ago else None
     
+    _, breakdown = rollups.rollup_grouped(db, {"category": AssetRollup.category}, with_total=False)
     top_categories = sorted(
-        [{"category": cat, "value": float(val)} for cat, val in category_values.items()],
+        [{"category": cat.value, "value": float(data["value"])} for cat, data in breakdown["category"].items()],
         key=lambda x: x["value"],
         reverse=True
     )[:5]
     
     alerts = []
     
-    attention_needed = [
-        a for a in assets 
-        if (a.condition and a.condition.value in ["poor", "fair"]) or 
-           a.status.value in ["Impaired", "Lost/Stolen"]
-    ]
+    attention_needed = kpis["attention_count"]
     if attention_needed:
         alerts.append({
             "type": "warning",
-            "message": f"{len(attention_needed)} assets require immediate attention",
-            "count": len(attention_needed)
+            "message": f"{attention_needed} assets require immediate attention",
+            "count": attention_needed
         })
     
-    pending_transfers = db.query(AssetTransfers).filter(
-        AssetTransfers.status.in_(["initiated", "pending"])
-    ).count()
+    pending_transfers = kpis["pending_transfers"]
     if pending_transfers > 0:
         alerts.append({
             "type": "info",
@@ -93,10 +60,7 @@ async def get_executive_summary_report(
             "count": pending_transfers
         })
     
-    overdue_maintenance = db.query(MaintenanceRequests).filter(
-        MaintenanceRequests.status.in_(["scheduled", "approved"]),
-        MaintenanceRequests.maintenance_date < datetime.now().date()
-    ).count()
+    overdue_maintenance = kpis["overdue_maintenance"]
     if overdue_maintenance > 0:
         alerts.append({
             "type": "critical",
@@ -104,7 +68,7 @@ async def get_executive_summary_report(
             "count": overdue_maintenance
         })
     
-    unassigned = len([a for a in assets if not a.responsible_officer_id])
+    unassigned = kpis["unassigned_count"]
     if unassigned > 10:
         alerts.append({
             "type": "warning",
@@ -112,31 +76,108 @@ async def get_executive_summary_report(
             "count": unassigned
         })
     
-    if sys_logger:
-        await enqueue_log(
-            user_id=current_user.id,
-            action=ActionType.VIEW,
-            target_table="reports",
-            target_id="executive_summary",
-            details=None,
-            level=LogLevel.INFO
-        )
-    
     return {
         "overview": {
             "total_assets": total_assets,
-            "total_value": float(total_value),
-            "operational_percentage": round(operational_pct, 2),
-            "under_maintenance": under_maintenance
+            "total_value": float(kpis["total_value"]),
+            "operational_percentage": kpi.operational_pct(kpis),
+            "under_maintenance": kpis["under_maintenance"]
         },
         "key_metrics": {
             "operational_count": operational_count,
-            "maintenance_rate_30d": maintenance_rate,
-            "disposal_rate_30d": recent_disposals,
+            "maintenance_rate_30d": kpis["maintenance_requests_30d"],
+            "disposal_rate_30d": kpis["disposals_30d"],
+            "acquired_30d": kpis["acquired_30d"],
             "month_over_month_change": mom_change
         },
         "top_5_categories": top_categories,
         "critical_alerts": alerts,
+        "kpi_as_of": kpis["snapshot_date"],
         "generated_at": datetime.now()
     }
 
+
+@router.get("/executive-summary")
+async def get_executive_summary_report(
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    """18. Executive Summary - High-level overview for decision makers"""
+    
+    result = await report_cache.get_or_compute(
+        "executive_summary",
+        None,
+        current_user,
+        lambda: _executive_summary(db),
+        tables=("assets", "maintenance", "transfers", "disposals"),
+    )
+    
+    if sys_logger:
+        enqueue_log_nowait(
+            user_id=current_user.id,
+            action=ActionType.VIEW,
+            target_table="reports",
+            target_id="executive_summary",
+            details=None,
+            level=LogLevel.INFO
+        )
+    
+    return result
+
+
+
+@router.get("/kpi-trends")
+async def get_kpi_trends_report(
+    scope: str = "all",
+    scope_id: str = "",
+    months: int = 12,
+    interval: str = "month",
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    """KPI Trends - the nightly executive kpis over time for the whole register, an entity type or a department"""
+    if scope not in kpi.SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of: {', '.join(kpi.SCOPES)}")
+    if interval not in kpi.INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of: {', '.join(kpi.INTERVALS)}")
+    if scope == "all":
+        scope_id = ""
+    elif not scope_id:
+        raise HTTPException(status_code=400, detail=f"scope_id is required for scope {scope}")
+    
+    since = date.today() - timedelta(days=months * 31)
+    points = [
+        {
+            "date": row["snapshot_date"],
+            "total_assets": row["total_assets"],
+            "total_value": float(row["total_value"]),
+            "operational_percentage": kpi.operational_pct(row),
+            "under_maintenance": row["under_maintenance"],
+            "unassigned": row["unassigned_count"],
+            "attention": row["attention_count"],
+            "acquired_30d": row["acquired_30d"],
+            "maintenance_rate_30d": row["maintenance_requests_30d"],
+            "disposal_rate_30d": row["disposals_30d"],
+            "overdue_maintenance": row["overdue_maintenance"],
+            "pending_transfers": row["pending_transfers"],
+        }
+        for row in kpi.kpi_trend(db, scope, scope_id, since, interval)
+    ]
+    
+    if sys_logger:
+        enqueue_log_nowait(
+            user_id=current_user.id,
+            action=ActionType.VIEW,
+            target_table="reports",
+            target_id="kpi_trends",
+            details={"filters": {"scope": scope, "scope_id": scope_id, "months": months, "interval": interval}},
+            level=LogLevel.INFO
+        )
+    
+    return {
+        "scope": scope,
+        "scope_id": scope_id or None,
+        "interval": interval,
+        "points": points,
+        "generated_at": datetime.now()
+    }
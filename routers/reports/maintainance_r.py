@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 
-from ...database import get_db
-from ...models import  Assets, User, MaintenanceRequests
+from ...database import get_report_db
+from ...models import  Assets, User, MaintenanceRequests, MaintenanceStatus
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
+from ...services import report_aggregates as agg
+from ...services import maintenance_cube as cube
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Maintainance Reports"])
 
@@ -19,54 +22,48 @@ async def get_maintenance_summary_report(
     department_id: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """8. Maintenance Summary Report"""
     
-    query = db.query(MaintenanceRequests)
+    filters = cube.maintenance_filters(department_id, date_from, date_to)
     
-    if department_id:
-        query = query.join(Assets).filter(Assets.department_id == department_id)
-    if date_from:
-        query = query.filter(MaintenanceRequests.request_date >= date_from)
-    if date_to:
-        query = query.filter(MaintenanceRequests.request_date <= date_to)
-    
-    requests = query.all()
-    
-    by_status = defaultdict(int)
-    for req in requests:
-        by_status[req.status.value] += 1
-    
-    by_priority = defaultdict(int)
-    for req in requests:
-        by_priority[req.priority.value] += 1
-    
-    by_type = defaultdict(int)
-    for req in requests:
-        by_type[req.maintenance_type.value] += 1
+    total, breakdown = cube.grouped(
+        db,
+        {
+            "status": MaintenanceRequests.status,
+            "priority": MaintenanceRequests.priority,
+            "type": MaintenanceRequests.maintenance_type,
+        },
+        filters,
+        measures={
+            **cube.COST_MEASURES,
+            "completed": func.count(MaintenanceRequests.id).filter(MaintenanceRequests.status == MaintenanceStatus.COMPLETED),
+        },
+    )
     
-    total_cost = sum(req.cost or Decimal(0) for req in requests)
-    completed_requests = [r for r in requests if r.status.value == "completed"]
-    avg_cost = total_cost / len(completed_requests) if completed_requests else Decimal(0)
+    by_status = {agg.enum_key(k): v["count"] for k, v in breakdown["status"].items() if k is not None}
+    by_priority = {agg.enum_key(k): v["count"] for k, v in breakdown["priority"].items()}
+    by_type = {agg.enum_key(k): v["count"] for k, v in breakdown["type"].items()}
     
-    asset_request_count = defaultdict(int)
-    for req in requests:
-        asset_request_count[req.asset_id] += 1
+    total_cost = Decimal(total["total_cost"])
+    avg_cost = total_cost / total["completed"] if total["completed"] else Decimal(0)
     
     high_maintenance = [
         {
-            "asset_id": asset_id,
-            "request_count": count,
-            "asset": db.query(Assets).filter(Assets.id == asset_id).first().description
+            "asset_id": a["asset_id"],
+            "request_count": a["maintenance_count"],
+            "asset": a["asset_description"]
         }
-        for asset_id, count in asset_request_count.items() if count >= 3
+        for a in cube.top_assets(
+            db, filters, limit=10, order_by="count",
+            having=func.count(MaintenanceRequests.id) >= 3,
+        ).get(None, [])
     ]
-    high_maintenance.sort(key=lambda x: x["request_count"], reverse=True)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -77,17 +74,17 @@ async def get_maintenance_summary_report(
     
     return {
         "summary": {
-            "total_requests": len(requests),
+            "total_requests": total["count"],
             "total_cost": float(total_cost),
             "average_cost": float(avg_cost),
             "completed": by_status.get("completed", 0),
             "pending": by_status.get("initiated", 0) + by_status.get("scheduled", 0),
             "in_progress": by_status.get("in_progress", 0)
         },
-        "by_status": dict(by_status),
-        "by_priority": dict(by_priority),
-        "by_type": dict(by_type),
-        "high_maintenance_assets": high_maintenance[:10],
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_type": by_type,
+        "high_maintenance_assets": high_maintenance,
         "generated_at": datetime.now()
     }
 
@@ -96,7 +93,7 @@ async def get_maintenance_summary_report(
 async def get_upcoming_maintenance_report(
     days_ahead: int = Query(30, ge=1, le=365),
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """9. Upcoming Maintenance Schedule"""
@@ -135,7 +132,7 @@ async def get_upcoming_maintenance_report(
         by_date[str(item["maintenance_date"])].append(item)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -162,7 +159,7 @@ async def get_upcoming_maintenance_report(
 @router.get("/maintenance-backlog")
 async def get_maintenance_backlog_report(
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """10. Maintenance Backlog - Overdue and aging requests"""
@@ -206,7 +203,7 @@ async def get_maintenance_backlog_report(
     aging.sort(key=lambda x: x["days_pending"], reverse=True)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import  Optional
 from decimal import Decimal
 from datetime import datetime, date
 
-from ...database import get_db
-from ...models import Assets,User,Departments
+from ...database import get_report_db
+from ...models import Assets,User,Departments,AssetStatus,AssetRollup,DepreciationMethod
 from ...schemas.assets import AssetSummaryReport, DepartmentAssetReport
 from ...utilities import get_current_user
 from ...asset_utils import get_category_specific_reports_fields, format_attributes_for_display
+from ...services import report_aggregates as agg
+from ...services import asset_rollups as rollups
+from ...services import depreciation
 
 router = APIRouter(prefix="/api/v1/reports", tags=["Asset Reports general"])
 
@@ -18,75 +22,59 @@ async def get_assets_summary_report(
     category: Optional[str] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """a comprehensive assets summary report"""
 
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-    
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    if category:
-        query = query.filter(Assets.category == category)
-    if date_from:
-        query = query.filter(Assets.acquisition_date >= date_from)
-    if date_to:
-        query = query.filter(Assets.acquisition_date <= date_to)
-    
-    assets = query.all()
+    if date_from or date_to:
+        total, breakdown = agg.grouped(
+            db,
+            {"category": Assets.category, "status": Assets.status, "condition": Assets.condition},
+            agg.asset_filters(department_id, category, date_from, date_to),
+            measures={
+                "count": agg.BASE_MEASURES["count"],
+                "total_value": agg.BASE_MEASURES["value"],
+                "operational_count": agg.count_where(Assets.status == AssetStatus.OPERATIONAL),
+                "impaired_count": agg.count_where(Assets.status.in_([AssetStatus.IMPAIRED, AssetStatus.UNDER_MAINTENANCE])),
+            },
+        )
+    else:
+        total, breakdown = rollups.rollup_grouped(
+            db,
+            {"category": AssetRollup.category, "status": AssetRollup.status, "condition": AssetRollup.condition},
+            rollups.rollup_filters(department_id, category),
+            measures={
+                "count": rollups.ROLLUP_COUNT,
+                "total_value": rollups.ROLLUP_VALUE,
+                "operational_count": rollups.rollup_count_where(rollups.status_is(AssetStatus.OPERATIONAL)),
+                "impaired_count": rollups.rollup_count_where(rollups.status_is(AssetStatus.IMPAIRED, AssetStatus.UNDER_MAINTENANCE)),
+            },
+        )
 
-    total_assets = len(assets)
-    total_value = sum(asset.current_value or asset.acquisition_cost or Decimal(0) for asset in assets)
-    
     by_category = {}
-    for asset in assets:
-        category_name = asset.category
-        if category_name not in by_category:
-            by_category[category_name] = {
-                "count": 0,
-                "total_value": Decimal(0),
-                "avg_value": Decimal(0),
-                "operational_count": 0,
-                "impaired_count": 0
-            }
-        
-        by_category[category_name]["count"] += 1
-        asset_value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        by_category[category_name]["total_value"] += asset_value
-        
-        if asset.status == "Operational":
-            by_category[category_name]["operational_count"] += 1
-        elif asset.status in ["Impaired", "Under Maintenance"]:
-            by_category[category_name]["impaired_count"] += 1
-
-    for category_data in by_category.values():
-        if category_data["count"] > 0:
-            category_data["avg_value"] = category_data["total_value"] / category_data["count"]
+    for category_name, data in breakdown["category"].items():
+        by_category[category_name] = {
+            "count": data["count"],
+            "total_value": data["total_value"],
+            "avg_value": data["total_value"] / data["count"] if data["count"] > 0 else Decimal(0),
+            "operational_count": data["operational_count"],
+            "impaired_count": data["impaired_count"]
+        }
 
-    by_status = {}
-    for asset in assets:
-        status = asset.status
-        if status not in by_status:
-            by_status[status] = {"count": 0, "total_value": Decimal(0)}
-        
-        by_status[status]["count"] += 1
-        asset_value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        by_status[status]["total_value"] += asset_value
+    by_status = {
+        status: {"count": data["count"], "total_value": data["total_value"]}
+        for status, data in breakdown["status"].items()
+    }
 
-    by_condition = {}
-    for asset in assets:
-        condition = asset.condition or "unknown"
-        if condition not in by_condition:
-            by_condition[condition] = {"count": 0, "total_value": Decimal(0)}
-        
-        by_condition[condition]["count"] += 1
-        asset_value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        by_condition[condition]["total_value"] += asset_value
+    by_condition = {
+        (condition or "unknown"): {"count": data["count"], "total_value": data["total_value"]}
+        for condition, data in breakdown["condition"].items()
+    }
     
     return AssetSummaryReport(
-        total_assets=total_assets,
-        total_value=total_value,
+        total_assets=total["count"],
+        total_value=total["total_value"],
         by_category=by_category,
         by_status=by_status,
         by_condition=by_condition
@@ -96,7 +84,7 @@ async def get_assets_summary_report(
 async def get_department_asset_report(dept_id: str,
     include_top_assets: bool = Query(True),
     top_assets_limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_report_db),current_user: User = Depends(get_current_user)
 ):
     """Get detailed asset report for a specific department"""
 
@@ -104,35 +92,27 @@ async def get_department_asset_report(dept_id: str,
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    assets = db.query(Assets).filter( Assets.department_id == dept_id, Assets.is_deleted == False).all()
-    
-    total_assets = len(assets)
-    total_value = sum(asset.current_value or asset.acquisition_cost or Decimal(0) for asset in assets)
-    
-    assets_by_category = {}
-    for asset in assets:
-        category = asset.category
-        assets_by_category[category] = assets_by_category.get(category, 0) + 1
+    filters = agg.asset_filters(dept_id)
+    total, breakdown = agg.grouped(db, {"category": Assets.category, "status": Assets.status}, filters)
     
-    assets_by_status = {}
-    for asset in assets:
-        status = asset.status
-        assets_by_status[status] = assets_by_status.get(status, 0) + 1
+    assets_by_category = {k: v["count"] for k, v in breakdown["category"].items()}
+    assets_by_status = {k: v["count"] for k, v in breakdown["status"].items()}
 
     top_assets = []
     if include_top_assets:
-        top_assets_query = sorted(
-            assets,
-            key=lambda x: x.current_value or x.acquisition_cost or Decimal(0),
-            reverse=True
-        )[:top_assets_limit]
-        top_assets = top_assets_query
+        top_assets = (
+            db.query(Assets)
+            .filter(*filters)
+            .order_by(agg.ASSET_VALUE.desc())
+            .limit(top_assets_limit)
+            .all()
+        )
     
     return DepartmentAssetReport(
         department_id=dept_id,
         department_name=department.name,
-        total_assets=total_assets,
-        total_value=total_value,
+        total_assets=total["count"],
+        total_value=total["value"],
         assets_by_category=assets_by_category,
         assets_by_status=assets_by_status,
         top_assets=top_assets
@@ -142,17 +122,10 @@ async def get_department_asset_report(dept_id: str,
 async def get_assets_by_condition_report(
     department_id: Optional[str] = None,
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-    
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    if category:
-        query = query.filter(Assets.category == category)
-    
-    assets = query.all()
+    filters = agg.asset_filters(department_id, category)
     
     assets_by_condition = {
         "new": [],
@@ -164,30 +137,30 @@ async def get_assets_by_condition_report(
     }
     
     condition_stats = {
-        "new": {"count": 0, "total_value": Decimal(0)},
-        "excellent": {"count": 0, "total_value": Decimal(0)},
-        "good": {"count": 0, "total_value": Decimal(0)},
-        "fair": {"count": 0, "total_value": Decimal(0)},
-        "poor": {"count": 0, "total_value": Decimal(0)},
-        "unknown": {"count": 0, "total_value": Decimal(0)}
+        key: {"count": 0, "total_value": Decimal(0)} for key in assets_by_condition
     }
     
-    for asset in assets:
-        condition = asset.condition or "unknown"
-        
-        asset_info = {
-            "id": asset.id,
-            "description": asset.description,
-            "tag_number": asset.tag_number,
-            "category": asset.category,
-            "current_value": asset.current_value or asset.acquisition_cost,
-            "acquisition_date": asset.acquisition_date,
-            "location": asset.location
-        }
-        
-        assets_by_condition[condition].append(asset_info)
-        condition_stats[condition]["count"] += 1
-        condition_stats[condition]["total_value"] += asset.current_value or asset.acquisition_cost or Decimal(0)
+    _, breakdown = agg.grouped(db, {"condition": Assets.condition}, filters, with_total=False)
+    for condition, data in breakdown["condition"].items():
+        condition_stats[agg.enum_key(condition, "unknown")] = {"count": data["count"], "total_value": data["value"]}
+    
+    rows = db.execute(
+        select(
+            Assets.id, Assets.description, Assets.tag_number, Assets.category, Assets.condition,
+            agg.ASSET_VALUE.label("current_value"),
+            Assets.acquisition_date, Assets.location
+        ).where(*filters)
+    )
+    for row in rows:
+        assets_by_condition[agg.enum_key(row.condition, "unknown")].append({
+            "id": row.id,
+            "description": row.description,
+            "tag_number": row.tag_number,
+            "category": row.category,
+            "current_value": row.current_value,
+            "acquisition_date": row.acquisition_date,
+            "location": row.location
+        })
     
     return {
         "summary": condition_stats,
@@ -204,66 +177,62 @@ async def get_depreciation_report(
     department_id: Optional[str] = None,
     category: Optional[str] = None,
     min_depreciation_rate: Optional[float] = None,
-    db: Session = Depends(get_db),current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_report_db),current_user: User = Depends(get_current_user)
 ):
     """Get depreciation report showing assets with depreciation details"""
-    
-    query = db.query(Assets).filter(Assets.is_deleted == False, Assets.depreciation_rate.isnot(None), Assets.acquisition_date.isnot(None))
-    
+    today = date.today()
+    filters = [Assets.is_deleted == False, Assets.acquisition_cost > 0, depreciation.depreciable_clause()]
     if department_id:
-        query = query.filter(Assets.department_id == department_id)
+        filters.append(Assets.department_id == department_id)
     if category:
-        query = query.filter(Assets.category == category)
+        filters.append(Assets.category == category)
     if min_depreciation_rate:
-        query = query.filter(Assets.depreciation_rate >= min_depreciation_rate)
-    
-    assets = query.all()
-    
+        filters.append(Assets.depreciation_rate >= min_depreciation_rate)
+
+    rows = db.execute(
+        select(
+            Assets.id, Assets.description, Assets.tag_number, Assets.category,
+            *depreciation.INPUT_COLUMNS,
+        ).where(*filters)
+    ).all()
+    values = depreciation.depreciate(rows, today)
+
     depreciation_report = []
-    total_original_value = Decimal(0)
-    total_current_value = Decimal(0)
-    total_depreciated_amount = Decimal(0)
-    
-    for asset in assets:
-        if asset.acquisition_cost and asset.depreciation_rate and asset.acquisition_date:
-            original_value = asset.acquisition_cost
-            current_value = asset.current_value or original_value
-            depreciated_amount = original_value - current_value
-            depreciation_percentage = (depreciated_amount / original_value * 100) if original_value > 0 else 0
-            
-            years_owned = (datetime.now().date() - asset.acquisition_date).days / 365.25
-            
-            asset_report = {
-                "asset_id": asset.id,
-                "description": asset.description,
-                "tag_number": asset.tag_number,
-                "category": asset.category,
-                "acquisition_date": asset.acquisition_date,
-                "years_owned": round(years_owned, 2),
-                "original_value": original_value,
-                "current_value": current_value,
-                "depreciation_rate": asset.depreciation_rate,
-                "depreciated_amount": depreciated_amount,
-                "depreciation_percentage": round(depreciation_percentage, 2),
-                "useful_life_years": asset.useful_life_years,
-                "remaining_life_years": max(0, (asset.useful_life_years or 0) - years_owned) if asset.useful_life_years else None
-            }
-            
-            depreciation_report.append(asset_report)
-            total_original_value += original_value
-            total_current_value += current_value
-            total_depreciated_amount += depreciated_amount
+    for i, asset in enumerate(rows):
+        original_value = asset.acquisition_cost
+        current_value = values["net_book_value"][i]
+        depreciated_amount = values["accumulated_depreciation"][i]
+        years_owned = values["years"][i]
+        depreciation_report.append({
+            "asset_id": asset.id,
+            "description": asset.description,
+            "tag_number": asset.tag_number,
+            "category": asset.category,
+            "acquisition_date": asset.acquisition_date,
+            "years_owned": years_owned,
+            "original_value": original_value,
+            "current_value": current_value,
+            "depreciation_method": asset.depreciation_method or DepreciationMethod.STRAIGHT_LINE,
+            "depreciation_rate": asset.depreciation_rate,
+            "annual_depreciation": values["annual_depreciation"][i],
+            "depreciated_amount": depreciated_amount,
+            "depreciation_percentage": round(depreciated_amount / original_value * 100, 2),
+            "useful_life_years": asset.useful_life_years,
+            "remaining_life_years": max(0, asset.useful_life_years - years_owned) if asset.useful_life_years else None
+        })
 
     depreciation_report.sort(key=lambda x: x["depreciation_percentage"], reverse=True)
-    
+
+    totals = values["totals"]
     summary = {
         "total_assets": len(depreciation_report),
-        "total_original_value": total_original_value,
-        "total_current_value": total_current_value,
-        "total_depreciated_amount": total_depreciated_amount,
+        "total_original_value": totals["cost"],
+        "total_current_value": totals["net_book_value"],
+        "total_depreciated_amount": totals["accumulated_depreciation"],
         "overall_depreciation_percentage": round(
-            (total_depreciated_amount / total_original_value * 100) if total_original_value > 0 else 0, 2
-        )
+            (totals["accumulated_depreciation"] / totals["cost"] * 100) if totals["cost"] > 0 else 0, 2
+        ),
+        "as_of": today,
     }
     
     return {
@@ -281,7 +250,7 @@ async def get_depreciation_report(
 async def get_category_specific_report(
     category: str,
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     query = db.query(Assets).filter( Assets.category == category, Assets.is_deleted == False)
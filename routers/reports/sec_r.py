@@ -2,90 +2,65 @@ from fastapi import APIRouter, Depends,Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from datetime import datetime
-from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 
-from ...database import get_db
-from ...models import (
-     User, ActivityLog
-)
+from ...database import get_report_db
+from ...models import User
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
-from sqlalchemy import desc
+from ...services import login_patterns as logins
+from ...services import activity_explorer as explorer
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Security Reports"])
 
+EXCESSIVE_FAILURES = 5  # more than this many failures for one email is flagged
+DEFAULT_LOOKBACK_DAYS = 30
+HIGH_FREQUENCY_MODIFICATIONS = 20  # more modifications than this in the filtered range is flagged
+# what the log writer stores, the ActionType values
+MODIFICATION_ACTIONS = [ActionType.CREATE.value, ActionType.UPDATE.value, ActionType.DELETE.value]
+
+
 @router.get("/activity-log")
 async def get_activity_log_report(
     user_id: Optional[str] = None,
     action_type: Optional[str] = None,
+    target_table: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """13. Activity Log Report"""
-    
-    query = db.query(ActivityLog)
-    
-    if user_id:
-        query = query.filter(ActivityLog.user_id == user_id)
-    if action_type:
-        query = query.filter(ActivityLog.action == action_type)
-    if date_from:
-        query = query.filter(ActivityLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(ActivityLog.created_at <= date_to)
-    
-    logs = query.order_by(desc(ActivityLog.created_at)).limit(limit).all()
+    """13. Activity Log Report - newest first, pass next_cursor back as cursor for the next page
+    summary covers everything matching the filters, not just the page"""
     
-    action_summary = defaultdict(int)
-    for log in logs:
-        action_summary[log.action] += 1
-    
-    user_summary = defaultdict(int)
-    for log in logs:
-        if log.user:
-            user_name = f"{log.user.first_name} {log.user.last_name}"
-            user_summary[user_name] += 1
-    
-    critical = [log for log in logs if log.logg_level == "CRITICAL"]
-    
-    log_list = [
-        {
-            "id": str(log.id),
-            "user": f"{log.user.first_name} {log.user.last_name}" if log.user else None,
-            "action": log.action,
-            "target_table": log.target_table,
-            "target_id": log.target_id,
-            "level": log.logg_level,
-            "details": log.details,
-            "created_at": log.created_at
-        }
-        for log in logs
-    ]
+    filters = explorer.log_filters(user_id, [action_type] if action_type else None, target_table, date_from, date_to)
+    result = explorer.page(db, filters, limit, cursor)
+    summary = explorer.summaries(db, filters)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="activity_log",
-            details={"filters": {"user_id": user_id, "action_type": action_type}},
+            details={"filters": {"user_id": user_id, "action_type": action_type, "target_table": target_table}},
             level=LogLevel.INFO
         )
     
     return {
         "summary": {
-            "total_activities": len(logs),
-            "critical_count": len(critical),
-            "by_action": dict(action_summary),
-            "by_user": dict(user_summary)
+            "total_activities": summary["total"],
+            "critical_count": summary["critical"],
+            "by_action": summary["by_action"],
+            "by_table": summary["by_table"],
+            "by_user": summary["by_user"]
         },
-        "activities": log_list,
+        "activities": result["items"],
+        "next_cursor": result["next_cursor"],
         "generated_at": datetime.now()
     }
 
@@ -94,73 +69,66 @@ async def get_activity_log_report(
 async def get_failed_login_report(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    window_minutes: int = Query(10, ge=1, le=1440),
+    burst_threshold: int = Query(3, ge=2, le=100),
+    fanout_accounts: int = Query(5, ge=2, le=1000),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """14. Failed Login Attempts Report"""
-    
-    query = db.query(ActivityLog).filter(
-        ActivityLog.action == "LOGIN_FAILED"
-    )
-    
-    if date_from:
-        query = query.filter(ActivityLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(ActivityLog.created_at <= date_to)
-    
-    failed_logins = query.order_by(desc(ActivityLog.created_at)).all()
-    
-    user_failures = defaultdict(lambda: {"count": 0, "attempts": []})
-    for log in failed_logins:
-        user_email = log.details.get("email") if log.details else "Unknown"
-        user_failures[user_email]["count"] += 1
-        user_failures[user_email]["attempts"].append({
-            "timestamp": log.created_at,
-            "details": log.details
-        })
-    
+    """14. Failed Login Attempts Report - from login_attempts, bursts of burst_threshold failures inside
+    window_minutes per email / ip / fingerprint n ips failing against fanout_accounts or more accounts
+    defaults to the last 30 days when no date_from is given"""
+    
+    if date_from is None:
+        date_from = (date_to or datetime.now(timezone.utc)) - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    filters = logins.failure_filters(date_from, date_to)
+    window = timedelta(minutes=window_minutes)
+    
+    by_email = logins.failures_by_email(db, filters, EXCESSIVE_FAILURES, limit)
+    excessive = [r for r in by_email["rows"] if r["failure_count"] > EXCESSIVE_FAILURES]
+    latest = logins.latest_attempts(db, filters, [r["email"] for r in excessive])
     excessive_failures = [
-        {"email": email, "count": data["count"], "latest_attempts": data["attempts"][:5]}
-        for email, data in user_failures.items() if data["count"] > 5
+        {"email": r["email"], "count": r["failure_count"], "latest_attempts": latest.get(r["email"], [])}
+        for r in excessive
     ]
-    excessive_failures.sort(key=lambda x: x["count"], reverse=True)
     
-    suspicious = []
-    for email, data in user_failures.items():
-        if data["count"] >= 3:
-            attempts = sorted(data["attempts"], key=lambda x: x["timestamp"], reverse=True)
-            if len(attempts) >= 3:
-                time_diff = (attempts[0]["timestamp"] - attempts[2]["timestamp"]).total_seconds() / 60
-                if time_diff <= 10:
-                    suspicious.append({
-                        "email": email,
-                        "count": data["count"],
-                        "time_window_minutes": round(time_diff, 2)
-                    })
+    bursts = {key: logins.bursts(db, key, filters, window, burst_threshold, limit) for key in logins.BURST_KEYS}
+    fanout = logins.ip_fanout(db, date_from, date_to, fanout_accounts, limit)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="failed_login_attempts",
-            details={"filters": {"date_from": str(date_from), "date_to": str(date_to)}},
+            details={"filters": {"date_from": str(date_from), "date_to": str(date_to), "window_minutes": window_minutes, "burst_threshold": burst_threshold}},
             level=LogLevel.INFO
         )
     
     return {
         "summary": {
-            "total_failed_attempts": len(failed_logins),
-            "unique_users": len(user_failures),
-            "users_with_excessive_failures": len(excessive_failures),
-            "suspicious_patterns": len(suspicious)
+            "total_failed_attempts": by_email["total_attempts"],
+            "unique_users": by_email["unique_emails"],
+            "users_with_excessive_failures": by_email["excessive_emails"],
+            "suspicious_patterns": len(bursts["email"]),
+            "suspicious_ips": len(bursts["ip_address"]),
+            "suspicious_fingerprints": len(bursts["fingerprint"]),
+            "ips_targeting_many_accounts": len(fanout)
+        },
+        "window": {
+            "date_from": date_from,
+            "date_to": date_to,
+            "window_minutes": window_minutes,
+            "burst_threshold": burst_threshold,
+            "fanout_accounts": fanout_accounts
         },
-        "by_user": [
-            {"email": email, "failure_count": data["count"]}
-            for email, data in sorted(user_failures.items(), key=lambda x: x[1]["count"], reverse=True)
-        ],
+        "by_user": [{"email": r["email"], "failure_count": r["failure_count"]} for r in by_email["rows"]],
         "excessive_failures": excessive_failures,
-        "suspicious_patterns": suspicious,
+        "suspicious_patterns": bursts["email"],
+        "bursts_by_ip": bursts["ip_address"],
+        "bursts_by_fingerprint": bursts["fingerprint"],
+        "ip_fanout": fanout,
         "generated_at": datetime.now()
     }
 
@@ -172,61 +140,23 @@ async def get_data_modification_audit_report(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     limit: int = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """15. Data Modification Audit Report"""
-    
-    query = db.query(ActivityLog).filter(
-        ActivityLog.action.in_(["CREATE", "UPDATE", "DELETE"])
-    )
+    """15. Data Modification Audit Report - creates, updates n deletes, cursor paged like the activity log"""
     
-    if target_table:
-        query = query.filter(ActivityLog.target_table == target_table)
-    if user_id:
-        query = query.filter(ActivityLog.user_id == user_id)
-    if date_from:
-        query = query.filter(ActivityLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(ActivityLog.created_at <= date_to)
+    filters = explorer.log_filters(user_id, MODIFICATION_ACTIONS, target_table, date_from, date_to)
+    result = explorer.page(db, filters, limit, cursor)
+    summary = explorer.summaries(db, filters)
     
-    modifications = query.order_by(desc(ActivityLog.created_at)).limit(limit).all()
-    
-    by_action = defaultdict(int)
-    for mod in modifications:
-        by_action[mod.action] += 1
-    
-    by_table = defaultdict(int)
-    for mod in modifications:
-        by_table[mod.target_table or "unknown"] += 1
-    
-    by_user = defaultdict(int)
-    for mod in modifications:
-        if mod.user:
-            user_name = f"{mod.user.first_name} {mod.user.last_name}"
-            by_user[user_name] += 1
-    
-    high_frequency = []
-    for user_name, count in by_user.items():
-        if count > 20:
-            high_frequency.append({"user": user_name, "modification_count": count})
-    high_frequency.sort(key=lambda x: x["modification_count"], reverse=True)
-    
-    modification_list = [
-        {
-            "id": str(mod.id),
-            "user": f"{mod.user.first_name} {mod.user.last_name}" if mod.user else None,
-            "action": mod.action,
-            "target_table": mod.target_table,
-            "target_id": mod.target_id,
-            "details": mod.details,
-            "created_at": mod.created_at
-        }
-        for mod in modifications
+    high_frequency = [
+        {"user_id": u["user_id"], "user": u["user"], "modification_count": u["count"]}
+        for u in summary["by_user"] if u["count"] > HIGH_FREQUENCY_MODIFICATIONS
     ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -237,13 +167,13 @@ async def get_data_modification_audit_report(
     
     return {
         "summary": {
-            "total_modifications": len(modifications),
-            "by_action": dict(by_action),
-            "by_table": dict(by_table),
+            "total_modifications": summary["total"],
+            "by_action": summary["by_action"],
+            "by_table": summary["by_table"],
             "high_frequency_users": len(high_frequency)
         },
-        "modifications": modification_list,
+        "modifications": result["items"],
+        "next_cursor": result["next_cursor"],
         "high_frequency_users": high_frequency,
         "generated_at": datetime.now()
     }
-
@@ -4,11 +4,11 @@ from typing import Optional
 from datetime import datetime, date
 
 
-from ...database import get_db
+from ...database import get_report_db
 from ...models import Assets, User,AssetTransfers, AssetDisposals
 from ...utilities import get_current_user
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
 from sqlalchemy import  or_
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Transfers n Disposals Reports"])
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset Transfers n Disposal
 @router.get("/pending-transfers-disposals")
 async def get_pending_transfers_disposals_report(
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """11. Pending Transfers & Disposals Report"""
@@ -78,7 +78,7 @@ async def get_pending_transfers_disposals_report(
     total_disposal_value = sum(d["value"] for d in disposal_list)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -105,7 +105,7 @@ async def get_transfer_disposal_history_report(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """12. Transfer & Disposal History Report"""
@@ -170,7 +170,7 @@ async def get_transfer_disposal_history_report(
     total_disposal_costs = sum(d["disposal_cost"] for d in disposal_list)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -1,100 +1,92 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 
-from ...database import get_db
-from ...models import (Assets, User, Departments, MaintenanceRequests, AssetLifecycleEvents, AssetStatus)
+from ...database import get_report_db
+from ...models import (Assets, User, Departments, MaintenanceRequests, AssetStatus, AssetRollup)
 from ...utilities import get_current_user
+from ...asset_utils import idle_cutoff
 from ...system_vars import sys_logger
-from ...services.logger_queue import enqueue_log
+from ...services.logger_queue import enqueue_log_nowait
 from ...schemas.main import ActionType, LogLevel
+from ...services import report_aggregates as agg
+from ...services import asset_rollups as rollups
+from ...services.report_cache import report_cache
+from ...services import snapshot_analytics
+from ...services import maintenance_cube as cube
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/api/v1/r/reports", tags=["Asset  Reports Utils"])
 
 @router.get("/asset-age-analysis")
 async def get_asset_age_analysis_report(
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    source: str = "live",
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Asset Age Analysis - Distribution of assets by age"""
-    
-    query = db.query(Assets).filter(
-        Assets.is_deleted == False,
-        Assets.acquisition_date.isnot(None)
+    """Asset Age Analysis - Distribution of assets by age, source=snapshot reads the parquet snapshot"""
+    
+    if snapshot_analytics.check_source(source):
+        result = await run_in_threadpool(snapshot_analytics.asset_age_analysis, department_id)
+        if sys_logger:
+            enqueue_log_nowait(
+                user_id=current_user.id,
+                action=ActionType.VIEW,
+                target_table="reports",
+                target_id="asset_age_analysis",
+                details={"filters": {"department_id": department_id}, "source": source},
+                level=LogLevel.INFO
+            )
+        return result
+    
+    today = datetime.now().date()
+    filters = agg.asset_filters(department_id, None, None, None, Assets.acquisition_date.isnot(None))
+    bracket = agg.age_bracket(today)
+    age = agg.age_years(today)
+    
+    total, breakdown = agg.grouped(db, {"bracket": bracket}, filters)
+    samples = agg.sample_rows(
+        db, bracket, filters,
+        [Assets.id, Assets.tag_number, Assets.description, age.label("age_years"), agg.ASSET_VALUE.label("value")]
     )
     
-    if department_id:
-        query = query.filter(Assets.department_id == department_id)
-    
-    assets = query.all()
-    
-    age_brackets = {
-        "0-1 years": {"count": 0, "value": Decimal(0), "assets": []},
-        "1-3 years": {"count": 0, "value": Decimal(0), "assets": []},
-        "3-5 years": {"count": 0, "value": Decimal(0), "assets": []},
-        "5-10 years": {"count": 0, "value": Decimal(0), "assets": []},
-        "10+ years": {"count": 0, "value": Decimal(0), "assets": []}
-    }
+    age_brackets = {}
+    for name in agg.AGE_BRACKETS:
+        data = breakdown["bracket"].get(name, {"count": 0, "value": Decimal(0)})
+        age_brackets[name] = {
+            "count": data["count"],
+            "value": data["value"],
+            "assets": [
+                {**row, "age_years": round(float(row["age_years"]), 1), "value": float(row["value"])}
+                for row in samples.get(name, [])
+            ]
+        }
     
-    for asset in assets:
-        years_old = (datetime.now().date() - asset.acquisition_date).days / 365.25
-        value = asset.current_value or asset.acquisition_cost or Decimal(0)
-        
-        asset_info = {
-            "id": asset.id,
-            "tag_number": asset.tag_number,
-            "description": asset.description,
-            "age_years": round(years_old, 1),
-            "value": float(value)
+    remaining = Assets.useful_life_years - age
+    approaching_eol = [
+        {
+            "id": row.id,
+            "tag_number": row.tag_number,
+            "description": row.description,
+            "age_years": round(float(row.age_years), 1),
+            "useful_life_years": row.useful_life_years,
+            "remaining_years": round(float(row.remaining), 1)
         }
-        
-        if years_old < 1:
-            age_brackets["0-1 years"]["count"] += 1
-            age_brackets["0-1 years"]["value"] += value
-            if len(age_brackets["0-1 years"]["assets"]) < 5:
-                age_brackets["0-1 years"]["assets"].append(asset_info)
-        elif years_old < 3:
-            age_brackets["1-3 years"]["count"] += 1
-            age_brackets["1-3 years"]["value"] += value
-            if len(age_brackets["1-3 years"]["assets"]) < 5:
-                age_brackets["1-3 years"]["assets"].append(asset_info)
-        elif years_old < 5:
-            age_brackets["3-5 years"]["count"] += 1
-            age_brackets["3-5 years"]["value"] += value
-            if len(age_brackets["3-5 years"]["assets"]) < 5:
-                age_brackets["3-5 years"]["assets"].append(asset_info)
-        elif years_old < 10:
-            age_brackets["5-10 years"]["count"] += 1
-            age_brackets["5-10 years"]["value"] += value
-            if len(age_brackets["5-10 years"]["assets"]) < 5:
-                age_brackets["5-10 years"]["assets"].append(asset_info)
-        else:
-            age_brackets["10+ years"]["count"] += 1
-            age_brackets["10+ years"]["value"] += value
-            if len(age_brackets["10+ years"]["assets"]) < 5:
-                age_brackets["10+ years"]["assets"].append(asset_info)
-    
-    approaching_eol = []
-    for asset in assets:
-        if asset.useful_life_years:
-            years_old = (datetime.now().date() - asset.acquisition_date).days / 365.25
-            remaining = asset.useful_life_years - years_old
-            if 0 < remaining <= 2:
-                approaching_eol.append({
-                    "id": asset.id,
-                    "tag_number": asset.tag_number,
-                    "description": asset.description,
-                    "age_years": round(years_old, 1),
-                    "useful_life_years": asset.useful_life_years,
-                    "remaining_years": round(remaining, 1)
-                })
+        for row in db.execute(
+            select(
+                Assets.id, Assets.tag_number, Assets.description, Assets.useful_life_years,
+                age.label("age_years"), remaining.label("remaining")
+            ).where(*filters, Assets.useful_life_years.isnot(None), Assets.useful_life_years != 0, remaining > 0, remaining <= 2)
+        )
+    ]
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -105,7 +97,7 @@ async def get_asset_age_analysis_report(
     
     return {
         "summary": {
-            "total_assets": len(assets),
+            "total_assets": total["count"],
             "approaching_end_of_life": len(approaching_eol)
         },
         "by_age_bracket": {
@@ -121,52 +113,127 @@ async def get_asset_age_analysis_report(
     }
 
 
+def _department_comparison(db: Session):
+    """one statement, rollup totals n 30 day maintenance counts as grouped subqueries left joined onto the
+    active departments, shares n percentile ranks as window functions over the joined rows"""
+    per_dept = (
+        select(
+            AssetRollup.department_id.label("dept_id"),
+            rollups.ROLLUP_COUNT.label("asset_count"),
+            rollups.ROLLUP_VALUE.label("total_value"),
+            rollups.rollup_count_where(rollups.status_is(AssetStatus.OPERATIONAL)).label("operational"),
+            func.coalesce(func.sum(AssetRollup.unassigned_count), 0).label("unassigned"),
+        )
+        .group_by(AssetRollup.department_id)
+        .subquery()
+    )
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    maintenance = (
+        select(Assets.department_id.label("dept_id"), func.count(MaintenanceRequests.id).label("requests"))
+        .join(Assets, Assets.id == MaintenanceRequests.asset_id)
+        .where(MaintenanceRequests.request_date >= thirty_days_ago)
+        .group_by(Assets.department_id)
+        .subquery()
+    )
+    
+    count = func.coalesce(per_dept.c.asset_count, 0)
+    value = func.coalesce(per_dept.c.total_value, 0)
+    operational = func.coalesce(per_dept.c.operational, 0)
+    requests = func.coalesce(maintenance.c.requests, 0)
+    operational_pct = case((count > 0, operational * 100.0 / count), else_=0)
+    avg_value = case((count > 0, value / count), else_=0)
+    # value per asset against the average across all compared departments, 1.0 = average
+    overall_avg = func.sum(value).over() / func.nullif(func.sum(count).over(), 0)
+    density = func.coalesce(avg_value / func.nullif(overall_avg, 0), 0)
+    
+    base = (
+        select(
+            Departments.dept_id,
+            Departments.name,
+            count.label("asset_count"),
+            value.label("total_value"),
+            operational.label("operational"),
+            func.coalesce(per_dept.c.unassigned, 0).label("unassigned"),
+            requests.label("maintenance_requests"),
+            operational_pct.label("operational_pct"),
+            avg_value.label("avg_value"),
+            func.coalesce(value * 100.0 / func.nullif(func.sum(value).over(), 0), 0).label("value_share"),
+            density.label("value_density"),
+        )
+        .select_from(Departments)
+        .outerjoin(per_dept, per_dept.c.dept_id == Departments.dept_id)
+        .outerjoin(maintenance, maintenance.c.dept_id == Departments.dept_id)
+        .where(Departments.status == "active")
+        .subquery()
+    )
+    # ranks one level up, postgres wont nest the density window sums inside a window order by
+    rows = db.execute(
+        select(
+            base,
+            func.percent_rank().over(order_by=base.c.total_value).label("rank_value"),
+            func.percent_rank().over(order_by=base.c.asset_count).label("rank_count"),
+            func.percent_rank().over(order_by=base.c.operational_pct).label("rank_operational"),
+            func.percent_rank().over(order_by=base.c.maintenance_requests).label("rank_maintenance"),
+            func.percent_rank().over(order_by=base.c.value_density).label("rank_density"),
+        ).order_by(base.c.total_value.desc())
+    ).all()
+    
+    def pct(rank):
+        return round(float(rank) * 100, 1)
+    
+    dept_metrics = [
+        {
+            "department_id": row.dept_id,
+            "department_name": row.name,
+            "asset_count": row.asset_count,
+            "total_value": float(row.total_value),
+            "operational_count": row.operational,
+            "operational_percentage": round(float(row.operational_pct), 2),
+            "maintenance_requests_30d": row.maintenance_requests,
+            "unassigned_assets": row.unassigned,
+            "avg_asset_value": float(row.avg_value),
+            "value_share_percentage": round(float(row.value_share), 2),
+            "value_density": round(float(row.value_density), 3),
+            # percent_rank as 0-100, higher = more than the other departments
+            "percentile_ranks": {
+                "total_value": pct(row.rank_value),
+                "asset_count": pct(row.rank_count),
+                "operational_percentage": pct(row.rank_operational),
+                "maintenance_requests_30d": pct(row.rank_maintenance),
+                "value_density": pct(row.rank_density),
+            },
+        }
+        for row in rows
+    ]
+    
+    return {
+        "summary": {
+            "total_departments": len(dept_metrics),
+            "total_assets": sum(d["asset_count"] for d in dept_metrics),
+            "total_value": sum(d["total_value"] for d in dept_metrics)
+        },
+        "departments": dept_metrics,
+        "generated_at": datetime.now()
+    }
+
+
 @router.get("/department-comparison")
 async def get_department_comparison_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """Department Comparison - Compare asset metrics across departments"""
     
-    departments = db.query(Departments).filter(
-        Departments.status == "active"
-    ).all()
-    
-    dept_metrics = []
-    
-    for dept in departments:
-        assets = db.query(Assets).filter(
-            Assets.department_id == dept.dept_id,
-            Assets.is_deleted == False
-        ).all()
-        
-        total_value = sum(a.current_value or a.acquisition_cost or Decimal(0) for a in assets)
-        operational = len([a for a in assets if a.status == AssetStatus.OPERATIONAL])
-        
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        maintenance_count = db.query(MaintenanceRequests).join(Assets).filter(
-            Assets.department_id == dept.dept_id,
-            MaintenanceRequests.request_date >= thirty_days_ago
-        ).count()
-        
-        unassigned = len([a for a in assets if not a.responsible_officer_id])
-        
-        dept_metrics.append({
-            "department_id": dept.dept_id,
-            "department_name": dept.name,
-            "asset_count": len(assets),
-            "total_value": float(total_value),
-            "operational_count": operational,
-            "operational_percentage": round((operational / len(assets) * 100) if assets else 0, 2),
-            "maintenance_requests_30d": maintenance_count,
-            "unassigned_assets": unassigned,
-            "avg_asset_value": float(total_value / len(assets)) if assets else 0
-        })
-    
-    dept_metrics.sort(key=lambda x: x["total_value"], reverse=True)
+    result = await report_cache.get_or_compute(
+        "department_comparison",
+        None,
+        current_user,
+        lambda: _department_comparison(db),
+        tables=("assets", "maintenance"),
+    )
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -175,83 +242,79 @@ async def get_department_comparison_report(
             level=LogLevel.INFO
         )
     
-    return {
-        "summary": {
-            "total_departments": len(dept_metrics),
-            "total_assets": sum(d["asset_count"] for d in dept_metrics),
-            "total_value": sum(d["total_value"] for d in dept_metrics)
-        },
-        "departments": dept_metrics,
-        "generated_at": datetime.now()
-    }
+    return result
 
 
 @router.get("/asset-utilization")
 async def get_asset_utilization_report(
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    idle_days: int = 90,
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """Asset Utilization Report - Track asset usage and idle assets"""
     
-    query = db.query(Assets).filter(Assets.is_deleted == False)
-    
-    if category:
-        query = query.filter(Assets.category == category)
-    
-    assets = query.all()
-    
-    assigned = [a for a in assets if a.responsible_officer_id]
-    unassigned = [a for a in assets if not a.responsible_officer_id]
-    operational = [a for a in assets if a.status == AssetStatus.OPERATIONAL]
-    
-    idle_assets = []
-    for asset in assets:
-        if asset.status == AssetStatus.OPERATIONAL and not asset.responsible_officer_id:
-            recent_events = db.query(AssetLifecycleEvents).filter(
-                AssetLifecycleEvents.asset_id == asset.id,
-                AssetLifecycleEvents.event_date >= datetime.now() - timedelta(days=90)
-            ).count()
-            
-            if recent_events == 0:
-                idle_assets.append({
-                    "id": asset.id,
-                    "tag_number": asset.tag_number,
-                    "description": asset.description,
-                    "category": asset.category.value,
-                    "value": float(asset.current_value or asset.acquisition_cost or 0),
-                    "last_activity": asset.updated_at or asset.created_at
-                })
-    
-    location_usage = defaultdict(lambda: {"assigned": 0, "unassigned": 0})
-    for asset in assets:
-        location = "Unknown"
-        if asset.location and isinstance(asset.location, dict):
-            location = asset.location.get("county", "Unknown")
-        
-        if asset.responsible_officer_id:
-            location_usage[location]["assigned"] += 1
-        else:
-            location_usage[location]["unassigned"] += 1
+    filters = agg.asset_filters(None, category)
+    
+    total, breakdown = agg.grouped(
+        db,
+        {"location": agg.LOCATION_COUNTY},
+        filters,
+        measures={
+            "count": agg.BASE_MEASURES["count"],
+            "assigned": agg.count_where(Assets.responsible_officer_id.isnot(None)),
+            "unassigned": agg.count_where(Assets.responsible_officer_id.is_(None)),
+            "operational": agg.count_where(Assets.status == AssetStatus.OPERATIONAL),
+        },
+    )
+    
+    # operational, unassigned n nothing written against it since the cutoff, one range scan on last_activity_at
+    idle_rows = db.execute(
+        select(
+            Assets.id, Assets.tag_number, Assets.description, Assets.category,
+            agg.ASSET_VALUE.label("value"), Assets.last_activity_at,
+        ).where(
+            *filters,
+            Assets.status == AssetStatus.OPERATIONAL,
+            Assets.responsible_officer_id.is_(None),
+            Assets.last_activity_at < idle_cutoff(idle_days),
+        ).order_by(Assets.last_activity_at)
+    ).all()
+    
+    idle_assets = [
+        {
+            "id": row.id,
+            "tag_number": row.tag_number,
+            "description": row.description,
+            "category": row.category.value,
+            "value": float(row.value or 0),
+            "last_activity": row.last_activity_at
+        }
+        for row in idle_rows
+    ]
+    
+    location_usage = {
+        (loc if loc is not None else "Unknown"): data for loc, data in breakdown["location"].items()
+    }
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
             target_id="asset_utilization",
-            details={"filters": {"category": category}},
+            details={"filters": {"category": category, "idle_days": idle_days}},
             level=LogLevel.INFO
         )
     
     return {
         "summary": {
-            "total_assets": len(assets),
-            "assigned": len(assigned),
-            "unassigned": len(unassigned),
-            "operational": len(operational),
+            "total_assets": total["count"],
+            "assigned": total["assigned"],
+            "unassigned": total["unassigned"],
+            "operational": total["operational"],
             "idle_assets": len(idle_assets),
-            "utilization_rate": round((len(assigned) / len(assets) * 100) if assets else 0, 2)
+            "utilization_rate": round((total["assigned"] / total["count"] * 100) if total["count"] else 0, 2)
         },
         "idle_assets": idle_assets,
         "by_location": {
@@ -271,77 +334,27 @@ async def get_maintenance_cost_analysis_report(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     department_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     """Maintenance Cost Analysis - Detailed cost breakdown"""
     
-    query = db.query(MaintenanceRequests).filter(
-        MaintenanceRequests.cost.isnot(None)
-    )
-    
-    if date_from:
-        query = query.filter(MaintenanceRequests.request_date >= date_from)
-    if date_to:
-        query = query.filter(MaintenanceRequests.request_date <= date_to)
-    if department_id:
-        query = query.join(Assets).filter(Assets.department_id == department_id)
-    
-    requests = query.all()
-    
-    total_cost = sum(r.cost for r in requests)
+    filters = cube.maintenance_filters(department_id, date_from, date_to, cube.costed())
     
-    by_type = defaultdict(lambda: {"count": 0, "total_cost": Decimal(0)})
-    for req in requests:
-        by_type[req.maintenance_type.value]["count"] += 1
-        by_type[req.maintenance_type.value]["total_cost"] += req.cost
-    
-    by_category = defaultdict(lambda: {"count": 0, "total_cost": Decimal(0)})
-    for req in requests:
-        if req.asset:
-            category = req.asset.category.value
-            by_category[category]["count"] += 1
-            by_category[category]["total_cost"] += req.cost
-    
-    expensive_requests = sorted(requests, key=lambda x: x.cost, reverse=True)[:10]
-    expensive_list = [
-        {
-            "id": r.id,
-            "asset_id": r.asset_id,
-            "asset_description": r.asset.description if r.asset else None,
-            "cost": float(r.cost),
-            "maintenance_type": r.maintenance_type.value,
-            "request_date": r.request_date,
-            "completed_at": r.completed_at
-        }
-        for r in expensive_requests
-    ]
+    total, breakdown = cube.grouped(
+        db,
+        {"type": MaintenanceRequests.maintenance_type, "category": Assets.category},
+        filters,
+    )
+    total_cost = Decimal(total["total_cost"])
     
-    asset_costs = defaultdict(lambda: {"cost": Decimal(0), "count": 0, "asset": None})
-    for req in requests:
-        if req.asset:
-            asset_costs[req.asset_id]["cost"] += req.cost
-            asset_costs[req.asset_id]["count"] += 1
-            asset_costs[req.asset_id]["asset"] = req.asset
-    
-    high_cost_assets = sorted(
-        [
-            {
-                "asset_id": asset_id,
-                "asset_description": data["asset"].description,
-                "asset_tag": data["asset"].tag_number,
-                "total_maintenance_cost": float(data["cost"]),
-                "maintenance_count": data["count"],
-                "avg_cost_per_maintenance": float(data["cost"] / data["count"])
-            }
-            for asset_id, data in asset_costs.items() if data["asset"]
-        ],
-        key=lambda x: x["total_maintenance_cost"],
-        reverse=True
-    )[:10]
+    expensive_list = cube.top_requests(db, filters, limit=10)
+    high_cost_assets = cube.top_assets(db, filters, limit=10).get(None, [])
+    # top 5 per department in the same window pass
+    by_department = cube.top_assets(db, filters, limit=5, partition=Assets.department_id)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
@@ -352,28 +365,59 @@ async def get_maintenance_cost_analysis_report(
     
     return {
         "summary": {
-            "total_requests": len(requests),
+            "total_requests": total["count"],
             "total_cost": float(total_cost),
-            "average_cost": float(total_cost / len(requests)) if requests else 0
-        },
-        "by_maintenance_type": {
-            mtype: {
-                "count": data["count"],
-                "total_cost": float(data["total_cost"]),
-                "avg_cost": float(data["total_cost"] / data["count"]) if data["count"] > 0 else 0
-            }
-            for mtype, data in by_type.items()
-        },
-        "by_category": {
-            cat: {
-                "count": data["count"],
-                "total_cost": float(data["total_cost"]),
-                "avg_cost": float(data["total_cost"] / data["count"]) if data["count"] > 0 else 0
-            }
-            for cat, data in by_category.items()
+            "average_cost": float(total_cost / total["count"]) if total["count"] else 0
         },
+        "by_maintenance_type": cube.cost_buckets(breakdown["type"]),
+        "by_category": cube.cost_buckets({k: v for k, v in breakdown["category"].items() if k is not None}),
         "most_expensive_requests": expensive_list,
         "high_cost_assets": high_cost_assets,
+        "high_cost_assets_by_department": {
+            (dept if dept is not None else "unassigned"): assets for dept, assets in by_department.items()
+        },
+        "generated_at": datetime.now()
+    }
+
+
+@router.get("/maintenance-cost-cube")
+async def get_maintenance_cost_cube_report(
+    dims: str = "maintenance_type,issue_category,asset_category,department,month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    department_id: Optional[str] = None,
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Maintenance Cost Cube - count n cost per type x issue category x asset category x department x month
+    dims picks the axes to keep, the rest are summed over"""
+    
+    axes = [d.strip() for d in dims.split(",") if d.strip()]
+    unknown = [d for d in axes if d not in cube.CUBE_DIMS]
+    if unknown or not axes:
+        raise HTTPException(status_code=400, detail=f"dims must be a comma list of: {', '.join(cube.CUBE_DIMS)}")
+    
+    filters = cube.maintenance_filters(department_id, date_from, date_to)
+    cells = cube.cube_cells(db, axes, filters)
+    
+    if sys_logger:
+        enqueue_log_nowait(
+            user_id=current_user.id,
+            action=ActionType.VIEW,
+            target_table="reports",
+            target_id="maintenance_cost_cube",
+            details={"filters": {"dims": axes, "department_id": department_id, "date_from": str(date_from), "date_to": str(date_to)}},
+            level=LogLevel.INFO
+        )
+    
+    return {
+        "dims": axes,
+        "summary": {
+            "cells": len(cells),
+            "total_requests": sum(c["count"] for c in cells),
+            "total_cost": sum(c["total_cost"] for c in cells)
+        },
+        "cells": cells,
         "generated_at": datetime.now()
     }
 
@@ -483,6 +527,13 @@ async def list_available_reports(
             "category": "Maintenance Reports",
             "endpoint": "/api/v1/r/reports/maintenance-cost-analysis"
         },
+        {
+            "id": "maintenance-cost-cube",
+            "name": "Maintenance Cost Cube",
+            "description": "Cost by maintenance type, issue category, asset category, department and month",
+            "category": "Maintenance Reports",
+            "endpoint": "/api/v1/r/reports/maintenance-cost-cube"
+        },
         {
             "id": "pending-transfers-disposals",
             "name": "Pending Transfers & Disposals",
@@ -546,7 +597,7 @@ async def list_available_reports(
         by_category[report["category"]].append(report)
     
     if sys_logger:
-        await enqueue_log(
+        enqueue_log_nowait(
             user_id=current_user.id,
             action=ActionType.VIEW,
             target_table="reports",
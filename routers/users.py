@@ -2,14 +2,17 @@ from fastapi import APIRouter, Depends, HTTPException, status,BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional,Union
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import Role, User,GovLevel,Departments
 from ..schemas.main import CreateUserAdmin,AuthMethod
 from ..utilities import generate_id,get_current_user,generate_id,pwd_context,get_changes
 from ..system_vars import sys_logger,debugging,user_default_pass,default_new_user_status,send_emails,sys_logger
 from ..services.logger_queue import enqueue_log
+from ..services.password_hasher import password_hasher
 from ..schemas.main import  ActionType, LogLevel,GivePerms,UserStatus,UserOutWithRole, ModifyProfile,ChangeUserStatus,NoChangesResponse,UserOutProfile
-from ..services.policy_eval import check_simple_permission,check_full_permission,get_user_perms
+from ..services.policy_eval import check_simple_permission,check_full_permission,get_user_perms,evaluate_batch_permissions
+from ..models import Assets
+from ..schemas.assets import AssetPermissionCheck, AssetPermissionDecision
 from sqlalchemy import or_, func
 from datetime import datetime, timezone
 from sqlalchemy.orm import joinedload
@@ -22,7 +25,7 @@ router = APIRouter(
     )
 
 @router.get("/",status_code=status.HTTP_200_OK,response_model=List[UserOutWithRole])
-async def get_all_users_param(current_user: User = Depends(get_current_user),db :Session = Depends(get_db),
+async def get_all_users_param(current_user: User = Depends(get_current_user),db :Session = Depends(get_read_db),
                               status: Optional[UserStatus] = None,
                               namecontains: Optional[str] = None,
                               email:Optional[str] = None,
@@ -132,6 +135,22 @@ async def get_my_allowed_actions_for_resource(resource ,me :User = Depends(get_c
 
     return actions
 
+@router.post("/me/permissions/assets",status_code=status.HTTP_200_OK,response_model=List[AssetPermissionDecision])
+async def check_my_asset_permissions(req: AssetPermissionCheck, me :User = Depends(get_current_user),db: Session = Depends(get_db)):
+    """allow/deny per asset for one action, eg to grey out bulk actions in a list"""
+    if len(req.asset_ids) > 5000:
+        raise HTTPException(status_code=400, detail="Too many assets, max 5000 per check")
+
+    assets = db.query(Assets).filter(Assets.id.in_(req.asset_ids), Assets.is_deleted == False).all()
+    found = {a.id: a for a in assets}
+    decisions = dict(zip(found, evaluate_batch_permissions(me, "asset", req.action, found.values(), db)))
+
+    return [
+        AssetPermissionDecision(asset_id=aid, allowed=False, reason="Asset not found") if aid not in decisions
+        else AssetPermissionDecision(asset_id=aid, allowed=decisions[aid][0], reason=decisions[aid][1])
+        for aid in req.asset_ids
+    ]
+
 #----------------------------------
 @router.get("/{user_id}/permissions",status_code=status.HTTP_200_OK)
 async def get_user_permissions_adm(user_id,curr : User = Depends(get_current_user),db: Session = Depends(get_db)):
@@ -226,7 +245,7 @@ async def create_new_user_adm(user: CreateUserAdmin , db: Session = Depends(get_
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
  
-    hashed_pass = pwd_context.hash(user_default_pass)
+    hashed_pass = await password_hasher.hash(user_default_pass)
     user_id = generate_id()
 
     if user.entity_name:
@@ -9,6 +9,7 @@ from ..models import AssetCategory as AssetCategoryEnum
 from ..models import AssetStatus as AssetStatusEnum
 from ..models  import AssetCondition as AssetConditionEnum
 from ..models import TransferStatus as TransferStatusEnum
+from ..models import DepreciationMethod as DepreciationMethodEnum
 
 # Base schemas
 class AssetBase(BaseModel):
@@ -31,6 +32,9 @@ class AssetBase(BaseModel):
     source_of_funds: Optional[str] = None
     depreciation_rate: Optional[Decimal] = None
     useful_life_years: Optional[int] = None
+    depreciation_method: Optional[DepreciationMethodEnum] = None
+    useful_life_units: Optional[Decimal] = None
+    units_used: Optional[Decimal] = None
     is_portable_attractive: bool = False
     insurance_details: Optional[Dict[str, Any]] = None
     maintenance_schedule: Optional[Dict[str, Any]] = None
@@ -54,6 +58,9 @@ class AssetUpdate(BaseModel):
     source_of_funds: Optional[str] = None
     depreciation_rate: Optional[Decimal] = None
     useful_life_years: Optional[int] = None
+    depreciation_method: Optional[DepreciationMethodEnum] = None
+    useful_life_units: Optional[Decimal] = None
+    units_used: Optional[Decimal] = None
     is_portable_attractive: Optional[bool] = None
     insurance_details: Optional[Dict[str, Any]] = None
     maintenance_schedule: Optional[Dict[str, Any]] = None
@@ -79,6 +86,8 @@ class AssetResponse(AssetBase):
     revaluation_history: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    last_activity_at: Optional[datetime] = None
+    data_quality_score: Optional[Decimal] = None
     is_deleted: bool = False
     
     department_name: Optional[str] = None
@@ -156,6 +165,9 @@ class AssetSearchParams(BaseModel):
     max_value: Optional[Decimal] = None
     acquisition_date_from: Optional[date] = None
     acquisition_date_to: Optional[date] = None
+    idle_days: Optional[int] = None  # no lifecycle, maintenance, transfer or location activity in this many days
+    missing: Optional[str] = None  # a data quality field, see services.data_quality.FIELDS
+    max_quality_score: Optional[Decimal] = None
     page: int = 1
     size: int = 20
     sort_by: Optional[str] = "created_at"
@@ -215,4 +227,12 @@ class CategoryInfo(BaseModel):
 
 class AssignAssetUserDep(BaseModel):
     user_id : Optional[str] = None
-    dept_id : Optional[str] = None
\ No newline at end of file
+    dept_id : Optional[str] = None
+class AssetPermissionCheck(BaseModel):
+    action: str
+    asset_ids: List[str]
+
+class AssetPermissionDecision(BaseModel):
+    asset_id: str
+    allowed: bool
+    reason: str
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class ReportJobCreate(BaseModel):
+    report_id: str  # path under /api/v1/r/reports, eg "asset-summary-dashboard"
+    filters: Dict[str, Any] = {}
+
+class ReportJobOut(BaseModel):
+    id: str
+    report_id: str
+    filters: Optional[Dict[str, Any]]
+    status: str
+    backend: str
+    attempts: int
+    result_bytes: Optional[int]
+    error: Optional[str]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
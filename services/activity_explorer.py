@@ -0,0 +1,133 @@
+"""read side of activity_logs, keyset pages newest first with the user joined in the same query
+n summaries as separate aggregates over the whole filter, not just the page"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import ActivityLog, User
+from ..schemas.main import LogLevel
+from . import report_aggregates as agg
+
+
+USER_NAME = func.concat_ws(" ", User.first_name, User.last_name)
+USER_JOIN = (User, User.id == ActivityLog.user_id)
+
+
+def log_filters(
+    user_id: Optional[str] = None,
+    actions: Optional[Sequence[str]] = None,
+    target_table: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[Any]:
+    clauses = []
+    if user_id:
+        clauses.append(ActivityLog.user_id == user_id)
+    if actions:
+        clauses.append(ActivityLog.action.in_(actions) if len(actions) > 1 else ActivityLog.action == actions[0])
+    if target_table:
+        clauses.append(ActivityLog.target_table == target_table)
+    if date_from:
+        clauses.append(ActivityLog.created_at >= date_from)
+    if date_to:
+        clauses.append(ActivityLog.created_at <= date_to)
+    return clauses
+
+
+def encode_cursor(created_at: datetime, log_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(log_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(created_at, id) of the last row on the previous page, 400 when it wasnt one of ours"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(log_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page(db: Session, filters: Sequence[Any], limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """one page newest first, (created_at, id) keyset so deep pages cost the same as the first"""
+    stmt = (
+        select(
+            ActivityLog.id, ActivityLog.user_id, ActivityLog.action, ActivityLog.target_table,
+            ActivityLog.target_id, ActivityLog.logg_level, ActivityLog.details, ActivityLog.created_at,
+            User.first_name, User.last_name,
+        )
+        .select_from(ActivityLog)
+        .outerjoin(*USER_JOIN)
+        .where(*filters)
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(*decode_cursor(cursor)))
+    rows = db.execute(
+        stmt.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1)
+    ).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        {
+            "id": str(r.id),
+            "user_id": r.user_id,
+            "user": f"{r.first_name} {r.last_name}" if r.first_name is not None else None,
+            "action": r.action,
+            "target_table": r.target_table,
+            "target_id": r.target_id,
+            "level": r.logg_level,
+            "details": r.details,
+            "created_at": r.created_at
+        }
+        for r in rows
+    ]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if more else None,
+    }
+
+
+def summaries(db: Session, filters: Sequence[Any], top_users: int = 50) -> Dict[str, Any]:
+    """counts by action, table n user over the full filter, one GROUPING SETS query
+    plus one for the names of the busiest users"""
+    total, breakdown = agg.grouped(
+        db,
+        {"action": ActivityLog.action, "table": ActivityLog.target_table, "user": ActivityLog.user_id},
+        filters,
+        measures={
+            "count": func.count(ActivityLog.id),
+            "critical": func.count(ActivityLog.id).filter(ActivityLog.logg_level == LogLevel.CRITICAL.value),
+        },
+        source=ActivityLog,
+    )
+
+    busiest = sorted(
+        ((uid, data["count"]) for uid, data in breakdown["user"].items() if uid is not None),
+        key=lambda x: x[1],
+        reverse=True,
+    )[:top_users]
+    names = {}
+    if busiest:
+        names = dict(db.execute(
+            select(User.id, USER_NAME).where(User.id.in_([uid for uid, _ in busiest]))
+        ).all())
+
+    return {
+        "total": total["count"],
+        "critical": total["critical"],
+        "by_action": {(k if k is not None else "unknown"): v["count"] for k, v in breakdown["action"].items()},
+        "by_table": {(k if k is not None else "unknown"): v["count"] for k, v in breakdown["table"].items()},
+        "by_user": [
+            {"user_id": uid, "user": names.get(uid), "count": count}
+            for uid, count in busiest
+        ],
+        "distinct_users": sum(1 for uid in breakdown["user"] if uid is not None),
+    }
@@ -0,0 +1,305 @@
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..models import Assets, AssetRollup, AssetCategory, AssetStatus, AssetCondition, Departments
+from ..database import JobSessionLocal
+from . import report_aggregates as agg
+
+
+DIMS = ("department_id", "category", "status", "condition", "county_code")
+_ENUMS = {"category": AssetCategory, "status": AssetStatus, "condition": AssetCondition}
+_TRACKED = set(DIMS) | {"is_deleted", "responsible_officer_id", "current_value", "acquisition_cost"}
+
+# same shape as the delta rows, built straight from assets
+REBUILD_SQL = """
+    INSERT INTO asset_rollups (
+        department_id, category, status, condition, county_code,
+        asset_count, unassigned_count, total_value, updated_at
+    )
+    SELECT
+        coalesce(department_id, ''), category::text, status::text,
+        coalesce(condition::text, ''), coalesce(county_code, ''),
+        count(*),
+        count(*) FILTER (WHERE responsible_officer_id IS NULL),
+        coalesce(sum(coalesce(nullif(current_value, 0), acquisition_cost, 0)), 0),
+        now()
+    FROM assets
+    WHERE is_deleted = false
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+# any fixed key works, only stops two workers rebuilding at once
+REBUILD_LOCK_KEY = 780412
+
+
+def _dim(key: str, value) -> str:
+    """attribute value -> what the rollup pk stores, enum names n '' for null"""
+    if value is None or value == "":
+        return ""
+    enum_cls = _ENUMS.get(key)
+    if enum_cls is None:
+        return str(value)
+    try:
+        return enum_cls(value).name
+    except ValueError:
+        return enum_cls[value].name if value in enum_cls.__members__ else str(value)
+
+
+def _default(key: str):
+    default = Assets.__table__.c[key].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def _current(obj: Assets, key: str):
+    value = getattr(obj, key)
+    return _default(key) if value is None else value
+
+
+_UNKNOWN = object()
+
+
+def _previous(state, key: str):
+    """value before this flush, _UNKNOWN when it was never loaded"""
+    hist = state.attrs[key].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    if hist.added:
+        return _UNKNOWN
+    # untouched n not loaded, whatever the row has is still the old value
+    try:
+        return getattr(state.obj(), key)
+    except Exception:
+        return _UNKNOWN
+
+
+def _contribution(get) -> Optional[Tuple[tuple, int, Decimal]]:
+    """(rollup key, unassigned, value) for one asset, None if it doesnt count"""
+    if get("is_deleted") is not False:
+        return None
+    key = tuple(_dim(k, get(k)) for k in DIMS)
+    unassigned = 1 if get("responsible_officer_id") is None else 0
+    value = get("current_value") or get("acquisition_cost") or Decimal(0)
+    return key, unassigned, Decimal(value)
+
+
+class RollupStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flushes = 0
+        self.rows_upserted = 0
+        self.unknown_previous = 0
+        self.rebuilds = 0
+        self.rebuild_skipped = 0
+        self.last_rebuild_at = None
+        self.last_rebuild_ms = None
+        self.last_rebuild_rows = None
+        self.last_rebuild_error = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "flushes_with_deltas": self.flushes,
+                "rows_upserted": self.rows_upserted,
+                "unknown_previous_state": self.unknown_previous,
+                "rebuilds": self.rebuilds,
+                "rebuild_skipped": self.rebuild_skipped,
+                "last_rebuild_at": self.last_rebuild_at,
+                "last_rebuild_ms": self.last_rebuild_ms,
+                "last_rebuild_rows": self.last_rebuild_rows,
+                "last_rebuild_error": self.last_rebuild_error,
+            }
+
+
+rollup_stats = RollupStats()
+
+
+def _deltas(session: Session) -> Dict[tuple, list]:
+    deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+
+    def add(contrib, sign):
+        if contrib is None:
+            return
+        key, unassigned, value = contrib
+        d = deltas[key]
+        d[0] += sign
+        d[1] += sign * unassigned
+        d[2] += sign * value
+
+    for obj in session.new:
+        if isinstance(obj, Assets):
+            add(_contribution(lambda k: _current(obj, k)), 1)
+
+    def remove_previous(state):
+        before = {k: _previous(state, k) for k in _TRACKED}
+        if any(v is _UNKNOWN for v in before.values()):
+            # expired n overwritten without a load, the periodic rebuild picks it up
+            with rollup_stats.lock:
+                rollup_stats.unknown_previous += 1
+            return
+        add(_contribution(before.get), -1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Assets):
+            remove_previous(inspect(obj))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Assets):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[k].history.has_changes() for k in _TRACKED):
+            continue
+        remove_previous(state)
+        add(_contribution(lambda k: _current(obj, k)), 1)
+
+    return {k: v for k, v in deltas.items() if v[0] or v[1] or v[2]}
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context):
+    """deltas go out on the flushing connection, so they commit or roll back with the asset change"""
+    deltas = _deltas(session)
+    if not deltas:
+        return
+
+    # fixed key order so two flushes touching the same rows cant deadlock
+    rows = [
+        {
+            **dict(zip(DIMS, key)),
+            "asset_count": d[0],
+            "unassigned_count": d[1],
+            "total_value": d[2],
+        }
+        for key, d in sorted(deltas.items())
+    ]
+    table = AssetRollup.__table__
+    stmt = pg_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(DIMS),
+        set_={
+            "asset_count": table.c.asset_count + stmt.excluded.asset_count,
+            "unassigned_count": table.c.unassigned_count + stmt.excluded.unassigned_count,
+            "total_value": table.c.total_value + stmt.excluded.total_value,
+            "updated_at": func.now(),
+        },
+    )
+    session.connection().execute(stmt)
+
+    with rollup_stats.lock:
+        rollup_stats.flushes += 1
+        rollup_stats.rows_upserted += len(rows)
+
+
+def rebuild_rollups(db: Optional[Session] = None) -> Optional[int]:
+    """recompute every rollup row from assets in one transaction, returns rows written
+    the exclusive lock makes concurrent deltas wait for the swap instead of landing on the old rows"""
+    own = db is None
+    db = db or JobSessionLocal()
+    started = time.monotonic()
+    try:
+        got_lock = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REBUILD_LOCK_KEY}).scalar()
+        if not got_lock:
+            db.rollback()
+            with rollup_stats.lock:
+                rollup_stats.rebuild_skipped += 1
+            return None
+
+        db.execute(text("LOCK TABLE asset_rollups IN EXCLUSIVE MODE"))
+        db.execute(text("DELETE FROM asset_rollups"))
+        rows = db.execute(text(REBUILD_SQL)).rowcount
+        db.commit()
+
+        with rollup_stats.lock:
+            rollup_stats.rebuilds += 1
+            rollup_stats.last_rebuild_at = time.time()
+            rollup_stats.last_rebuild_ms = round((time.monotonic() - started) * 1000, 1)
+            rollup_stats.last_rebuild_rows = rows
+            rollup_stats.last_rebuild_error = None
+        return rows
+    except Exception as e:
+        db.rollback()
+        with rollup_stats.lock:
+            rollup_stats.last_rebuild_error = str(e)
+        print(f"⚠️ asset rollup rebuild failed: {e}")
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+# ---- read side ----
+
+def _enum_or_none(enum_cls, name):
+    if name is None or name == "":
+        return None
+    return enum_cls.__members__.get(name, name)
+
+
+def _none_if_blank(value):
+    return None if value == "" else value
+
+
+_KEY_DECODERS = {
+    "category": lambda v: _enum_or_none(AssetCategory, v),
+    "status": lambda v: _enum_or_none(AssetStatus, v),
+    "condition": lambda v: _enum_or_none(AssetCondition, v),
+    "department_id": _none_if_blank,
+    "county_code": _none_if_blank,
+}
+
+ROLLUP_COUNT = func.coalesce(func.sum(AssetRollup.asset_count), 0)
+ROLLUP_VALUE = func.coalesce(func.sum(AssetRollup.total_value), 0)
+
+ROLLUP_MEASURES = {
+    "count": ROLLUP_COUNT,
+    "value": ROLLUP_VALUE,
+}
+
+ROLLUP_DEPARTMENT_JOIN = (Departments, Departments.dept_id == AssetRollup.department_id)
+
+
+def rollup_count_where(*conditions):
+    """sum(asset_count) filter (where ..), the rollup version of agg.count_where"""
+    return func.coalesce(func.sum(AssetRollup.asset_count).filter(*conditions), 0)
+
+
+def status_is(*statuses):
+    return AssetRollup.status.in_([s.name for s in statuses])
+
+
+def condition_is(*conditions):
+    return AssetRollup.condition.in_([c.name for c in conditions])
+
+
+def rollup_filters(department_id: Optional[str] = None, category: Optional[str] = None):
+    clauses = []
+    if department_id:
+        clauses.append(AssetRollup.department_id == department_id)
+    if category:
+        clauses.append(AssetRollup.category == _dim("category", category))
+    return clauses
+
+
+def rollup_grouped(db: Session, dims: Dict[str, Any], filters=(), measures=None, joins=(), with_total: bool = True):
+    """agg.grouped over asset_rollups, keys decoded back to enums / None like the raw version"""
+    measures = measures or ROLLUP_MEASURES
+    total, breakdown = agg.grouped(
+        db, dims, filters,
+        measures=measures, joins=joins, with_total=with_total,
+        source=AssetRollup, having=ROLLUP_COUNT > 0,
+    )
+    for name, expr in dims.items():
+        if getattr(expr, "class_", None) is not AssetRollup:
+            continue
+        decode = _KEY_DECODERS.get(expr.key)
+        if decode is not None:
+            breakdown[name] = {decode(k): v for k, v in breakdown[name].items()}
+    return total, breakdown
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from ..models import Assets, Departments
+from ..database import JobSessionLocal
+from ..system_vars import SNAPSHOT_DIR, SNAPSHOT_BATCH_ROWS
+from . import report_aggregates as agg
+from .location_service import county_name_for
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshot n analytics are optional, the live reports dont need pyarrow
+    pa = None
+    pq = None
+
+
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "assets-latest.parquet")
+META_PATH = os.path.join(SNAPSHOT_DIR, "assets-latest.json")
+
+# only stops two workers writing the same snapshot at once
+SNAPSHOT_LOCK_KEY = 780413
+
+# live non deleted assets, enum columns stored as their display values (what the reports return)
+# plus the codes (enum names) for joining back to the live tables
+SNAPSHOT_COLUMNS = (
+    ("id", Assets.id),
+    ("tag_number", Assets.tag_number),
+    ("description", Assets.description),
+    ("category", Assets.category),
+    ("status", Assets.status),
+    ("condition", Assets.condition),
+    ("department_id", Assets.department_id),
+    ("department_name", Departments.name),
+    ("entity_type", Departments.entity_type),
+    ("county_code", Assets.county_code),
+    ("acquisition_date", Assets.acquisition_date),
+    ("acquisition_cost", Assets.acquisition_cost),
+    ("current_value", Assets.current_value),
+    ("value", agg.ASSET_VALUE),
+    ("depreciation_rate", Assets.depreciation_rate),
+    ("useful_life_years", Assets.useful_life_years),
+    ("responsible_officer_id", Assets.responsible_officer_id),
+    ("created_at", Assets.created_at),
+)
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("tag_number", pa.string()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+        ("category_code", pa.string()),
+        ("status", pa.string()),
+        ("status_code", pa.string()),
+        ("condition", pa.string()),
+        ("condition_code", pa.string()),
+        ("department_id", pa.string()),
+        ("department_name", pa.string()),
+        ("entity_type", pa.string()),
+        ("county_code", pa.string()),
+        ("county_name", pa.string()),
+        ("acquisition_date", pa.date32()),
+        ("acquisition_cost", pa.float64()),
+        ("current_value", pa.float64()),
+        ("value", pa.float64()),
+        ("depreciation_rate", pa.float64()),
+        ("useful_life_years", pa.int32()),
+        ("assigned", pa.bool_()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _enum(value) -> Tuple[Optional[str], Optional[str]]:
+    """(display value, code)"""
+    if value is None:
+        return None, None
+    return value.value, value.name
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _batch(rows, schema):
+    cols = {name: [] for name in schema.names}
+    for r in rows:
+        for key in ("category", "status", "condition"):
+            shown, code = _enum(getattr(r, key))
+            cols[key].append(shown)
+            cols[f"{key}_code"].append(code)
+        cols["id"].append(r.id)
+        cols["tag_number"].append(r.tag_number)
+        cols["description"].append(r.description)
+        cols["department_id"].append(r.department_id)
+        cols["department_name"].append(r.department_name)
+        cols["entity_type"].append(_enum(r.entity_type)[0])
+        cols["county_code"].append(r.county_code)
+        cols["county_name"].append(county_name_for(r.county_code))
+        cols["acquisition_date"].append(r.acquisition_date)
+        cols["acquisition_cost"].append(_float(r.acquisition_cost))
+        cols["current_value"].append(_float(r.current_value))
+        cols["value"].append(_float(r.value))
+        cols["depreciation_rate"].append(_float(r.depreciation_rate))
+        cols["useful_life_years"].append(r.useful_life_years)
+        cols["assigned"].append(r.responsible_officer_id is not None)
+        cols["created_at"].append(r.created_at)
+    return pa.RecordBatch.from_pydict(cols, schema=schema)
+
+
+def write_asset_snapshot(db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+    """stream the register into a zstd parquet file batch by batch, swapped in atomically when complete
+    returns the snapshot meta, None when skipped"""
+    if pa is None:
+        print("⚠️ asset snapshot skipped, pyarrow is not installed")
+        return None
+
+    own = db is None
+    db = db or JobSessionLocal()
+    started = time.monotonic()
+    tmp = os.path.join(SNAPSHOT_DIR, f".assets-{os.getpid()}.parquet.tmp")
+    writer = None
+    try:
+        got_lock = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SNAPSHOT_LOCK_KEY}).scalar()
+        if not got_lock:
+            return None
+
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        schema = _schema()
+        writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+        stmt = (
+            select(*(col.label(name) for name, col in SNAPSHOT_COLUMNS))
+            .select_from(Assets)
+            .outerjoin(*agg.DEPARTMENT_JOIN)
+            .where(Assets.is_deleted == False)
+            .order_by(Assets.department_id, Assets.category)  # clusters row groups for the usual filters
+        )
+        rows = 0
+        for part in db.execute(stmt.execution_options(yield_per=SNAPSHOT_BATCH_ROWS)).partitions():
+            writer.write_batch(_batch(part, schema))
+            rows += len(part)
+        writer.close()
+        writer = None
+        os.replace(tmp, SNAPSHOT_PATH)
+
+        meta = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "rows": rows,
+            "bytes": os.path.getsize(SNAPSHOT_PATH),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        with open(META_PATH + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(META_PATH + ".tmp", META_PATH)
+        return meta
+    except Exception as e:
+        print(f"⚠️ asset snapshot failed: {e}")
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        db.rollback()  # releases the advisory lock, nothing was written
+        if own:
+            db.close()
+
+
+class _SnapshotCache:
+    """last loaded snapshot table, reread when the file on disk changes"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.table = None
+        self.meta = None
+
+    def get(self):
+        if pa is None:
+            return None, None
+        try:
+            mtime = os.path.getmtime(SNAPSHOT_PATH)
+        except OSError:
+            return None, None
+        with self.lock:
+            if mtime != self.mtime:
+                self.table = pq.read_table(SNAPSHOT_PATH, memory_map=True)
+                self.meta = snapshot_meta()
+                self.mtime = mtime
+            return self.table, self.meta
+
+
+_snapshot_cache = _SnapshotCache()
+
+
+def load_snapshot():
+    """(pyarrow table, meta) of the latest snapshot, (None, None) when there isnt one or pyarrow is missing"""
+    return _snapshot_cache.get()
+
+
+def snapshot_meta() -> Optional[Dict[str, Any]]:
+    try:
+        with open(META_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_status() -> Dict[str, Any]:
+    return {
+        "pyarrow_installed": pa is not None,
+        "path": SNAPSHOT_PATH,
+        "available": os.path.exists(SNAPSHOT_PATH),
+        "meta": snapshot_meta(),
+    }
@@ -0,0 +1,131 @@
+"""per asset data quality, one bit per missing field stored on the asset with a 0-100 score
+kept current by the Assets insert/update listener in models, the backfill covers rows written before
+(or outside) it. no models / system_vars import here, models imports this"""
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..database import JobSessionLocal
+
+
+# serial numbers arent expected on these (enum values, the names are what the column stores)
+NO_SERIAL_CATEGORIES = {"Land": "LAND", "Buildings and building improvements": "BUILDINGS"}
+
+
+def _blank(value) -> bool:
+    return not value
+
+
+def _no_serial(asset) -> bool:
+    category = getattr(asset.category, "value", asset.category)
+    return not asset.serial_number and category not in NO_SERIAL_CATEGORIES
+
+
+# (name, bit, missing on the orm object, missing in sql), names are what the reports n ?missing= use
+FIELDS = (
+    ("acquisition_cost", 1, lambda a: _blank(a.acquisition_cost), "coalesce(acquisition_cost, 0) = 0"),
+    ("acquisition_date", 2, lambda a: _blank(a.acquisition_date), "acquisition_date IS NULL"),
+    ("responsible_officer", 4, lambda a: _blank(a.responsible_officer_id), "coalesce(responsible_officer_id, '') = ''"),
+    ("department", 8, lambda a: _blank(a.department_id), "coalesce(department_id, '') = ''"),
+    ("location", 16, lambda a: _blank(a.location), "(location IS NULL OR location::text IN ('null', '{}', '[]', '\"\"'))"),
+    ("serial_number", 32, _no_serial,
+     "(coalesce(serial_number, '') = '' AND category::text NOT IN (%s))"
+     % ", ".join(f"'{name}'" for name in NO_SERIAL_CATEGORIES.values())),
+)
+FIELD_BITS = {name: bit for name, bit, _, _ in FIELDS}
+ALL_FLAGS = range(1 << len(FIELDS))
+
+
+def flags_for(asset) -> int:
+    flags = 0
+    for _, bit, missing, _ in FIELDS:
+        if missing(asset):
+            flags |= bit
+    return flags
+
+
+def score_for(flags: int) -> float:
+    """share of the checks passed, same 0-100 the missing data report always showed"""
+    return round((1 - bin(flags).count("1") / len(FIELDS)) * 100, 2)
+
+
+def missing_fields(flags: int) -> List[str]:
+    return [name for name, bit, _, _ in FIELDS if flags & bit]
+
+
+def flags_missing(name: str) -> List[int]:
+    """every flags value with name's bit set, `flags IN (..)` is a btree lookup where `flags & bit` isnt"""
+    bit = FIELD_BITS[name]
+    return [f for f in ALL_FLAGS if f & bit]
+
+
+FLAGS_SQL = " + ".join(f"(CASE WHEN {cond} THEN {bit} ELSE 0 END)" for _, bit, _, cond in FIELDS)
+MISSING_SQL = " + ".join(f"(CASE WHEN {cond} THEN 1 ELSE 0 END)" for _, _, _, cond in FIELDS)
+
+BACKFILL_SQL = f"""
+    UPDATE assets
+    SET data_quality_flags = {FLAGS_SQL},
+        data_quality_score = round((1 - ({MISSING_SQL}) / {len(FIELDS)}.0) * 100, 2)
+    WHERE id IN (
+        SELECT id FROM assets
+        WHERE (:recheck OR data_quality_flags IS NULL) AND id > :after
+        ORDER BY id
+        LIMIT :batch
+    )
+    RETURNING id
+"""
+
+
+def backfill_data_quality(batch: int = 5000, recheck: bool = False, db: Optional[Session] = None) -> int:
+    """score rows with no flags yet (or every row when recheck), a commit per id ordered batch so
+    no long lock on assets, returns rows updated"""
+    own = db is None
+    db = db or JobSessionLocal()
+    started = time.monotonic()
+    updated = 0
+    after = ""
+    try:
+        while True:
+            ids = db.execute(
+                text(BACKFILL_SQL),
+                {"recheck": recheck, "after": after, "batch": batch},
+            ).scalars().all()
+            db.commit()
+            if not ids:
+                break
+            updated += len(ids)
+            after = max(ids)
+        if updated:
+            print(f"🧹 data quality backfill scored {updated} assets in {time.monotonic() - started:.1f}s")
+        return updated
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ data quality backfill failed: {e}")
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+def expand_flag_counts(counts: Dict[int, int]) -> Dict[str, Any]:
+    """{flags: assets} from the grouped query -> the missing data summary numbers"""
+    total = sum(counts.values())
+    with_issues = {f: n for f, n in counts.items() if f}
+    issue_count = sum(with_issues.values())
+    by_field = {}
+    for name, bit, _, _ in FIELDS:
+        n = sum(c for f, c in with_issues.items() if f & bit)
+        if n:
+            by_field[name] = n
+    avg_completeness = (
+        sum(score_for(f) * n for f, n in with_issues.items()) / issue_count if issue_count else 100
+    )
+    overall = round(((total - issue_count) / total * 100 + avg_completeness) / 2, 2) if total else 100
+    return {
+        "total_assets": total,
+        "assets_with_issues": issue_count,
+        "overall_data_quality_score": overall,
+        "by_missing_field": by_field,
+    }
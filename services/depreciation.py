@@ -0,0 +1,173 @@
+"""batch depreciation, the whole selection goes through in one pass over numpy arrays
+(plain python loop when numpy isnt installed, same sums). floats all the way through n
+cents only at the end, nbv is cost minus the rounded accumulated so the two always add back up"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+from ..models import Assets, DepreciationMethod
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DAYS_PER_YEAR = 365.25
+
+# what depreciate() reads off each row, orm Assets objects have the same names so they work too
+INPUT_COLUMNS = (
+    Assets.acquisition_cost,
+    Assets.depreciation_rate,
+    Assets.useful_life_years,
+    Assets.acquisition_date,
+    Assets.depreciation_method,
+    Assets.useful_life_units,
+    Assets.units_used,
+)
+
+STRAIGHT_LINE, REDUCING_BALANCE, UNITS_OF_USE = 0, 1, 2
+METHOD_CODES = {
+    None: STRAIGHT_LINE,
+    DepreciationMethod.STRAIGHT_LINE: STRAIGHT_LINE,
+    DepreciationMethod.REDUCING_BALANCE: REDUCING_BALANCE,
+    DepreciationMethod.UNITS_OF_USE: UNITS_OF_USE,
+}
+
+
+def depreciable_clause():
+    """assets the engine can value, a dated asset with a rate or a life, or units of use with a unit life"""
+    return or_(
+        and_(
+            Assets.acquisition_date.isnot(None),
+            or_(Assets.depreciation_rate.isnot(None), Assets.useful_life_years > 0),
+        ),
+        and_(Assets.depreciation_method == DepreciationMethod.UNITS_OF_USE, Assets.useful_life_units > 0),
+    )
+
+
+def _f(value) -> float:
+    return float(value) if value is not None else float("nan")
+
+
+def _days(acquired: Optional[date], as_of: date) -> float:
+    return max((as_of - acquired).days, 0) if acquired else 0
+
+
+def _not_acquired(acquired: Optional[date], as_of: date) -> bool:
+    """dated after as_of, nothing depreciates before it is owned (units of use included)"""
+    return acquired is not None and acquired > as_of
+
+
+def _row_py(cost, rate, life, days, method, units_life, units_used):
+    """one asset, the scalar twin of _depreciate_np, returns (annual, accumulated) unrounded"""
+    years = days / DAYS_PER_YEAR
+    if method == REDUCING_BALANCE:
+        r = min(max(rate, 0.0), 1.0) if rate == rate else 0.0
+        nbv = cost * (1 - r) ** years
+        return nbv * r, cost - nbv
+    if method == UNITS_OF_USE:
+        usage = units_used / units_life if units_life > 0 and units_used == units_used else 0.0
+        accumulated = cost * min(max(usage, 0.0), 1.0)
+        return (accumulated / years if years > 0 else 0.0), accumulated
+    # straight line, the rate when set else 1 / useful life
+    r = rate if rate == rate else (1 / life if life > 0 else 0.0)
+    annual = cost * min(max(r, 0.0), 1.0)
+    return annual, min(annual * years, cost)
+
+
+def _depreciate_py(rows: Sequence[Any], as_of: date):
+    annual, accumulated, years = [], [], []
+    for r in rows:
+        cost = _f(r.acquisition_cost)
+        cost = cost if cost == cost else 0.0
+        days = _days(r.acquisition_date, as_of)
+        a, acc = _row_py(
+            cost, _f(r.depreciation_rate) / 100, _f(r.useful_life_years), days,
+            METHOD_CODES[r.depreciation_method], _f(r.useful_life_units), _f(r.units_used),
+        )
+        if _not_acquired(r.acquisition_date, as_of):
+            a, acc = 0.0, 0.0
+        annual.append(a)
+        accumulated.append(acc)
+        years.append(days / DAYS_PER_YEAR)
+    return annual, accumulated, years
+
+
+def _depreciate_np(rows: Sequence[Any], as_of: date):
+    n = len(rows)
+    cost = np.nan_to_num(np.fromiter((_f(r.acquisition_cost) for r in rows), float, n))
+    rate = np.fromiter((_f(r.depreciation_rate) for r in rows), float, n) / 100
+    life = np.fromiter((_f(r.useful_life_years) for r in rows), float, n)
+    units_life = np.fromiter((_f(r.useful_life_units) for r in rows), float, n)
+    units_used = np.fromiter((_f(r.units_used) for r in rows), float, n)
+    method = np.fromiter((METHOD_CODES[r.depreciation_method] for r in rows), np.int8, n)
+    years = np.fromiter((_days(r.acquisition_date, as_of) for r in rows), float, n) / DAYS_PER_YEAR
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # straight line
+        sl_rate = np.where(np.isnan(rate), np.where(life > 0, 1 / life, 0.0), rate)
+        sl_annual = cost * np.clip(sl_rate, 0, 1)
+        sl_acc = np.minimum(sl_annual * years, cost)
+        # reducing balance
+        rb_rate = np.clip(np.nan_to_num(rate), 0, 1)
+        rb_nbv = cost * (1 - rb_rate) ** years
+        # units of use
+        usage = np.where(units_life > 0, np.nan_to_num(units_used / units_life), 0.0)
+        uu_acc = cost * np.clip(usage, 0, 1)
+        uu_annual = np.where(years > 0, uu_acc / years, 0.0)
+
+    is_rb, is_uu = method == REDUCING_BALANCE, method == UNITS_OF_USE
+    owned = ~np.fromiter((_not_acquired(r.acquisition_date, as_of) for r in rows), bool, n)
+    annual = np.where(owned, np.select([is_rb, is_uu], [rb_nbv * rb_rate, uu_annual], default=sl_annual), 0.0)
+    accumulated = np.where(owned, np.select([is_rb, is_uu], [cost - rb_nbv, uu_acc], default=sl_acc), 0.0)
+    return annual, accumulated, years
+
+
+def _cents(values) -> List[int]:
+    if np is not None:
+        return np.rint(np.asarray(values, dtype=float) * 100).astype(np.int64).tolist()
+    return [int(round(v * 100)) for v in values]
+
+
+def _money(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def depreciate(rows: Sequence[Any], as_of: Optional[date] = None) -> Dict[str, Any]:
+    """annual charge, accumulated depreciation n nbv for every row at as_of, lists in row order
+    plus the portfolio totals, money as 2dp Decimals"""
+    as_of = as_of or date.today()
+    if not rows:
+        return {
+            "annual_depreciation": [], "accumulated_depreciation": [], "net_book_value": [], "years": [],
+            "totals": {"cost": Decimal("0.00"), "accumulated_depreciation": Decimal("0.00"), "net_book_value": Decimal("0.00")},
+        }
+
+    annual, accumulated, years = (_depreciate_np if np is not None else _depreciate_py)(rows, as_of)
+    cost_c = _cents([_f(r.acquisition_cost) if r.acquisition_cost is not None else 0.0 for r in rows])
+    acc_c = _cents(accumulated)
+    nbv_c = [c - a for c, a in zip(cost_c, acc_c)]
+    return {
+        "annual_depreciation": [_money(c) for c in _cents(annual)],
+        "accumulated_depreciation": [_money(c) for c in acc_c],
+        "net_book_value": [_money(c) for c in nbv_c],
+        "years": [round(float(y), 2) for y in years],
+        "totals": {
+            "cost": _money(sum(cost_c)),
+            "accumulated_depreciation": _money(sum(acc_c)),
+            "net_book_value": _money(sum(nbv_c)),
+        },
+    }
+
+
+def value_asset(asset: Any, as_of: Optional[date] = None) -> Dict[str, Decimal]:
+    """the one asset case, for create / update"""
+    out = depreciate([asset], as_of)
+    return {
+        "annual_depreciation": out["annual_depreciation"][0],
+        "accumulated_depreciation": out["accumulated_depreciation"][0],
+        "net_book_value": out["net_book_value"][0],
+    }
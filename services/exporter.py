@@ -0,0 +1,204 @@
+import csv
+import enum
+import io
+import json
+import os
+import tempfile
+import threading
+import weakref
+import zlib
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..database import open_report_session
+from ..system_vars import EXPORT_FETCH_SIZE, EXPORT_MAX_CONCURRENT
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # xlsx is optional, csv n ndjson need nothing extra
+    Workbook = None
+
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+CHUNK_BYTES = 64 * 1024
+XLSX_MAX_ROWS = 1048575  # one sheet, header takes the first row
+
+
+class _Slots:
+    """caps exports holding a reporting connection, each slot released once however the stream ends"""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> Optional["_Slot"]:
+        with self.lock:
+            if self.active >= self.limit:
+                return None
+            self.active += 1
+        return _Slot(self)
+
+
+class _Slot:
+    def __init__(self, slots: _Slots):
+        self.slots = slots
+        self.released = False
+
+    def release(self):
+        with self.slots.lock:
+            if not self.released:
+                self.released = True
+                self.slots.active -= 1
+
+
+export_slots = _Slots(EXPORT_MAX_CONCURRENT)
+
+
+def _rows(stmt) -> Iterator[tuple]:
+    """server side cursor, EXPORT_FETCH_SIZE rows in memory at a time
+    session opened here n not via Depends, dependencies are torn down before the body streams"""
+    db = open_report_session()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_FETCH_SIZE))
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _text(value) -> str:
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+
+def _excel(value):
+    value = _plain(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # excel has no timezones, write utc
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _csv_chunks(headers: Sequence[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_text(v) for v in row])
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def _ndjson_chunks(headers: Sequence[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(json.dumps(dict(zip(headers, row)), default=_json_default))
+        buf.write("\n")
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def _xlsx_chunks(headers: Sequence[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """write only workbook spools rows to disk, the finished file is streamed back n deleted"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("export")
+    ws.append(list(headers))
+    for n, row in enumerate(rows, 1):
+        if n > XLSX_MAX_ROWS:
+            ws.append([f"truncated at {XLSX_MAX_ROWS} rows, use csv or ndjson for the full export"])
+            break
+        ws.append([_excel(v) for v in row])
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+_WRITERS = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "xlsx": _xlsx_chunks}
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _guarded(chunks: Iterable[bytes], slot: _Slot) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    finally:
+        slot.release()
+
+
+def stream_export(stmt, headers: Sequence[str], fmt: str, filename: str, gzip: bool = False) -> StreamingResponse:
+    """StreamingResponse over stmt's rows in csv / ndjson / xlsx, memory stays flat whatever the row count"""
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(FORMATS)}")
+    if fmt == "xlsx" and Workbook is None:
+        raise HTTPException(status_code=400, detail="XLSX export needs openpyxl installed, use csv or ndjson")
+
+    slot = export_slots.acquire()
+    if slot is None:
+        raise HTTPException(status_code=429, detail="Too many exports running, try again shortly")
+
+    media_type, ext = FORMATS[fmt]
+    chunks = _WRITERS[fmt](headers, _rows(stmt))
+    response_headers = {
+        "Content-Disposition": f'attachment; filename="{filename}-{date.today().isoformat()}.{ext}"'
+    }
+    if gzip:
+        chunks = _gzip(chunks)
+        response_headers["Content-Encoding"] = "gzip"
+
+    body = _guarded(chunks, slot)
+    # a stream that never starts (client gone before the first chunk) still frees its slot
+    weakref.finalize(body, slot.release)
+    return StreamingResponse(body, media_type=media_type, headers=response_headers)
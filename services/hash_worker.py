@@ -0,0 +1,22 @@
+"""bcrypt work that runs inside the hashing process pool, keep imports light, spawned workers import this"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=4)
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_password(password: str, password_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash when the stored one was made with a different cost)"""
+    try:
+        return _context(rounds).verify_and_update(password, password_hash)
+    except (ValueError, TypeError):
+        return False, None
@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Assets, Departments, KpiSnapshot, MaintenanceRequests, AssetTransfers, AssetDisposals,
+    AssetStatus, MaintenanceStatus, TransferStatus,
+)
+from ..database import JobSessionLocal
+from . import report_aggregates as agg
+
+
+# only stops two workers writing the same night at once
+KPI_LOCK_KEY = 780414
+
+SCOPES = ("all", "entity", "department")
+INTERVALS = ("day", "week", "month")
+
+KPI_FIELDS = (
+    "total_assets", "total_value", "operational_count", "under_maintenance", "attention_count",
+    "unassigned_count", "acquired_30d", "maintenance_requests_30d", "overdue_maintenance",
+    "disposals_30d", "pending_transfers",
+)
+
+# every kpi query groups the same way, by the owning department n its entity type
+DIMS = {"department": Assets.department_id, "entity": Departments.entity_type}
+
+
+def _scoped(total, breakdown, out: Dict[Tuple[str, str], Dict[str, Any]]):
+    """fold one grouped() result into {(scope, scope_id): {kpi: value}}"""
+    out.setdefault(("all", ""), {}).update(total)
+    for dept_id, values in breakdown["department"].items():
+        if dept_id is not None:
+            out.setdefault(("department", dept_id), {}).update(values)
+    for entity, values in breakdown["entity"].items():
+        if entity is not None:
+            out.setdefault(("entity", entity.name), {}).update(values)
+
+
+def compute_kpis(db: Session, today: Optional[date] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """every scope's kpis from the live tables, four grouping sets queries whatever the number of departments"""
+    today = today or date.today()
+    since = datetime.combine(today - timedelta(days=30), datetime.min.time())
+    out: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    _scoped(*agg.grouped(
+        db, DIMS, agg.asset_filters(),
+        measures={
+            "total_assets": agg.BASE_MEASURES["count"],
+            "total_value": agg.BASE_MEASURES["value"],
+            "operational_count": agg.count_where(Assets.status == AssetStatus.OPERATIONAL),
+            "under_maintenance": agg.count_where(Assets.status == AssetStatus.UNDER_MAINTENANCE),
+            # the exec alert never counted under maintenance, unlike agg.attention_clause
+            "attention_count": agg.count_where(
+                Assets.condition.in_(agg.ATTENTION_CONDITIONS)
+                | Assets.status.in_([AssetStatus.IMPAIRED, AssetStatus.LOST_STOLEN])
+            ),
+            "unassigned_count": agg.count_where(Assets.responsible_officer_id.is_(None)),
+            "acquired_30d": agg.count_where(Assets.acquisition_date >= since.date()),
+        },
+        joins=[agg.DEPARTMENT_JOIN],
+    ), out)
+
+    overdue = MaintenanceRequests.status.in_([MaintenanceStatus.SCHEDULED, MaintenanceStatus.APPROVED]) & (
+        MaintenanceRequests.maintenance_date < today
+    )
+    recent = MaintenanceRequests.request_date >= since
+    _scoped(*agg.grouped(
+        db, DIMS, [recent | overdue],
+        measures={
+            "maintenance_requests_30d": func.count(MaintenanceRequests.id).filter(recent),
+            "overdue_maintenance": func.count(MaintenanceRequests.id).filter(overdue),
+        },
+        joins=[(Assets, Assets.id == MaintenanceRequests.asset_id), agg.DEPARTMENT_JOIN],
+        source=MaintenanceRequests,
+    ), out)
+
+    _scoped(*agg.grouped(
+        db, DIMS, [AssetDisposals.disposal_date >= since.date()],
+        measures={"disposals_30d": func.count(AssetDisposals.id)},
+        joins=[(Assets, Assets.id == AssetDisposals.asset_id), agg.DEPARTMENT_JOIN],
+        source=AssetDisposals,
+    ), out)
+
+    _scoped(*agg.grouped(
+        db, DIMS, [AssetTransfers.status.in_([TransferStatus.INITIATED, TransferStatus.PENDING])],
+        measures={"pending_transfers": func.count(AssetTransfers.id)},
+        joins=[(Assets, Assets.id == AssetTransfers.asset_id), agg.DEPARTMENT_JOIN],
+        source=AssetTransfers,
+    ), out)
+
+    return {key: {f: values.get(f, 0) for f in KPI_FIELDS} for key, values in out.items()}
+
+
+def write_kpi_snapshot(db: Optional[Session] = None, day: Optional[date] = None) -> Optional[int]:
+    """scheduled nightly, replaces the day's rows in one transaction, returns rows written (None when skipped)"""
+    own = db is None
+    db = db or JobSessionLocal()
+    day = day or datetime.now(timezone.utc).date()
+    try:
+        got_lock = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": KPI_LOCK_KEY}).scalar()
+        if not got_lock:
+            db.rollback()
+            return None
+
+        rows = [
+            {"scope": scope, "scope_id": scope_id, "snapshot_date": day, **values}
+            for (scope, scope_id), values in sorted(compute_kpis(db, day).items())
+        ]
+        db.execute(delete(KpiSnapshot).where(KpiSnapshot.snapshot_date == day))
+        db.execute(insert(KpiSnapshot), rows)
+        db.commit()
+        return len(rows)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ kpi snapshot failed: {e}")
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+# ---- read side ----
+
+def _as_dict(row: KpiSnapshot) -> Dict[str, Any]:
+    return {"snapshot_date": row.snapshot_date, **{f: getattr(row, f) for f in KPI_FIELDS}}
+
+
+def operational_pct(kpis: Dict[str, Any]) -> float:
+    """share of the register operational, 2dp, for a snapshot or live kpis dict"""
+    return round(kpis["operational_count"] / kpis["total_assets"] * 100, 2) if kpis["total_assets"] else 0
+
+
+def latest_kpis(db: Session, scope: str = "all", scope_id: str = "", as_of: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """newest snapshot for a scope (on or before as_of), one pk index probe"""
+    stmt = select(KpiSnapshot).where(KpiSnapshot.scope == scope, KpiSnapshot.scope_id == scope_id)
+    if as_of is not None:
+        stmt = stmt.where(KpiSnapshot.snapshot_date <= as_of)
+    row = db.execute(stmt.order_by(KpiSnapshot.snapshot_date.desc()).limit(1)).scalar_one_or_none()
+    return _as_dict(row) if row is not None else None
+
+
+def kpi_trend(db: Session, scope: str, scope_id: str, since: date, interval: str = "month") -> List[Dict[str, Any]]:
+    """last snapshot in each day/week/month from since on, oldest first, a pk range scan"""
+    bucket = func.date_trunc(interval, KpiSnapshot.snapshot_date)
+    rows = db.execute(
+        select(KpiSnapshot)
+        .where(
+            KpiSnapshot.scope == scope,
+            KpiSnapshot.scope_id == scope_id,
+            KpiSnapshot.snapshot_date >= since,
+        )
+        .order_by(bucket, KpiSnapshot.snapshot_date.desc())
+        .distinct(bucket)
+    ).scalars().all()
+    return [_as_dict(row) for row in rows]
@@ -1,10 +1,59 @@
 import json
 import os
+import re
+from functools import lru_cache
 from typing import List, Optional
 from fastapi import HTTPException
 import requests
 from ..schemas.location import *
 
+def normalize_county_key(name: str) -> str:
+    """murang'a, Muranga, murang_a -> muranga"""
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+@lru_cache(maxsize=1)
+def _county_code_map() -> dict:
+    fpath = os.path.join(os.path.dirname(__file__),"counties.json")
+    with open(fpath, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    codes = {}
+    for county in data:
+        code = str(county["county_code"])
+        codes[normalize_county_key(county["county_name"])] = code
+        codes[code] = code
+    return codes
+
+def county_code_for(identifier) -> Optional[str]:
+    """county code (as str) from a county name or code, None if unknown"""
+    if identifier is None or identifier == "":
+        return None
+    key = normalize_county_key(identifier)
+    if key.isdigit():
+        key = str(int(key))
+    return _county_code_map().get(key)
+
+@lru_cache(maxsize=1)
+def _county_name_map() -> dict:
+    fpath = os.path.join(os.path.dirname(__file__),"counties.json")
+    with open(fpath, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return {str(county["county_code"]): county["county_name"] for county in data}
+
+def county_name_for(code) -> Optional[str]:
+    """county name from its code, None if unknown"""
+    if code is None or code == "":
+        return None
+    return _county_name_map().get(str(code))
+
+def county_code_from_location(location) -> Optional[str]:
+    """county code out of a stored location json, handles the older flat shapes too"""
+    if not isinstance(location, dict):
+        return None
+    admin = location.get("administrative_location") or location.get("administrative") or {}
+    county = (admin.get("county") if isinstance(admin, dict) else None) or location.get("county") or location.get("county_name")
+    return county_code_for(county)
+
+
 class LocationService:
     def __init__(self):
         self.counties_data = self._load_counties_data()
@@ -1,185 +1,449 @@
 import asyncio
+import io
+import itertools
+import json
+import os
+import random
+import threading
 import time
-from typing import List, Optional
+import uuid
+from collections import deque
 from contextlib import asynccontextmanager
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import psycopg2
 from fastapi import FastAPI
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 
-from ..models import ActivityLog
-from ..database import SessionLocal
+from ..database import job_engine
 from ..schemas.main import LogLevel, ActionType
+from ..system_vars import (LOG_BUFFER_CAPACITY, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_HIGH_WATER,
+                           LOG_BUSY_SAMPLE_EVERY, LOG_BACKPRESSURE_TIMEOUT, LOG_SPILL_DIR, LOG_ACTION_SAMPLE_RATES)
+
+COPY_COLUMNS = ("id", "user_id", "action", "target_table", "target_id", "logg_level", "details", "created_at")
+COPY_SQL = f"COPY activity_logs ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+REPLAY_SQL = (
+    "CREATE TEMP TABLE activity_logs_replay (LIKE activity_logs INCLUDING DEFAULTS) ON COMMIT DROP",
+    f"COPY activity_logs_replay ({', '.join(COPY_COLUMNS)}) FROM STDIN",
+    f"INSERT INTO activity_logs ({', '.join(COPY_COLUMNS)}) SELECT {', '.join(COPY_COLUMNS)} FROM activity_logs_replay ON CONFLICT (id) DO NOTHING",
+)
+
+# under pressure (n for per action sampling) these get sampled, the rest are always kept
+SAMPLED_LEVELS = {LogLevel.DEBUG, LogLevel.INFO}
+
+
+def _copy_field(value) -> str:
+    """one field in postgres COPY text format"""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _copy_buffer(rows: List[dict]) -> io.StringIO:
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_field(row[col]) for col in COPY_COLUMNS))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+def _is_outage(e: Exception) -> bool:
+    """db unreachable, as opposed to a bad row"""
+    if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeoutError, OSError)):
+        return True
+    return isinstance(e, DBAPIError) and isinstance(e.orig, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+# buffered entry, kept raw until the writer thread turns it into a row:
+# (user_id, action, target_table, target_id, details, level, monotonic ts)
+def make_log_row(entry: tuple, wall_offset: float) -> dict:
+    user_id, action, target_table, target_id, details, level, mono_ts = entry
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(user_id) if user_id else None,
+        "action": action.value if isinstance(action, ActionType) else action,
+        "target_table": target_table,
+        "target_id": str(target_id) if target_id is not None else None,
+        "logg_level": level.value if isinstance(level, LogLevel) else level,
+        "details": json.dumps(details, default=str) if details is not None else None,
+        "created_at": datetime.fromtimestamp(mono_ts + wall_offset, tz=timezone.utc).isoformat(),
+    }
+
+def _keep_sampled(action, level) -> bool:
+    rate = LOG_ACTION_SAMPLE_RATES.get(action)
+    if rate is None or level not in SAMPLED_LEVELS:
+        return True
+    return random.random() < rate
+
+
+class ActivityLogWriter:
+    """activity_logs writer: bounded ring buffer -> COPY batches from a writer thread
+
+    past the high water mark debug/info rows are sampled, a full buffer makes async
+    callers wait up to LOG_BACKPRESSURE_TIMEOUT before the row goes straight to the
+    spill file. batches that fail while the db is down are appended to the spill file
+    (ndjson) n replayed idempotently once a write succeeds again
+    """
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float, high_water: int,
+                 busy_sample_every: int, backpressure_timeout: float, spill_dir: str):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_water = high_water
+        self.busy_sample_every = max(1, busy_sample_every)
+        self.backpressure_timeout = backpressure_timeout
+        self.spill_path = os.path.join(spill_dir, "activity_logs.ndjson")
+        self.replay_path = self.spill_path + ".replaying"
+
+        self.ring = deque()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.spill_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._busy_counter = itertools.count()
+
+        self.wall_offset = time.time() - time.monotonic()
+        self.db_healthy = True
+        self.retry_at = 0.0
+        self.backoff = 1.0
 
-# Global variables
-log_buffer: List[dict] = []
-buffer_lock = asyncio.Lock()
-BATCH_SIZE = 50
-MAX_WAIT = 5.0  # 5 seconds
-_background_task: Optional[asyncio.Task] = None
-_shutdown_event = asyncio.Event()
-
-class LoggingService:
-    def __init__(self):
-        self.buffer: List[dict] = []
-        self.last_flush = time.time()
-        self.lock = asyncio.Lock()
-        self.running = True
-        
-    async def enqueue_log(
-        self,
-        user_id, 
-        action: ActionType, 
-        target_table=None, 
-        target_id=None, 
-        details=None, 
-        level: LogLevel = LogLevel.INFO
-    ):
-        """Add log entry to buffer"""
-        log_data = {
-            "user_id": str(user_id) if user_id else None,
-            "action": action.value,
-            "target_table": target_table,
-            "target_id": target_id,
-            "log_level": level.value,
-            "details": details,
-            "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        async with self.lock:
-            self.buffer.append(log_data)
-            
-            # Check if we should flush immediately
-            if len(self.buffer) >= BATCH_SIZE:
-                await self._flush_buffer()
-    
-    async def _flush_buffer(self):
-        """Internal method to flush buffer to database"""
-        if not self.buffer:
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.sampled_out = 0
+        self.action_sampled_out = 0
+        self.dropped_full = 0
+        self.backpressure_waits = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected_rows = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.lost = 0
+        self.depth_peak = 0
+        self.last_error = None
+        self.last_flush_ms = 0.0
+
+    def _count(self, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    # -------- producers
+
+    def offer(self, entry: tuple) -> bool:
+        """non blocking n lock free (deque append + plain counters), False only when the ring is full
+
+        counters bumped here are not locked, under heavy threading they may undercount slightly
+        """
+        depth = len(self.ring)
+        if depth >= self.capacity:
+            return False
+        if depth >= self.high_water and entry[5] in SAMPLED_LEVELS:
+            if next(self._busy_counter) % self.busy_sample_every:
+                self.sampled_out += 1
+                return True
+        self.ring.append(entry)
+        self.accepted += 1
+        if depth + 1 > self.depth_peak:
+            self.depth_peak = depth + 1
+        if depth + 1 >= self.batch_size and not self.wakeup.is_set():
+            self.wakeup.set()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        return True
+
+    def offer_nowait(self, entry: tuple) -> bool:
+        if self.offer(entry):
+            return True
+        self.dropped_full += 1
+        return False
+
+    async def put(self, entry: tuple):
+        if self.offer(entry):
             return
-            
-        buffer_copy = self.buffer.copy()
-        self.buffer.clear()
-        self.last_flush = time.time()
-        
-        # Run database operation in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._flush_to_db_sync, buffer_copy)
-    
-    def _flush_to_db_sync(self, buffer: List[dict]):
-        """Synchronous database flush (runs in thread pool)"""
-        if not buffer:
+        self._count(backpressure_waits=1)
+        self.wakeup.set()
+        deadline = time.monotonic() + self.backpressure_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+            if self.offer(entry):
+                return
+        await asyncio.to_thread(self._spill, [make_log_row(entry, self.wall_offset)])
+
+    def put_sync(self, entry: tuple):
+        if self.offer(entry):
             return
-            
-        db: Session = SessionLocal()
+        self._count(backpressure_waits=1)
+        self.wakeup.set()
+        deadline = time.monotonic() + self.backpressure_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            if self.offer(entry):
+                return
+        self._spill([make_log_row(entry, self.wall_offset)])
+
+    # -------- writer thread
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 15.0):
+        """drain what is buffered then stop, leftovers end up in the spill file"""
+        self.stopping.set()
+        self.wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        print("🚀 Activity log writer started")
+        self._replay()
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self._drain()
+            # replay doubles as the probe while the db is marked down
+            if self.db_healthy or time.monotonic() >= self.retry_at:
+                self._replay()
+            if self.stopping.is_set():
+                self._drain()
+                break
+        print("✅ Activity log writer stopped")
+
+    def _drain(self):
+        # monotonic -> wall clock, refreshed each drain so clock corrections are picked up
+        self.wall_offset = time.time() - time.monotonic()
+        while self.ring:
+            batch = []
+            while self.ring and len(batch) < self.batch_size:
+                batch.append(make_log_row(self.ring.popleft(), self.wall_offset))
+            self._write(batch)
+
+    def _copy(self, rows: List[dict], idempotent: bool = False):
+        raw = job_engine.raw_connection()
         try:
-            # Convert string values back to enums for database insertion
-            for log_entry in buffer:
-                log_entry["action"] = ActionType(log_entry["action"])
-                log_entry["log_level"] = LogLevel(log_entry["log_level"])
-                
-            db.bulk_insert_mappings(ActivityLog, buffer)
-            db.commit()
-            print(f"✅ Inserted {len(buffer)} logs to database")
-        except Exception as e:
-            db.rollback()
-            print(f"❌ Error inserting logs to database: {e}")
+            cur = raw.cursor()
+            if idempotent:
+                cur.execute(REPLAY_SQL[0])
+                cur.copy_expert(REPLAY_SQL[1], _copy_buffer(rows))
+                cur.execute(REPLAY_SQL[2])
+            else:
+                cur.copy_expert(COPY_SQL, _copy_buffer(rows))
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
         finally:
-            db.close()
-    
-    async def background_flush_task(self):
-        """Background task that flushes buffer periodically"""
-        print("🚀 Background logging task started")
-        
-        while self.running:
+            raw.close()
+
+    def _write(self, batch: List[dict]):
+        if not self.db_healthy and time.monotonic() < self.retry_at:
+            self._spill(batch)
+            return
+        started = time.perf_counter()
+        try:
+            self._copy(batch)
+        except Exception as e:
+            self.last_error = str(e)[:300]
+            self._count(failed_batches=1)
+            if _is_outage(e):
+                if self.db_healthy:
+                    print(f"❌ Activity log db write failed, spilling to {self.spill_path}: {e}")
+                self.db_healthy = False
+                self.retry_at = time.monotonic() + self.backoff
+                self.backoff = min(self.backoff * 2, 60.0)
+                self._spill(batch)
+            else:
+                # a bad row (fk, bad value) must not sink the whole batch
+                self._write_one_by_one(batch)
+            return
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+        self._count(written=len(batch), batches=1)
+        if not self.db_healthy:
+            print("✅ Activity log db back, replaying spill file")
+        self.db_healthy = True
+        self.backoff = 1.0
+
+    def _write_one_by_one(self, batch: List[dict]):
+        for row in batch:
             try:
-                await asyncio.sleep(1)  # Check every second
-                
-                current_time = time.time()
-                async with self.lock:
-                    # Flush if we have logs and enough time has passed
-                    if self.buffer and (current_time - self.last_flush >= MAX_WAIT):
-                        await self._flush_buffer()
-                        
-            except asyncio.CancelledError:
-                print("📝 Background logging task cancelled")
-                break
+                self._copy([row])
+                self._count(written=1)
+            except Exception as e:
+                if _is_outage(e):
+                    self._spill([row])
+                else:
+                    self._count(rejected_rows=1)
+                    print(f"❌ Activity log row rejected: {e}")
+
+    def _spill(self, rows: List[dict]):
+        try:
+            with self.spill_lock:
+                os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row))
+                        f.write("\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._count(spilled=len(rows))
+        except OSError as e:
+            self._count(lost=len(rows))
+            print(f"❌ Activity log spill failed, {len(rows)} logs lost: {e}")
+
+    def _replay(self):
+        """push spilled rows back, ON CONFLICT makes a replay after a crash mid way harmless"""
+        with self.spill_lock:
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, self.replay_path)
+        try:
+            batch = []
+            with open(self.replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        self._count(lost=1)
+                        continue
+                    if len(batch) >= self.batch_size:
+                        self._replay_batch(batch)
+                        batch = []
+            if batch:
+                self._replay_batch(batch)
+            os.remove(self.replay_path)
+            self.db_healthy = True
+            self.backoff = 1.0
+        except Exception as e:
+            # only outages get here (or the file cant be read), bad rows are dropped in _replay_batch
+            self.last_error = str(e)[:300]
+            self.db_healthy = False
+            self.retry_at = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, 60.0)
+            print(f"❌ Activity log replay stopped, will retry: {e}")
+
+    def _replay_batch(self, batch: List[dict]):
+        """one spilled batch back in, outages raise so the file is kept for the next try
+        a bad row (fk, bad value) is dropped as rejected, it would fail the same way on every retry"""
+        try:
+            self._copy(batch, idempotent=True)
+            self._count(replayed=len(batch))
+            return
+        except Exception as e:
+            if _is_outage(e):
+                raise
+        for row in batch:
+            try:
+                self._copy([row], idempotent=True)
+                self._count(replayed=1)
             except Exception as e:
-                print(f"❌ Error in background flush task: {e}")
-                await asyncio.sleep(1)
-        
-        # Final flush on shutdown
-        async with self.lock:
-            if self.buffer:
-                print("🔄 Final flush on shutdown...")
-                await self._flush_buffer()
-        
-        print("✅ Background logging task completed")
-    
-    async def shutdown(self):
-        """Graceful shutdown"""
-        self.running = False
-
-# Global logging service instance
-logging_service = LoggingService()
+                if _is_outage(e):
+                    raise
+                self._count(rejected_rows=1)
+                print(f"❌ Activity log replayed row rejected: {e}")
+
+    def stats(self) -> dict:
+        with self.lock:
+            data = {
+                "buffer_depth": len(self.ring),
+                "buffer_depth_peak": self.depth_peak,
+                "capacity": self.capacity,
+                "high_water": self.high_water,
+                "accepted": self.accepted,
+                "written": self.written,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "backpressure_waits": self.backpressure_waits,
+                "sampled_out": self.sampled_out,
+                "action_sampled_out": self.action_sampled_out,
+                "dropped_full": self.dropped_full,
+                "rejected_rows": self.rejected_rows,
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "lost": self.lost,
+                "db_healthy": self.db_healthy,
+                "last_flush_ms": self.last_flush_ms,
+                "last_error": self.last_error,
+            }
+        data["spill_pending_bytes"] = sum(os.path.getsize(p) for p in (self.spill_path, self.replay_path) if os.path.exists(p))
+        return data
+
+
+# Global writer instance
+log_writer = ActivityLogWriter(
+    capacity=LOG_BUFFER_CAPACITY,
+    batch_size=LOG_BATCH_SIZE,
+    flush_interval=LOG_FLUSH_INTERVAL,
+    high_water=LOG_HIGH_WATER,
+    busy_sample_every=LOG_BUSY_SAMPLE_EVERY,
+    backpressure_timeout=LOG_BACKPRESSURE_TIMEOUT,
+    spill_dir=LOG_SPILL_DIR,
+)
 
 # Public API functions
 async def enqueue_log(
-    user_id, 
-    action: ActionType, 
-    target_table=None, 
-    target_id=None, 
-    details=None, 
+    user_id,
+    action: ActionType,
+    target_table=None,
+    target_id=None,
+    details=None,
     level: LogLevel = LogLevel.INFO
 ):
-    """Public function to enqueue a log entry"""
-    await logging_service.enqueue_log(
-        user_id, action, target_table, target_id, details, level
-    )
+    """Public function to enqueue a log entry, waits briefly when the buffer is full"""
+    if not _keep_sampled(action, level):
+        log_writer.action_sampled_out += 1
+        return
+    await log_writer.put((user_id, action, target_table, target_id, details, level, time.monotonic()))
+
+def enqueue_log_nowait(
+    user_id,
+    action: ActionType,
+    target_table=None,
+    target_id=None,
+    details=None,
+    level: LogLevel = LogLevel.INFO
+) -> bool:
+    """fire n forget, never waits or flushes on the caller. False if it was sampled out or the buffer was full"""
+    if not _keep_sampled(action, level):
+        log_writer.action_sampled_out += 1
+        return False
+    return log_writer.offer_nowait((user_id, action, target_table, target_id, details, level, time.monotonic()))
 
 # FastAPI Lifespan Context Manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan context manager for startup/shutdown"""
-    # Startup
     print("🚀 Starting logging service...")
-    background_task = asyncio.create_task(logging_service.background_flush_task())
-    
+    log_writer.start()
+
     yield  # Application runs here
-    
-    # Shutdown
+
     print("🛑 Shutting down logging service...")
-    await logging_service.shutdown()
-    background_task.cancel()
-    
-    try:
-        await background_task
-    except asyncio.CancelledError:
-        pass
-    
+    await asyncio.to_thread(log_writer.stop)
     print("✅ Logging service shutdown complete")
 
 # Alternative: If you prefer the old @app.on_event style
 def setup_background_logging(app: FastAPI):
     """Alternative setup function for older FastAPI versions"""
-    global _background_task
-    
+
     @app.on_event("startup")
     async def startup_event():
-        global _background_task
         print("🚀 Starting background logging...")
-        _background_task = asyncio.create_task(logging_service.background_flush_task())
-    
+        log_writer.start()
+
     @app.on_event("shutdown")
     async def shutdown_event():
-        global _background_task
         print("🛑 Shutting down background logging...")
-        await logging_service.shutdown()
-        
-        if _background_task:
-            _background_task.cancel()
-            try:
-                await _background_task
-            except asyncio.CancelledError:
-                pass
-        
+        await asyncio.to_thread(log_writer.stop)
         print("✅ Background logging shutdown complete")
-
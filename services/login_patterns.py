@@ -0,0 +1,186 @@
+"""failed login pattern queries over login_attempts, all windowing done in postgres
+each one is bounded by the date range n walks the partial (key, timestamp) indexes on failures"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import LoginAttempt
+
+
+# the keys a burst can be detected on
+BURST_KEYS = {
+    "email": LoginAttempt.email,
+    "ip_address": LoginAttempt.ip_address,
+    "fingerprint": LoginAttempt.fingerprint_hash,
+}
+
+
+def time_filters(date_from: Optional[datetime], date_to: Optional[datetime]) -> List[Any]:
+    clauses = []
+    if date_from:
+        clauses.append(LoginAttempt.timestamp >= date_from)
+    if date_to:
+        clauses.append(LoginAttempt.timestamp <= date_to)
+    return clauses
+
+
+def failure_filters(date_from: Optional[datetime], date_to: Optional[datetime]) -> List[Any]:
+    return [LoginAttempt.success == False, *time_filters(date_from, date_to)]
+
+
+def _minutes(span) -> float:
+    return round(span.total_seconds() / 60, 2) if span is not None else None
+
+
+def failures_by_email(db: Session, filters: Sequence[Any], excessive: int, limit: int) -> Dict[str, Any]:
+    """top emails by failures plus the totals, window aggregates over the grouped rows so its one query"""
+    per_email = (
+        select(
+            LoginAttempt.email,
+            func.count(LoginAttempt.id).label("failures"),
+            func.max(LoginAttempt.timestamp).label("last_attempt"),
+        )
+        .where(*filters)
+        .group_by(LoginAttempt.email)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            per_email.c.email,
+            per_email.c.failures,
+            per_email.c.last_attempt,
+            func.count().over().label("emails"),
+            func.sum(per_email.c.failures).over().label("attempts"),
+            func.count().filter(per_email.c.failures > excessive).over().label("excessive"),
+        )
+        .order_by(per_email.c.failures.desc(), per_email.c.email)
+        .limit(limit)
+    ).all()
+    first = rows[0] if rows else None
+    return {
+        "total_attempts": int(first.attempts) if first else 0,
+        "unique_emails": first.emails if first else 0,
+        "excessive_emails": first.excessive if first else 0,
+        "rows": [{"email": r.email, "failure_count": r.failures, "last_attempt": r.last_attempt} for r in rows],
+    }
+
+
+def latest_attempts(db: Session, filters: Sequence[Any], emails: Sequence[str], per_email: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """newest few failures for each of the given emails, row_number per email"""
+    if not emails:
+        return {}
+    rn = func.row_number().over(partition_by=LoginAttempt.email, order_by=LoginAttempt.timestamp.desc())
+    inner = (
+        select(
+            LoginAttempt.email, LoginAttempt.timestamp, LoginAttempt.ip_address,
+            LoginAttempt.failure_reason, LoginAttempt.browser, LoginAttempt.os,
+            rn.label("rn"),
+        )
+        .where(*filters, LoginAttempt.email.in_(emails))
+        .subquery()
+    )
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for r in db.execute(select(inner).where(inner.c.rn <= per_email).order_by(inner.c.email, inner.c.rn)):
+        out.setdefault(r.email, []).append({
+            "timestamp": r.timestamp,
+            "details": {
+                "ip_address": r.ip_address,
+                "failure_reason": r.failure_reason,
+                "browser": r.browser,
+                "os": r.os,
+            },
+        })
+    return out
+
+
+def bursts(
+    db: Session,
+    key: str,
+    filters: Sequence[Any],
+    window: timedelta,
+    threshold: int,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """keys with threshold failures inside window at some point, sliding not bucketed
+    lag(timestamp, threshold - 1) is the attempt threshold-1 back, so each row knows how long its last
+    threshold attempts took, a burst is any row where that span fits the window"""
+    col = BURST_KEYS[key]
+    order = LoginAttempt.timestamp
+    inner = (
+        select(
+            col.label("key"),
+            order.label("ts"),
+            (order - func.lag(order, threshold - 1).over(partition_by=col, order_by=order)).label("span"),
+            func.count().over(partition_by=col).label("failures"),
+        )
+        .where(*filters, col.isnot(None))
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            inner.c.key,
+            func.max(inner.c.failures).label("failures"),
+            func.count().label("burst_windows"),
+            func.min(inner.c.span).label("tightest"),
+            func.min(inner.c.ts).label("first_burst_at"),
+            func.max(inner.c.ts).label("last_burst_at"),
+        )
+        .where(inner.c.span <= window)
+        .group_by(inner.c.key)
+        .order_by(func.count().desc(), inner.c.key)
+        .limit(limit)
+    ).all()
+    return [
+        {
+            key: r.key,
+            "count": r.failures,
+            "burst_windows": r.burst_windows,
+            "time_window_minutes": _minutes(r.tightest),
+            "first_burst_at": r.first_burst_at,
+            "last_burst_at": r.last_burst_at,
+        }
+        for r in rows
+    ]
+
+
+def ip_fanout(
+    db: Session,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    min_accounts: int,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """ips failing against many different accounts, with any successes from the same ip (stuffing that worked)"""
+    failed = LoginAttempt.success == False
+    filters = time_filters(date_from, date_to)  # both outcomes, split with FILTER below
+    accounts = func.count(func.distinct(LoginAttempt.email)).filter(failed)
+    rows = db.execute(
+        select(
+            LoginAttempt.ip_address,
+            accounts.label("accounts"),
+            func.count().filter(failed).label("failures"),
+            func.count().filter(LoginAttempt.success == True).label("successes"),
+            func.count(func.distinct(LoginAttempt.fingerprint_hash)).label("fingerprints"),
+            func.min(LoginAttempt.timestamp).label("first_attempt"),
+            func.max(LoginAttempt.timestamp).label("last_attempt"),
+        )
+        .where(*filters)
+        .group_by(LoginAttempt.ip_address)
+        .having(accounts >= min_accounts)
+        .order_by(accounts.desc(), LoginAttempt.ip_address)
+        .limit(limit)
+    ).all()
+    return [
+        {
+            "ip_address": r.ip_address,
+            "accounts_targeted": r.accounts,
+            "failures": r.failures,
+            "successes": r.successes,
+            "fingerprints": r.fingerprints,
+            "first_attempt": r.first_attempt,
+            "last_attempt": r.last_attempt,
+        }
+        for r in rows
+    ]
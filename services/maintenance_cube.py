@@ -0,0 +1,182 @@
+"""maintenance cost aggregates done in sql, the cost reports make a fixed number of queries
+whatever the number of requests n never touch req.asset"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, literal_column, null, select
+from sqlalchemy.orm import Session
+
+from ..models import Assets, MaintenanceRequests
+from . import report_aggregates as agg
+
+
+COST = func.coalesce(MaintenanceRequests.cost, 0)
+
+# the cube axes, keys are what ?dims= takes n what the cells are keyed by
+CUBE_DIMS = {
+    "maintenance_type": MaintenanceRequests.maintenance_type,
+    "issue_category": MaintenanceRequests.issue_category,
+    "asset_category": Assets.category,
+    "department": Assets.department_id,
+    # literal_column, no bind params so the same sql text can sit in select n group by
+    "month": func.to_char(
+        func.date_trunc(literal_column("'month'"), MaintenanceRequests.request_date), literal_column("'YYYY-MM'")
+    ),
+}
+
+COST_MEASURES = {
+    "count": func.count(MaintenanceRequests.id),
+    "total_cost": func.sum(COST),
+}
+
+ASSET_JOIN = (Assets, Assets.id == MaintenanceRequests.asset_id)
+
+
+def maintenance_filters(
+    department_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    *extra,
+) -> List[Any]:
+    """request_date range n owning department, the filters every maintenance report takes"""
+    clauses = []
+    if department_id:
+        clauses.append(Assets.department_id == department_id)
+    if date_from:
+        clauses.append(MaintenanceRequests.request_date >= date_from)
+    if date_to:
+        clauses.append(MaintenanceRequests.request_date <= date_to)
+    clauses.extend(extra)
+    return clauses
+
+
+def costed() -> Any:
+    return MaintenanceRequests.cost.isnot(None)
+
+
+def grouped(db: Session, dims: Dict[str, Any], filters: Iterable[Any], measures: Optional[Dict[str, Any]] = None):
+    """agg.grouped over maintenance_requests with the asset joined, one GROUPING SETS query"""
+    return agg.grouped(
+        db, dims, filters,
+        measures=measures or COST_MEASURES,
+        joins=[ASSET_JOIN],
+        source=MaintenanceRequests,
+    )
+
+
+def cost_buckets(buckets: Dict[Any, Dict[str, Any]], default=None) -> Dict[Any, Dict[str, Any]]:
+    """{key: {count, total_cost, avg_cost}} with enum keys flattened, the shape the cost reports return"""
+    out = {}
+    for key, data in buckets.items():
+        count, total = data["count"], Decimal(data["total_cost"])
+        out[agg.enum_key(key, default)] = {
+            "count": count,
+            "total_cost": float(total),
+            "avg_cost": float(total / count) if count else 0,
+        }
+    return out
+
+
+def cube_cells(db: Session, dims: Sequence[str], filters: Iterable[Any]) -> List[Dict[str, Any]]:
+    """one row per combination of the chosen axes that has requests, biggest cost first"""
+    exprs = [CUBE_DIMS[d].label(d) for d in dims]
+    stmt = (
+        select(*exprs, *(m.label(n) for n, m in COST_MEASURES.items()))
+        .select_from(MaintenanceRequests)
+        .outerjoin(*ASSET_JOIN)
+        .where(*filters)
+        .group_by(*(CUBE_DIMS[d] for d in dims))
+        .order_by(func.sum(COST).desc())
+    )
+    cells = []
+    for row in db.execute(stmt):
+        m = row._mapping
+        count, total = m["count"], Decimal(m["total_cost"] or 0)
+        cells.append({
+            **{d: agg.enum_key(m[d], "unknown") for d in dims},
+            "count": count,
+            "total_cost": float(total),
+            "avg_cost": float(total / count) if count else 0,
+        })
+    return cells
+
+
+def top_requests(db: Session, filters: Iterable[Any], limit: int = 10) -> List[Dict[str, Any]]:
+    """the most expensive requests with the asset description joined in"""
+    stmt = (
+        select(
+            MaintenanceRequests.id, MaintenanceRequests.asset_id, Assets.description,
+            MaintenanceRequests.cost, MaintenanceRequests.maintenance_type,
+            MaintenanceRequests.request_date, MaintenanceRequests.completed_at,
+        )
+        .select_from(MaintenanceRequests)
+        .outerjoin(*ASSET_JOIN)
+        .where(*filters)
+        .order_by(MaintenanceRequests.cost.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            "id": r.id,
+            "asset_id": r.asset_id,
+            "asset_description": r.description,
+            "cost": float(r.cost or 0),
+            "maintenance_type": r.maintenance_type.value,
+            "request_date": r.request_date,
+            "completed_at": r.completed_at
+        }
+        for r in db.execute(stmt)
+    ]
+
+
+def top_assets(
+    db: Session,
+    filters: Iterable[Any],
+    limit: int = 10,
+    partition=None,
+    order_by: str = "total_cost",
+    having=None,
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """per asset totals, the top n overall or per partition (an Assets column, row_number over the grouped rows)
+    returns {partition key: [assets]}, the key is None when not partitioned"""
+    per_asset = (
+        select(
+            MaintenanceRequests.asset_id,
+            func.count(MaintenanceRequests.id).label("count"),
+            func.sum(COST).label("total_cost"),
+        )
+        .select_from(MaintenanceRequests)
+        .outerjoin(*ASSET_JOIN)
+        .where(*filters)
+        .group_by(MaintenanceRequests.asset_id)
+    )
+    if having is not None:
+        per_asset = per_asset.having(having)
+    per_asset = per_asset.subquery()
+
+    rn = func.row_number().over(partition_by=partition, order_by=(per_asset.c[order_by].desc(), per_asset.c.asset_id))
+    inner = (
+        select(
+            (partition if partition is not None else null()).label("bucket"),
+            per_asset.c.asset_id, per_asset.c.count, per_asset.c.total_cost,
+            Assets.description, Assets.tag_number,
+            rn.label("rn"),
+        )
+        .select_from(per_asset)
+        .join(Assets, Assets.id == per_asset.c.asset_id)
+        .subquery()
+    )
+
+    out: Dict[Any, List[Dict[str, Any]]] = {}
+    for r in db.execute(select(inner).where(inner.c.rn <= limit).order_by(inner.c.bucket, inner.c.rn)):
+        total = Decimal(r.total_cost or 0)
+        out.setdefault(r.bucket, []).append({
+            "asset_id": r.asset_id,
+            "asset_description": r.description,
+            "asset_tag": r.tag_number,
+            "total_maintenance_cost": float(total),
+            "maintenance_count": r.count,
+            "avg_cost_per_maintenance": float(total / r.count) if r.count else 0,
+        })
+    return out
@@ -0,0 +1,212 @@
+"""nightly net book value recompute, current_value for every depreciable asset revalued with the
+depreciation engine n written back chunk by chunk with UPDATE .. FROM (VALUES ..)
+each chunk is one short transaction that locks at most a chunk of rows n skips any already locked
+(those get a second pass at the end), the run row moves forward in the same transaction so the
+retry job resumes a crashed run where it stopped"""
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Numeric, String, column, select, text, values
+from sqlalchemy.orm import Session
+
+from ..models import Assets, AssetStatus, NbvRecomputeRun, NbvRunStatus
+from ..database import job_engine
+from . import depreciation
+from .asset_rollups import rebuild_rollups
+
+
+# held for the whole run, a second worker starting the job just returns
+NBV_LOCK_KEY = 780415
+
+# tries the retry job gives an unfinished run before leaving it for the next nightly pass
+MAX_ATTEMPTS = 5
+
+ASSETS = Assets.__table__
+
+
+def _filters() -> List[Any]:
+    return [
+        Assets.is_deleted == False,
+        Assets.acquisition_cost > 0,
+        Assets.status != AssetStatus.DISPOSED,
+        Assets.disposal_date.is_(None),
+        depreciation.depreciable_clause(),
+    ]
+
+
+def _claim_run(db: Session, as_of: date, resume_only: bool = False) -> Optional[NbvRecomputeRun]:
+    """the run to work on, called holding the advisory lock so a RUNNING row here is one that crashed
+    resume_only (the retry job) picks up the newest unfinished run with its own as_of, None when there is none
+    the nightly run starts a fresh pass n closes off anything unfinished, the fresh pass covers it"""
+    unfinished = db.execute(
+        select(NbvRecomputeRun)
+        .where(NbvRecomputeRun.status.in_([NbvRunStatus.RUNNING, NbvRunStatus.FAILED]))
+        .order_by(NbvRecomputeRun.started_at.desc())
+    ).scalars().all()
+    run = None
+    if resume_only:
+        run = next((old for old in unfinished if old.attempts < MAX_ATTEMPTS), None)
+        if run is None:
+            return None
+    for old in unfinished:
+        if old is not run:
+            old.status = NbvRunStatus.FAILED
+            old.attempts = MAX_ATTEMPTS  # retry job leaves it alone
+            old.error = old.error or "abandoned, superseded by a later run"
+    if run is None:
+        run = NbvRecomputeRun(as_of=as_of, status=NbvRunStatus.RUNNING, last_asset_id="", skipped_ids=[])
+        db.add(run)
+    run.status = NbvRunStatus.RUNNING
+    run.attempts = (run.attempts or 0) + 1
+    run.error = None
+    db.commit()
+    return run
+
+
+def _revalue(db: Session, run: NbvRecomputeRun, ids: Sequence[str]) -> List[str]:
+    """lock n revalue the given assets, returns the ids someone else had locked (not waited on)"""
+    ids = db.execute(select(Assets.id).where(Assets.id.in_(ids), *_filters())).scalars().all()
+    if not ids:
+        return []
+    rows = db.execute(
+        select(Assets.id, Assets.current_value, *depreciation.INPUT_COLUMNS)
+        .where(Assets.id.in_(ids))
+        .with_for_update(skip_locked=True)
+    ).all()
+    nbv = depreciation.depreciate(rows, run.as_of)["net_book_value"]
+
+    changed = [(r.id, new) for r, new in zip(rows, nbv) if r.current_value != new]
+    if changed:
+        v = values(column("id", String), column("nbv", Numeric(18, 2)), name="v").data(changed)
+        db.execute(
+            ASSETS.update()
+            .where(ASSETS.c.id == v.c.id)
+            .values(current_value=v.c.nbv, updated_at=ASSETS.c.updated_at)  # a revaluation isnt an edit
+        )
+        old = {r.id: r.current_value or Decimal(0) for r in rows}
+        run.value_change += sum(new - old[asset_id] for asset_id, new in changed)
+
+    run.assets_scanned += len(rows)
+    run.assets_updated += len(changed)
+    locked = {r.id for r in rows}
+    return [asset_id for asset_id in ids if asset_id not in locked]
+
+
+def _set_skipped(run: NbvRecomputeRun, skipped: List[str]):
+    run.skipped_ids = skipped  # new list, the json column only notices reassignment
+    run.assets_skipped = len(skipped)
+
+
+def _chunk(db: Session, run: NbvRecomputeRun, batch: int) -> Optional[int]:
+    """revalue the next batch of assets after run.last_asset_id, None once there are none left"""
+    ids = db.execute(
+        select(Assets.id).where(*_filters(), Assets.id > run.last_asset_id).order_by(Assets.id).limit(batch)
+    ).scalars().all()
+    if not ids:
+        return None
+
+    skipped = _revalue(db, run, ids)
+    _set_skipped(run, [*(run.skipped_ids or []), *skipped])
+    run.last_asset_id = ids[-1]
+    run.chunks += 1
+    db.commit()
+    return len(ids)
+
+
+def _retry_skipped(db: Session, run: NbvRecomputeRun, batch: int):
+    """second pass over the rows that were locked first time round, whatever is still locked stays
+    skipped n gets picked up by the next run"""
+    pending = list(run.skipped_ids or [])
+    still = []
+    for i in range(0, len(pending), batch):
+        still += _revalue(db, run, pending[i:i + batch])
+        _set_skipped(run, still + pending[i + batch:])
+        db.commit()
+
+
+def recompute_nbv(
+    batch: int = 1000,
+    pause_ms: int = 0,
+    as_of: Optional[date] = None,
+    resume_only: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """scheduled nightly (fresh pass) n every few minutes with resume_only (carries on an unfinished run)
+    returns the run summary, None when another worker has the job or there was nothing to resume"""
+    as_of = as_of or datetime.now(timezone.utc).date()
+    started = time.monotonic()
+    # one connection for the whole run so the session level advisory lock stays ours across commits
+    with job_engine.connect() as conn:
+        got_lock = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": NBV_LOCK_KEY}).scalar()
+        conn.commit()
+        if not got_lock:
+            return None
+
+        db = Session(bind=conn, autoflush=False)
+        run = None
+        try:
+            run = _claim_run(db, as_of, resume_only)
+            if run is None:
+                return None
+            while _chunk(db, run, batch) is not None:
+                if pause_ms:
+                    time.sleep(pause_ms / 1000)
+            if run.skipped_ids:
+                _retry_skipped(db, run, batch)
+
+            run.status = NbvRunStatus.DONE
+            run.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            summary = run_summary(run)
+            print(f"💰 nbv recompute updated {run.assets_updated} of {run.assets_scanned} assets in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            db.rollback()
+            if run is not None:
+                # progress up to the last committed chunk stays, the retry job carries on from there
+                run.status = NbvRunStatus.FAILED
+                run.error = str(e)[:2000]
+                db.commit()
+            print(f"⚠️ nbv recompute failed: {e}")
+            raise
+        finally:
+            db.close()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": NBV_LOCK_KEY})
+            conn.commit()
+
+    # the bulk update skips the orm so the rollup deltas never saw it, rebuild once at the end
+    if summary["assets_updated"]:
+        rebuild_rollups()
+    return summary
+
+
+def resume_nbv(batch: int = 1000, pause_ms: int = 0) -> Optional[Dict[str, Any]]:
+    """the retry job, at boot n every few minutes, finishes a run that crashed or failed"""
+    return recompute_nbv(batch, pause_ms, resume_only=True)
+
+
+# ---- read side ----
+
+def run_summary(run: NbvRecomputeRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "as_of": run.as_of,
+        "status": run.status.value,
+        "chunks": run.chunks,
+        "assets_scanned": run.assets_scanned,
+        "assets_updated": run.assets_updated,
+        "assets_skipped": run.assets_skipped,
+        "attempts": run.attempts,
+        "value_change": float(run.value_change or 0),
+        "resume_after": run.last_asset_id or None,
+        "error": run.error,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+    }
+
+
+def recent_runs(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(NbvRecomputeRun).order_by(NbvRecomputeRun.started_at.desc()).limit(limit)
+    ).scalars().all()
+    return [run_summary(run) for run in rows]
@@ -0,0 +1,176 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from . import hash_worker
+from ..system_vars import BCRYPT_ROUNDS, HASH_POOL_WORKERS, HASH_MAX_CONCURRENCY, HASH_MAX_QUEUE
+
+
+class PasswordHasher:
+    """bcrypt off the event loop, in a process pool
+
+    at most max_concurrency hashes run at once, callers past that wait in line,
+    n once max_queue are waiting new calls get a 503 instead of piling up
+    """
+    def __init__(self, rounds: int, workers: int, max_concurrency: int, max_queue: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.waiting_peak = 0
+        self.running = 0
+        self.hashes = 0
+        self.verifies = 0
+        self.rehashes = 0
+        self.rejected = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.work_total = 0.0
+        self.work_max = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # spawn, forking a process with db pools n monitor threads is not safe
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _enter_queue(self):
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+            self.waiting += 1
+            self.waiting_peak = max(self.waiting_peak, self.waiting)
+
+    def _start(self, queued_at: float) -> float:
+        started = time.perf_counter()
+        waited = started - queued_at
+        with self.lock:
+            self.waiting -= 1
+            self.running += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return started
+
+    def _finish(self, started: float, kind: str, ok: bool):
+        took = time.perf_counter() - started
+        with self.lock:
+            self.running -= 1
+            self.work_total += took
+            self.work_max = max(self.work_max, took)
+            if kind == "hash":
+                self.hashes += 1
+            else:
+                self.verifies += 1
+            if not ok:
+                self.failures += 1
+
+    def _abandon(self):
+        with self.lock:
+            self.waiting -= 1
+
+    async def _run_async(self, kind: str, fn, *args):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        self._enter_queue()
+        queued_at = time.perf_counter()
+        try:
+            await self._async_slots.acquire()
+        except BaseException:
+            self._abandon()
+            raise
+        started = self._start(queued_at)
+        ok = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+            ok = True
+            return result
+        finally:
+            self._finish(started, kind, ok)
+            self._async_slots.release()
+
+    def _run_sync(self, kind: str, fn, *args):
+        self._enter_queue()
+        queued_at = time.perf_counter()
+        self._sync_slots.acquire()
+        started = self._start(queued_at)
+        ok = False
+        try:
+            result = self._pool().submit(fn, *args).result()
+            ok = True
+            return result
+        finally:
+            self._finish(started, kind, ok)
+            self._sync_slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run_async("hash", hash_worker.hash_password, password, self.rounds)
+
+    async def verify(self, password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """(matches, new hash to store if the cost changed since it was made)"""
+        if not password_hash:
+            return False, None
+        ok, new_hash = await self._run_async("verify", hash_worker.verify_password, password, password_hash, self.rounds)
+        if new_hash:
+            with self.lock:
+                self.rehashes += 1
+        return ok, new_hash
+
+    def hash_sync(self, password: str) -> str:
+        """for def routes, they already run in a worker thread"""
+        return self._run_sync("hash", hash_worker.hash_password, password, self.rounds)
+
+    def verify_sync(self, password: str, password_hash: Optional[str]) -> Tuple[bool, Optional[str]]:
+        if not password_hash:
+            return False, None
+        ok, new_hash = self._run_sync("verify", hash_worker.verify_password, password, password_hash, self.rounds)
+        if new_hash:
+            with self.lock:
+                self.rehashes += 1
+        return ok, new_hash
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self.lock:
+            done = self.hashes + self.verifies
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_depth": self.waiting,
+                "queue_depth_peak": self.waiting_peak,
+                "running": self.running,
+                "hashes": self.hashes,
+                "verifies": self.verifies,
+                "rehashes": self.rehashes,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "wait_avg_ms": round(self.wait_total / done * 1000, 2) if done else 0,
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+                "work_avg_ms": round(self.work_total / done * 1000, 2) if done else 0,
+                "work_max_ms": round(self.work_max * 1000, 2),
+            }
+
+
+password_hasher = PasswordHasher(BCRYPT_ROUNDS, HASH_POOL_WORKERS, HASH_MAX_CONCURRENCY, HASH_MAX_QUEUE)
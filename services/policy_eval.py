@@ -1,9 +1,18 @@
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable
+from sqlalchemy import event
 from sqlalchemy.orm import Session, Query
 from fastapi import HTTPException
+import hashlib
 import logging
-from ..models import ABACPolicy, User, Role, Assets
-from ..system_vars import sys_logger,debugging
+import json
+import operator
+import threading
+import time
+from collections import OrderedDict
+from ..models import ABACPolicy, PolicyEffect, User, Role, Assets
+from ..database import SessionLocal
+from .location_service import county_code_for, county_code_from_location
+from ..system_vars import sys_logger,debugging, ABAC_INDEX_TTL_SECONDS
 from ..services.logger_queue import enqueue_log
 from ..schemas.main import  ActionType, LogLevel
 
@@ -11,7 +20,8 @@ logger = logging.getLogger(__name__)
 
 def get_user_perms(db: Session, id: Optional[str] = None, user: Optional[User] = None):
     def get_u_p(user: User):
-        role_perms = db.query(Role).filter(Role.id == user.role_id).first()
+        # role is preloaded on current_user, only other users hit the db here
+        role_perms = user.role
         
         if not role_perms:
             raise HTTPException(status_code=404, detail="Not Assigned role")
@@ -56,7 +66,6 @@ def get_default_scope(user: User) -> Dict:
 #             merged[key] = value
     
 #     return merged
-import json
 def get_merged_scope(user: User) -> dict:
     default = get_default_scope(user)
     if not user.access_scope:
@@ -97,46 +106,99 @@ def check_role_permission(user, action: str) -> Tuple[bool, str]:
     
     return False, f"Action '{action}' not permitted"
 
+class CompiledScope:
+    """merged scope of one user resolved into sets/thresholds, reused across many resources"""
+    def __init__(self, user):
+        scope = get_merged_scope(user)
+        self.own_department = user.department_id
+        deps = scope.get("departments", [])
+        self.departments = frozenset(deps) if deps and "*" not in deps else None
+        counties = scope.get("geographic", [])
+        # scope may hold names (default scope) or codes, both resolve to county codes
+        self.counties = frozenset(filter(None, (county_code_for(c) for c in counties))) if counties else None
+        cats = scope.get("asset_categories", [])
+        self.categories = frozenset(cats) if cats and "*" not in cats else None
+
+        value_limits = scope.get("value_limits", {})
+        self.creation_threshold = value_limits.get("creation_threshold")
+        self.approval_threshold = value_limits.get("approval_threshold")
+
+        # stable hash of what this scope can see, users with the same reach share cached reports
+        self.fingerprint = hashlib.sha1(repr((
+            self.own_department,
+            sorted(self.departments) if self.departments is not None else "*",
+            sorted(self.counties) if self.counties is not None else "*",
+            sorted(self.categories) if self.categories is not None else "*",
+        )).encode()).hexdigest()[:16]
+
+    def check(self, resource: Optional[Dict], action: Optional[str] = None) -> Tuple[bool, str]:
+        if not resource:
+            return True, "No resource to check scope against"
+
+        department = resource.get("department")
+        if department and department != self.own_department and self.departments is not None:
+            if department not in self.departments:
+                return False, f"Department access denied: {department}"
+        # Geo
+        if self.counties is not None and (resource.get("county_code") or resource.get("county")):
+            code = resource.get("county_code") or county_code_for(resource["county"])
+            if code not in self.counties:
+                return False, f"Geographic access denied for county: {resource.get('county') or code}"
+
+        if resource.get("category") and self.categories is not None:
+            if resource["category"] not in self.categories:
+                return False, f"Asset category access denied: {resource['category']}"
+
+        if resource.get("value") and action:
+            if "create" in action and self.creation_threshold and resource["value"] > self.creation_threshold:
+                return False, f"Value {resource['value']} exceeds creation threshold {self.creation_threshold}"
+            if "approve" in action and self.approval_threshold and resource["value"] > self.approval_threshold:
+                return False, f"Value {resource['value']} exceeds approval threshold {self.approval_threshold}"
+
+        return True, "Within access scope"
+
+    def apply(self, query, model=Assets):
+        """same scope as sql predicates on indexed columns, works on Query n select()"""
+        if self.departments is not None:
+            query = query.filter(model.department_id.in_(self.departments))
+        if self.counties is not None:
+            query = query.filter(model.county_code.in_(self.counties))
+        if self.categories is not None:
+            query = query.filter(model.category.in_(self.categories))
+        return query
+
+
+_scope_cache: "OrderedDict[tuple, CompiledScope]" = OrderedDict()
+_scope_cache_lock = threading.Lock()
+SCOPE_CACHE_MAX = 2000
+
+def _scope_cache_key(user) -> tuple:
+    # everything get_merged_scope reads, a changed user gets a new key so nothing goes stale
+    access_scope = user.access_scope
+    if not isinstance(access_scope, str):
+        access_scope = json.dumps(access_scope, sort_keys=True, default=str)
+    return (user.id, user.department_id, user.county_code, access_scope)
+
+def get_compiled_scope(user) -> CompiledScope:
+    """CompiledScope for the user, cached per user + scope inputs"""
+    key = _scope_cache_key(user)
+    with _scope_cache_lock:
+        compiled = _scope_cache.get(key)
+        if compiled is not None:
+            _scope_cache.move_to_end(key)
+            return compiled
+    compiled = CompiledScope(user)
+    with _scope_cache_lock:
+        _scope_cache[key] = compiled
+        while len(_scope_cache) > SCOPE_CACHE_MAX:
+            _scope_cache.popitem(last=False)
+    return compiled
+
 def check_access_scope(user, resource: Optional[Dict] = None, action: str = None) -> Tuple[bool, str]:
     """ 2: Check user's access scope"""
     if not resource:
         return True, "No resource to check scope against"
-    
-    scope = get_merged_scope(user)
-
-    if resource.get("department") and resource["department"] != user.department_id:
-        allowed_deps = scope.get("departments", [])
-        if allowed_deps and "*" not in allowed_deps:
-            if resource["department"] not in allowed_deps:
-                return False, f"Department access denied: {resource['department']}"
-    # Geo
-    if resource.get("county"):
-        allowed_counties = scope.get("geographic", [])
-        if allowed_counties:
-            resource_county = resource["county"].lower().replace(" ", "_")
-            if resource_county not in allowed_counties:
-                return False, f"Geographic access denied for county: {resource['county']}"
-    
-    if resource.get("category"):
-        allowed_categories = scope.get("asset_categories", [])
-        if allowed_categories and "*" not in allowed_categories:
-            if resource["category"] not in allowed_categories:
-                return False, f"Asset category access denied: {resource['category']}"
-    
-    if resource.get("value"):
-        value_limits = scope.get("value_limits", {})
-        
-        if action and "create" in action:
-            threshold = value_limits.get("creation_threshold")
-            if threshold and resource["value"] > threshold:
-                return False, f"Value {resource['value']} exceeds creation threshold {threshold}"
-        
-        if action and "approve" in action:
-            threshold = value_limits.get("approval_threshold")
-            if threshold and resource["value"] > threshold:
-                return False, f"Value {resource['value']} exceeds approval threshold {threshold}"
-    
-    return True, "Within access scope"
+    return get_compiled_scope(user).check(resource, action)
 
 def matches_user_attributes(user, policy_user_attrs: Dict) -> bool:
     """Check if user matches the policy's user attribute requirements"""
@@ -201,43 +263,201 @@ def matches_resource_attributes(resource: Optional[Dict], policy_resource_attrs:
     
     return True
 
-def evaluate_abac_policies(user, action: str, resource: Optional[Dict], db: Session) -> Tuple[str, Optional[str]]:
-    applicable_policies = (
-        db.query(ABACPolicy).filter(
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "==": operator.eq,
+}
+
+_MISSING = object()
+
+def _user_attr_getter(attr_name: str):
+    def get(user):
+        if hasattr(user, attr_name):
+            return getattr(user, attr_name)
+        # Computed attributes
+        if attr_name == "roles":
+            return [user.role.name] if user.role else []
+        return _MISSING
+    return get
+
+def _compile_user_attributes(attrs: Dict) -> List[Callable]:
+    """one closure per attribute, same rules as matches_user_attributes"""
+    preds = []
+    for attr_name, required_value in (attrs or {}).items():
+        get = _user_attr_getter(attr_name)
+        if isinstance(required_value, list):
+            required = tuple(required_value)
+            def pred(user, get=get, required=required):
+                user_value = get(user)
+                if user_value is _MISSING:
+                    return False
+                if isinstance(user_value, list):
+                    return any(val in required for val in user_value)
+                return user_value in required
+        else:
+            def pred(user, get=get, required=required_value):
+                user_value = get(user)
+                return user_value is not _MISSING and user_value == required
+        preds.append(pred)
+    return preds
+
+def _compile_resource_attributes(attrs: Dict) -> List[Callable]:
+    """one closure per attribute/operator, same rules as matches_resource_attributes"""
+    preds = []
+    for attr_name, required_value in (attrs or {}).items():
+        if isinstance(required_value, dict):
+            checks = tuple((_OPERATORS[op], threshold) for op, threshold in required_value.items() if op in _OPERATORS)
+            def pred(resource, key=attr_name, checks=checks):
+                if key not in resource:
+                    return False
+                value = resource[key]
+                return all(op(value, threshold) for op, threshold in checks)
+        elif isinstance(required_value, list):
+            required = tuple(required_value)
+            def pred(resource, key=attr_name, required=required):
+                return key in resource and resource[key] in required
+        else:
+            def pred(resource, key=attr_name, required=required_value):
+                return key in resource and resource[key] == required
+        preds.append(pred)
+    return preds
+
+
+class CompiledPolicy:
+    __slots__ = ("id", "description", "is_deny", "priority", "user_preds", "resource_preds")
+
+    def __init__(self, policy: ABACPolicy):
+        self.id = policy.id
+        self.description = policy.description
+        self.is_deny = policy.effect == PolicyEffect.DENY
+        self.priority = policy.priority
+        self.user_preds = _compile_user_attributes(policy.user_attributes)
+        self.resource_preds = _compile_resource_attributes(policy.resource_attributes)
 
-            ABACPolicy.is_active == True,
-            ABACPolicy.action_names.contains([action]) 
-        ).order_by(ABACPolicy.priority.desc()).all()
+    def matches_user(self, user) -> bool:
+        return all(pred(user) for pred in self.user_preds)
+
+    def matches_resource(self, resource: Optional[Dict]) -> bool:
+        if not resource:
+            return not self.resource_preds
+        return all(pred(resource) for pred in self.resource_preds)
+
+
+class PolicyIndex:
+    """action -> active policies, highest priority first. immutable once built"""
+    def __init__(self, policies: List[ABACPolicy], version: int):
+        by_action: Dict[str, List[CompiledPolicy]] = {}
+        for policy in policies:
+            compiled = CompiledPolicy(policy)
+            for action in policy.action_names or []:
+                by_action.setdefault(action, []).append(compiled)
+        self.by_action = {a: tuple(sorted(ps, key=lambda p: (-p.priority, p.id))) for a, ps in by_action.items()}
+        self.version = version
+        self.policy_count = len(policies)
+        self.loaded_at = time.monotonic()
+
+    def for_action(self, action: str) -> Tuple[CompiledPolicy, ...]:
+        return self.by_action.get(action, ())
+
+
+_policy_version = 0
+_policy_index: Optional[PolicyIndex] = None
+_policy_index_lock = threading.Lock()
+
+def bump_policy_version():
+    """mark the compiled index stale, next check rebuilds it"""
+    global _policy_version
+    with _policy_index_lock:
+        _policy_version += 1
+
+def _index_is_fresh(index: Optional[PolicyIndex]) -> bool:
+    return (
+        index is not None
+        and index.version == _policy_version
+        and time.monotonic() - index.loaded_at < ABAC_INDEX_TTL_SECONDS
     )
+
+def get_policy_index(db: Optional[Session] = None) -> PolicyIndex:
+    """current compiled index, rebuilt when the version moved or the ttl ran out"""
+    global _policy_index
+    index = _policy_index
+    if _index_is_fresh(index):
+        return index
+
+    with _policy_index_lock:
+        index = _policy_index
+        if _index_is_fresh(index):
+            return index
+        version = _policy_version
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            policies = db.query(ABACPolicy).filter(ABACPolicy.is_active == True).all()
+            index = PolicyIndex(policies, version)
+        finally:
+            if own_session:
+                db.close()
+        _policy_index = index  # swap in one assignment, readers never see a half built index
+        return index
+
+def policy_index_stats() -> dict:
+    index = _policy_index
+    return {
+        "version": _policy_version,
+        "loaded_version": index.version if index else None,
+        "policies": index.policy_count if index else 0,
+        "actions": len(index.by_action) if index else 0,
+        "age_seconds": round(time.monotonic() - index.loaded_at, 1) if index else None,
+        "ttl_seconds": ABAC_INDEX_TTL_SECONDS,
+    }
+
+# policy rows written through the orm bump the version once the txn commits
+@event.listens_for(Session, "after_flush")
+def _collect_policy_changes(session, flush_context):
+    if any(isinstance(obj, ABACPolicy) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info["abac_policies_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _apply_policy_changes(session):
+    if session.info.pop("abac_policies_changed", False):
+        bump_policy_version()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_policy_changes(session):
+    session.info.pop("abac_policies_changed", None)
+
+
+def _decide_policies(policies, user, action: str, resource: Optional[Dict]) -> Tuple[str, Optional[str]]:
+    """policies already matched on the user, priority ordered"""
+    allow_policy = None
     
-    deny_policies = []
-    allow_policies = []
-    
-    for policy in applicable_policies:
-        if not matches_user_attributes(user, policy.user_attributes):
-            continue
-        
-        if not matches_resource_attributes(resource, policy.resource_attributes):
+    for policy in policies:
+        if not policy.matches_resource(resource):
             continue
             
-        if policy.effect.value == "DENY":
-            deny_policies.append(policy)
-        else:
-            allow_policies.append(policy)
-    
-    # DENY policies override ALLOW policies
-    if deny_policies:
-        policy = deny_policies[0]  # Highest priority deny
-        logger.warning(f"DENY policy {policy.id} matched for user {user.id}, action {action}")
-        return "DENY", f"Policy denied: {policy.description}"
+        # DENY policies override ALLOW policies, list is priority ordered so first deny is the highest
+        if policy.is_deny:
+            logger.warning(f"DENY policy {policy.id} matched for user {user.id}, action {action}")
+            return "DENY", f"Policy denied: {policy.description}"
+        if allow_policy is None:
+            allow_policy = policy
     
-    if allow_policies:
-        policy = allow_policies[0]  # Highest priority allow
-        logger.info(f"ALLOW policy {policy.id} matched for user {user.id}, action {action}")
-        return "ALLOW", f"Policy allowed: {policy.description}"
+    if allow_policy:
+        logger.info(f"ALLOW policy {allow_policy.id} matched for user {user.id}, action {action}")
+        return "ALLOW", f"Policy allowed: {allow_policy.description}"
 
     return "ALLOW", "No policy restrictions"
 
+def _user_policies(user, action: str, db: Optional[Session]) -> List[CompiledPolicy]:
+    return [p for p in get_policy_index(db).for_action(action) if p.matches_user(user)]
+
+def evaluate_abac_policies(user, action: str, resource: Optional[Dict], db: Session) -> Tuple[str, Optional[str]]:
+    return _decide_policies(_user_policies(user, action, db), user, action, resource)
+
 def check_full_permission(user, resource_type: str, action: str, db: Session,
                       resource: Optional[Dict] = None) -> bool:
     """Main checker that combines all three layers"""
@@ -283,34 +503,59 @@ def check_full_permission(user, resource_type: str, action: str, db: Session,
     #         detail=f"Internal error during permission check :  {str(e)}"
     #     )
 
+def _resource_key(resource: Dict) -> tuple:
+    return tuple(sorted(resource.items()))
+
+def evaluate_batch_permissions(user, resource_type: str, action: str, items, db: Optional[Session] = None,
+                               key: Optional[Callable] = None) -> List[Tuple[bool, str]]:
+    """rbac + scope + abac over many resources, one (allowed, reason) per item in order
+
+    items are Assets rows or resource dicts. role, merged scope n user side policy matching
+    are done once for the batch, n identical resources (same dept/county/category/value/status)
+    are only decided once. never raises on deny
+    """
+    items = list(items)
+    full_action = f"{resource_type}.{action}"
+
+    role_allowed, role_reason = check_role_permission(user, full_action)
+    if not role_allowed:
+        return [(False, f"Role: {role_reason}")] * len(items)
+
+    scope = get_compiled_scope(user)
+    policies = _user_policies(user, full_action, db)
+    to_resource = key or (lambda item: item if isinstance(item, dict) else build_asset_resource(item))
+
+    decided: Dict[tuple, Tuple[bool, str]] = {}
+    results = []
+    for item in items:
+        resource = to_resource(item)
+        rkey = _resource_key(resource) if resource else ()
+        decision = decided.get(rkey)
+        if decision is None:
+            scope_allowed, scope_reason = scope.check(resource, full_action)
+            if not scope_allowed:
+                decision = (False, f"Scope: {scope_reason}")
+            else:
+                effect, policy_reason = _decide_policies(policies, user, full_action, resource)
+                decision = (effect != "DENY", f"Policy: {policy_reason}")
+            decided[rkey] = decision
+        results.append(decision)
+    return results
+
+def filter_permitted(user, resource_type: str, action: str, items, db: Optional[Session] = None) -> List:
+    """only the items the user may perform action on"""
+    items = list(items)
+    decisions = evaluate_batch_permissions(user, resource_type, action, items, db)
+    return [item for item, (allowed, _) in zip(items, decisions) if allowed]
+
 def check_simple_permission(user, resource_type: str, action: str) -> bool:
     full_action = f"{resource_type}.{action}"
     role_allowed, _ = check_role_permission(user, full_action)
     return role_allowed
 
 def apply_scope_filter(db: Session, query: Query, user: User, resource_type: str) -> Query:
-    scope = get_merged_scope(user)
-    
     if resource_type == "asset":
-        # Department filtering - skip if user can access all departments
-        allowed_deps = scope.get("departments", [])
-        if allowed_deps and "*" not in allowed_deps:
-            query = query.filter(Assets.department_id.in_(allowed_deps))
-        
-        # Geo filtering
-        allowed_counties = scope.get("geographic", [])
-        if allowed_counties:
-            county_filters = []
-            for county in allowed_counties:
-                county_filter = Assets.location.op('->>')('county_name').ilike(f'%{county}%')
-                county_filters.append(county_filter)
-            if county_filters:
-                query = query.filter(db.or_(*county_filters))
-        
-        # Category filtering
-        allowed_categories = scope.get("asset_categories", [])
-        if allowed_categories and "*" not in allowed_categories:
-            query = query.filter(Assets.category.in_(allowed_categories))
+        query = get_compiled_scope(user).apply(query, Assets)
     
     return query
 
@@ -323,11 +568,9 @@ def build_asset_resource(asset: Assets) -> Dict:
         "status": asset.status.value if asset.status else None
     }
     
-    # Extract county from asset location
-    if asset.location and isinstance(asset.location, dict):
-        county_name = asset.location.get("county_name")
-        if county_name:
-            resource["county"] = county_name.lower().replace(" ", "_")
+    county_code = asset.county_code or county_code_from_location(asset.location)
+    if county_code:
+        resource["county_code"] = county_code
     
     return resource
 
@@ -0,0 +1,169 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from ..models import User, Role
+from ..system_vars import PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES
+
+
+def _detached_copy(obj):
+    """column only copy of a loaded orm obj, detached so any session can merge it without sql"""
+    mapper = inspect(obj).mapper
+    clone = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        value = getattr(obj, attr.key)
+        if isinstance(value, (dict, list)):
+            value = copy.deepcopy(value)
+        set_committed_value(clone, attr.key, value)
+    make_transient_to_detached(clone)
+    return clone
+
+
+class Principal:
+    """cached auth state for one token (jti)"""
+    __slots__ = ("user_id", "role_id", "user", "token_valid", "expires_at")
+
+    def __init__(self, user_id: str, expires_at: float):
+        self.user_id = user_id
+        self.role_id = None
+        self.user = None
+        self.token_valid = False
+        self.expires_at = expires_at
+
+    def set_user(self, user: User):
+        snap = _detached_copy(user)
+        role = _detached_copy(user.role) if user.role else None
+        set_committed_value(snap, "role", role)
+        self.user = snap
+        self.role_id = user.role_id
+
+
+class PrincipalCache:
+    """TTL + LRU cache of principals keyed by jti
+
+    in process only, so with several workers a change made through another
+    worker shows up here after at most PRINCIPAL_CACHE_TTL_SECONDS
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self.by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, jti: str):
+        entry = self.entries.pop(jti, None)
+        if entry is None:
+            return
+        jtis = self.by_user.get(entry.user_id)
+        if jtis:
+            jtis.discard(jti)
+            if not jtis:
+                del self.by_user[entry.user_id]
+
+    def get(self, jti: str) -> Optional[Principal]:
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._drop(jti)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(jti)
+            self.hits += 1
+            return entry
+
+    def entry_for(self, jti: str, user_id: str, token_exp: Optional[float] = None) -> Principal:
+        """existing live entry for jti or a fresh one, never outlives the token itself"""
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        if token_exp:
+            expires_at = min(expires_at, now + max(token_exp - time.time(), 0))
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry is not None and entry.expires_at > now and entry.user_id == user_id:
+                return entry
+            self._drop(jti)
+            entry = Principal(user_id, expires_at)
+            self.entries[jti] = entry
+            self.by_user.setdefault(user_id, set()).add(jti)
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+                self.evictions += 1
+            return entry
+
+    def invalidate_user(self, user_id: str):
+        with self.lock:
+            for jti in list(self.by_user.get(str(user_id), ())):
+                self._drop(jti)
+            self.invalidations += 1
+
+    def invalidate_role(self, role_id: str):
+        with self.lock:
+            for jti in [j for j, e in self.entries.items() if e.role_id == role_id]:
+                self._drop(jti)
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_user.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "users": len(self.by_user),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+# any committed change to a user or role row drops the cached principals for it,
+# covers status changes, role/perm edits n profile updates without touching each route
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    changed = session.info.setdefault("principal_changes", {"users": set(), "roles": set()})
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed["users"].add(str(obj.id))
+        elif isinstance(obj, Role):
+            changed["roles"].add(str(obj.id))
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_changes(session):
+    changed = session.info.pop("principal_changes", None)
+    if not changed:
+        return
+    for user_id in changed["users"]:
+        principal_cache.invalidate_user(user_id)
+    for role_id in changed["roles"]:
+        principal_cache.invalidate_role(role_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop("principal_changes", None)
@@ -0,0 +1,184 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Numeric, String, case, cast, func, literal, literal_column, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import Assets, Departments, AssetStatus, AssetCondition
+
+
+# what every report calls the value of an asset, `current_value or acquisition_cost or 0` in sql
+# (nullif keeps the python truthiness, a 0 nbv still falls back to cost)
+ASSET_VALUE = func.coalesce(func.nullif(Assets.current_value, 0), Assets.acquisition_cost, 0)
+
+# location->>'county', no bind params so the same sql text can sit in select n group by
+LOCATION_COUNTY = Assets.location.op("->>", return_type=String)(literal_column("'county'"))
+
+BASE_MEASURES = {
+    "count": func.count(Assets.id),
+    "value": func.sum(ASSET_VALUE),
+}
+
+ATTENTION_CONDITIONS = (AssetCondition.POOR, AssetCondition.FAIR)
+ATTENTION_STATUSES = (AssetStatus.UNDER_MAINTENANCE, AssetStatus.IMPAIRED, AssetStatus.LOST_STOLEN)
+
+AGE_BRACKETS = ("0-1 years", "1-3 years", "3-5 years", "5-10 years", "10+ years")
+
+DEPARTMENT_JOIN = (Departments, Departments.dept_id == Assets.department_id)
+
+
+def asset_filters(
+    department_id: Optional[str] = None,
+    category: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    *extra,
+) -> List[Any]:
+    """the where clauses shared by the asset reports, non deleted plus the usual query params"""
+    clauses = [Assets.is_deleted == False]
+    if department_id:
+        clauses.append(Assets.department_id == department_id)
+    if category:
+        clauses.append(Assets.category == category)
+    if date_from:
+        clauses.append(Assets.acquisition_date >= date_from)
+    if date_to:
+        clauses.append(Assets.acquisition_date <= date_to)
+    clauses.extend(extra)
+    return clauses
+
+
+def count_where(*conditions):
+    """count(*) filter (where ..) measure"""
+    return func.count(Assets.id).filter(*conditions)
+
+
+def attention_clause():
+    """poor/fair condition or a problem status, what the reports flag as needing attention"""
+    return Assets.condition.in_(ATTENTION_CONDITIONS) | Assets.status.in_(ATTENTION_STATUSES)
+
+
+def age_years(today: Optional[date] = None):
+    """asset age in years from acquisition_date, same 365.25 the python side used"""
+    today = today or date.today()
+    return cast(literal(today) - Assets.acquisition_date, Numeric) / 365.25
+
+
+def age_bracket(today: Optional[date] = None):
+    age = age_years(today)
+    return case(
+        (age < 1, AGE_BRACKETS[0]),
+        (age < 3, AGE_BRACKETS[1]),
+        (age < 5, AGE_BRACKETS[2]),
+        (age < 10, AGE_BRACKETS[3]),
+        else_=AGE_BRACKETS[4],
+    )
+
+
+def _as_number(value):
+    return 0 if value is None else value
+
+
+def _bucket(row, measures: Sequence[str]) -> Dict[str, Any]:
+    return {name: _as_number(getattr(row, name)) for name in measures}
+
+
+def grouped(
+    db: Session,
+    dims: Dict[str, Any],
+    filters: Iterable[Any],
+    measures: Optional[Dict[str, Any]] = None,
+    joins: Sequence[Tuple[Any, Any]] = (),
+    with_total: bool = True,
+    source=Assets,
+    having=None,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[Any, Dict[str, Any]]]]:
+    """one pass over assets (or the rollups, see source), a GROUPING SETS entry per dim plus the grand total
+    returns (totals, {dim: {key: {measure: value}}}), keys come back raw (enums, None for nulls)"""
+    measures = measures or BASE_MEASURES
+    names = list(dims)
+    exprs = [dims[n] for n in names]
+
+    cols = [m.label(n) for n, m in measures.items()]
+    if exprs:
+        gid = func.grouping(*exprs).label("gid")
+        cols = [gid, *[e.label(f"d_{i}") for i, e in enumerate(exprs)], *cols]
+
+    stmt = select(*cols).select_from(source)
+    for target, onclause in joins:
+        stmt = stmt.outerjoin(target, onclause)
+    stmt = stmt.where(*filters)
+
+    if exprs:
+        sets = [tuple_(e) for e in exprs]
+        if with_total:
+            sets.append(tuple_())
+        stmt = stmt.group_by(func.grouping_sets(*sets))
+        if having is not None:
+            stmt = stmt.having(having)
+
+    # grouping() sets a bit per aggregated away arg, leftmost arg is the high bit
+    all_bits = (1 << len(exprs)) - 1
+    owner = {all_bits ^ (1 << (len(exprs) - 1 - i)): i for i in range(len(exprs))}
+
+    total = {n: 0 for n in measures}
+    breakdown = {n: {} for n in names}
+    for row in db.execute(stmt):
+        if not exprs or row.gid == all_bits:
+            total = _bucket(row, measures)
+            continue
+        i = owner.get(row.gid)
+        if i is None:
+            continue
+        breakdown[names[i]][getattr(row, f"d_{i}")] = _bucket(row, measures)
+    return total, breakdown
+
+
+def totals(db: Session, filters: Iterable[Any], measures: Optional[Dict[str, Any]] = None, joins=()) -> Dict[str, Any]:
+    """just the grand total row"""
+    return grouped(db, {}, filters, measures=measures, joins=joins)[0]
+
+
+def sample_rows(
+    db: Session,
+    partition,
+    filters: Iterable[Any],
+    columns: Sequence[Any],
+    per_group: int = 5,
+    order_by=None,
+    joins: Sequence[Tuple[Any, Any]] = (),
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """first n rows per bucket via row_number(), for the sample_assets lists"""
+    rn = func.row_number().over(partition_by=partition, order_by=order_by if order_by is not None else Assets.created_at)
+    inner = select(partition.label("bucket"), *columns, rn.label("rn")).select_from(Assets)
+    for target, onclause in joins:
+        inner = inner.outerjoin(target, onclause)
+    inner = inner.where(*filters).subquery()
+
+    keys = [c.key for c in inner.c if c.key not in ("bucket", "rn")]
+    out = defaultdict(list)
+    for row in db.execute(select(inner).where(inner.c.rn <= per_group).order_by(inner.c.bucket, inner.c.rn)):
+        m = row._mapping
+        out[m["bucket"]].append({k: m[k] for k in keys})
+    return out
+
+
+def enum_key(value, default=None):
+    """enum member -> its value, null -> default"""
+    if value is None:
+        return default
+    return getattr(value, "value", value)
+
+
+def as_float_buckets(buckets: Dict[Any, Dict[str, Any]], default=None, skip_null: bool = False) -> Dict[Any, Dict[str, Any]]:
+    """{key: {count, value}} with enum keys flattened n decimals as floats, the json shape the r/ reports return"""
+    out = {}
+    for key, data in buckets.items():
+        if key is None and skip_null:
+            continue
+        out[enum_key(key, default)] = {
+            k: (float(v) if isinstance(v, Decimal) else v) for k, v in data.items()
+        }
+    return out
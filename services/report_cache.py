@@ -0,0 +1,273 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from starlette.concurrency import run_in_threadpool
+
+from ..models import Assets, MaintenanceRequests, AssetTransfers, AssetDisposals, AssetCategory
+from ..system_vars import REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES
+from .policy_eval import get_compiled_scope
+
+
+# tables the cached reports depend on, the tag prefix each one invalidates
+TABLE_TAGS = {
+    Assets: "assets",
+    MaintenanceRequests: "maintenance",
+    AssetTransfers: "transfers",
+    AssetDisposals: "disposals",
+}
+
+_MISS = object()
+
+
+def _category_key(value) -> Optional[str]:
+    """filter string or enum -> enum name, so 'Land' n AssetCategory.LAND tag the same"""
+    if value is None or value == "":
+        return None
+    try:
+        return AssetCategory(value).name
+    except ValueError:
+        return str(value)
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> str:
+    """unset filters dropped n keys sorted, so equivalent requests share a key"""
+    if not filters:
+        return "{}"
+    return json.dumps(
+        {k: v for k, v in filters.items() if v is not None and v != ""},
+        sort_keys=True,
+        default=str,
+    )
+
+
+def entry_tags(tables: Iterable[str], department_id: Optional[str] = None, category=None) -> Set[str]:
+    """the narrowest tag per table, a dept filtered report only drops when that dept changes"""
+    tags = set()
+    cat = _category_key(category)
+    for table in tables:
+        if department_id:
+            tags.add(f"{table}:dept:{department_id}")
+        elif cat:
+            tags.add(f"{table}:cat:{cat}")
+        else:
+            tags.add(f"{table}:*")
+    return tags
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags")
+
+    def __init__(self, value, expires_at: float, tags: Set[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class ReportCache:
+    """TTL + LRU cache of report results keyed by report id, filters n scope fingerprint
+
+    writes invalidate by tag after commit, concurrent misses on one key share a single computation.
+    in process only, with several workers a write through another worker shows after at most the ttl
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self.by_tag: Dict[str, Set[Tuple]] = {}
+        # bumped per table on every invalidation, a computation that raced one isnt stored
+        self.epochs: Dict[str, int] = {}
+        self.inflight: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    def _drop(self, key: Tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self.by_tag.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.by_tag[tag]
+
+    def _get(self, key: Tuple):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISS
+            if entry.expires_at <= time.monotonic():
+                self._drop(key)
+                return _MISS
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def _epochs(self, tables: Iterable[str]) -> Tuple:
+        with self.lock:
+            return tuple(self.epochs.get(t, 0) for t in tables)
+
+    def _put(self, key: Tuple, value, tags: Set[str], ttl: float, tables: Iterable[str], epochs: Tuple):
+        with self.lock:
+            if tuple(self.epochs.get(t, 0) for t in tables) != epochs:
+                self.stale_skips += 1
+                return
+            self._drop(key)
+            self.entries[key] = _Entry(value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self.by_tag.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        report_id: str,
+        filters: Optional[Dict[str, Any]],
+        user,
+        compute: Callable[[], Any],
+        tables: Iterable[str] = ("assets",),
+        department_id: Optional[str] = None,
+        category=None,
+        ttl: Optional[float] = None,
+    ):
+        """cached result or run compute (sync, in the threadpool) once for all concurrent callers"""
+        tables = tuple(tables)
+        key = (report_id, normalize_filters(filters), get_compiled_scope(user).fingerprint)
+
+        value = self._get(key)
+        if value is not _MISS:
+            return value
+
+        pending = self.inflight.get(key)
+        if pending is not None:
+            with self.lock:
+                self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        with self.lock:
+            self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        epochs = self._epochs(tables)
+        try:
+            value = await run_in_threadpool(compute)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, no warning when nobody was waiting
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+        future.set_result(value)
+        self._put(key, value, entry_tags(tables, department_id, category), ttl or self.ttl, tables, epochs)
+        return value
+
+    def invalidate(self, table: str, departments: Set[str], categories: Set[str], wide: bool = False):
+        """drop entries for table that could include the touched depts/categories, wide when they arent known"""
+        with self.lock:
+            self.epochs[table] = self.epochs.get(table, 0) + 1
+            if wide:
+                tags = [t for t in self.by_tag if t.startswith(f"{table}:")]
+            else:
+                tags = [f"{table}:*"]
+                tags += [f"{table}:dept:{d}" for d in departments]
+                tags += [f"{table}:cat:{c}" for c in categories]
+            for tag in tags:
+                for key in list(self.by_tag.get(tag, ())):
+                    self._drop(key)
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_tag.clear()
+            for table in list(self.epochs):
+                self.epochs[table] += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "tags": len(self.by_tag),
+                "inflight": len(self.inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / total, 3) if total else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_skips": self.stale_skips,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+report_cache = ReportCache(REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_ENTRIES)
+
+
+def _values(state, key: str) -> Set:
+    """current n pre flush value of an attribute"""
+    hist = state.attrs[key].history
+    return {v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v is not None}
+
+
+def _asset_dims(session, asset_id) -> Optional[Tuple[Set[str], Set[str]]]:
+    """dept n category of a related asset if the session already has it, no sql from inside the flush"""
+    asset = session.identity_map.get(identity_key(Assets, asset_id)) if asset_id else None
+    if asset is None:
+        return None
+    state = inspect(asset)
+    return _values(state, "department_id"), {_category_key(c) for c in _values(state, "category")}
+
+
+# writes to the report tables drop the affected cached reports once they commit
+@event.listens_for(Session, "after_flush")
+def _collect_report_changes(session, flush_context):
+    changes = session.info.setdefault("report_changes", {})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = TABLE_TAGS.get(type(obj))
+        if table is None:
+            continue
+        depts, cats, wide = changes.setdefault(table, [set(), set(), False])
+        state = inspect(obj)
+        if isinstance(obj, Assets):
+            depts |= _values(state, "department_id")
+            cats |= {_category_key(c) for c in _values(state, "category")}
+            continue
+        dims = _asset_dims(session, obj.asset_id)
+        if dims is None:
+            changes[table][2] = True
+            continue
+        depts |= dims[0]
+        cats |= dims[1]
+        if isinstance(obj, AssetTransfers):
+            depts |= _values(state, "from_dept_id") | _values(state, "to_dept_id")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_report_changes(session):
+    changes = session.info.pop("report_changes", None)
+    if not changes:
+        return
+    for table, (depts, cats, wide) in changes.items():
+        report_cache.invalidate(table, depts, cats, wide)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_report_changes(session):
+    session.info.pop("report_changes", None)
@@ -0,0 +1,330 @@
+import asyncio
+import importlib
+import inspect
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import PydanticUndefined
+from sqlalchemy import delete, or_, select, text
+from sqlalchemy.orm import Session
+
+from ..database import JobSessionLocal, get_db, get_read_db, get_report_db
+from ..models import ReportJob, ReportJobStatus, User
+from ..utilities import get_current_user
+from ..system_vars import (
+    REPORT_JOB_BACKEND, REPORT_JOB_QUEUE, REPORT_JOB_TIMEOUT_SECONDS, REPORT_JOB_MAX_ATTEMPTS,
+    REPORT_JOB_RESULT_TTL_HOURS, REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD,
+)
+
+
+# the /api/v1/r/reports routers in the order main.py includes them, first to claim a path wins like it does there
+REPORT_MODULES = ("utils_r", "assets_r", "departments_r", "maintainance_r",
+                  "transdispo_r", "exec_r", "complience_r", "sec_r")
+REPORT_PREFIX = "/api/v1/r/reports/"
+_DB_DEPS = (get_report_db, get_read_db, get_db)
+
+
+class ReportSpec:
+    """a report endpoint callable outside a request, params are its query/path args minus db n user"""
+    def __init__(self, report_id: str, endpoint: Callable, path: str):
+        self.report_id = report_id
+        self.endpoint = endpoint
+        self.path = path
+        self.params: Dict[str, inspect.Parameter] = {}
+        self.db_arg = None
+        self.user_arg = None
+        for name, param in inspect.signature(endpoint).parameters.items():
+            if isinstance(param.default, DependsParam):
+                if param.default.dependency is get_current_user:
+                    self.user_arg = name
+                elif param.default.dependency in _DB_DEPS:
+                    self.db_arg = name
+                else:
+                    raise ValueError(f"{report_id}: unsupported dependency {name}")
+            else:
+                self.params[name] = param
+
+    def _default(self, param: inspect.Parameter):
+        default = param.default
+        if default is inspect.Parameter.empty:
+            return PydanticUndefined
+        # Query(...) / Path(...) defaults carry the real default inside
+        return getattr(default, "default", default)
+
+    def validate(self, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """filters -> endpoint kwargs, coerced like fastapi would, 400 on unknown/bad/missing values"""
+        filters = dict(filters or {})
+        unknown = set(filters) - set(self.params)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown filters for {self.report_id}: {', '.join(sorted(unknown))}")
+        kwargs = {}
+        for name, param in self.params.items():
+            if name in filters and filters[name] is not None:
+                annotation = Any if param.annotation is inspect.Parameter.empty else param.annotation
+                try:
+                    kwargs[name] = TypeAdapter(annotation).validate_python(filters[name])
+                except ValidationError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid value for {name}: {e.errors()[0]['msg']}")
+                continue
+            default = self._default(param)
+            if default is PydanticUndefined or default is Ellipsis:
+                raise HTTPException(status_code=400, detail=f"Missing filter for {self.report_id}: {name}")
+            kwargs[name] = default
+        return kwargs
+
+    def run(self, db: Session, user: User, filters: Optional[Dict[str, Any]]):
+        kwargs = self.validate(filters)
+        if self.db_arg:
+            kwargs[self.db_arg] = db
+        if self.user_arg:
+            kwargs[self.user_arg] = user
+        result = self.endpoint(**kwargs)
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        return jsonable_encoder(result)
+
+
+@lru_cache(maxsize=1)
+def report_registry() -> Dict[str, ReportSpec]:
+    """report id (path under /api/v1/r/reports minus path params) -> spec, built once from the routers"""
+    registry = {}
+    for module_name in REPORT_MODULES:
+        module = importlib.import_module(f"..routers.reports.{module_name}", __package__)
+        for route in module.router.routes:
+            if not isinstance(route, APIRoute) or "GET" not in route.methods:
+                continue
+            if not route.path.startswith(REPORT_PREFIX):
+                continue
+            report_id = re.sub(r"/\{[^}]+\}", "", route.path[len(REPORT_PREFIX):])
+            if not report_id or report_id in registry:
+                continue
+            try:
+                registry[report_id] = ReportSpec(report_id, route.endpoint, route.path)
+            except ValueError as e:
+                print(f"⚠️ report not available as a job: {e}")
+    return registry
+
+
+def get_report_spec(report_id: str) -> ReportSpec:
+    spec = report_registry().get(report_id)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown report: {report_id}")
+    return spec
+
+
+# ---- backends ----
+
+_redis_ok: Optional[bool] = None
+
+
+def _redis():
+    from redis import Redis
+    return Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, password=REDIS_PASSWORD, socket_connect_timeout=2)
+
+
+def _rq_queue():
+    from rq import Queue
+    return Queue(REPORT_JOB_QUEUE, connection=_redis(), default_timeout=REPORT_JOB_TIMEOUT_SECONDS)
+
+
+def active_backend() -> str:
+    """rq or db, auto pings redis once per process"""
+    global _redis_ok
+    if REPORT_JOB_BACKEND in ("rq", "db"):
+        return REPORT_JOB_BACKEND
+    if _redis_ok is None:
+        try:
+            _redis_ok = bool(_redis().ping())
+        except Exception:
+            _redis_ok = False
+        print(f"📦 report jobs backend: {'rq' if _redis_ok else 'db'}")
+    return "rq" if _redis_ok else "db"
+
+
+def submit_report_job(db: Session, user: User, report_id: str, filters: Optional[Dict[str, Any]]) -> ReportJob:
+    """validate n queue a report run, the row is committed before rq can see the id"""
+    spec = get_report_spec(report_id)
+    spec.validate(filters)
+
+    job = ReportJob(
+        report_id=report_id,
+        filters=filters or {},
+        requested_by=user.id,
+        status=ReportJobStatus.QUEUED,
+        backend=active_backend(),
+        attempts=0,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    if job.backend == "rq":
+        try:
+            _rq_queue().enqueue(
+                run_report_job, job.id,
+                job_id=job.id,
+                job_timeout=REPORT_JOB_TIMEOUT_SECONDS,
+                result_ttl=0,  # the result lives on the report_jobs row
+                failure_ttl=REPORT_JOB_RESULT_TTL_HOURS * 3600,
+            )
+        except Exception as e:
+            # redis went away since the ping, the db worker picks it up instead
+            print(f"⚠️ rq enqueue failed, report job {job.id} falls back to the db queue: {e}")
+            job.backend = "db"
+            db.commit()
+    return job
+
+
+# ---- worker side ----
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _execute(job_id: str, attempt: int):
+    """run a job already marked running, store result or error
+    the report gets what is left of REPORT_JOB_TIMEOUT_SECONDS as its statement_timeout, past that
+    claim_next_job may hand the job to another worker, so a slow run is cancelled rather than doubled"""
+    db = JobSessionLocal()
+    try:
+        job = db.get(ReportJob, job_id)
+        if job is None:
+            return
+        user = db.get(User, job.requested_by)
+        try:
+            if user is None:
+                raise HTTPException(status_code=404, detail="Requesting user no longer exists")
+            left_ms = int((job.started_at + timedelta(seconds=REPORT_JOB_TIMEOUT_SECONDS) - _now()).total_seconds() * 1000)
+            if left_ms <= 0:
+                raise TimeoutError("report job timed out before it started")
+            # SET LOCAL, gone with the rollback below so the pooled connection keeps its own setting
+            db.execute(text(f"SET LOCAL statement_timeout = {left_ms}"))
+            result = get_report_spec(job.report_id).run(db, user, job.filters)
+            payload = json.dumps(result)
+        except HTTPException as e:
+            db.rollback()
+            _finish(db, job_id, attempt, error=str(e.detail))
+            return
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ report job {job_id} ({job.report_id}) failed: {e}")
+            _finish(db, job_id, attempt, error=f"{type(e).__name__}: {e}")
+            return
+        db.rollback()  # drop anything the report left in the session before writing the result
+        _finish(db, job_id, attempt, result=result, size=len(payload))
+    finally:
+        db.close()
+
+
+def _finish(db: Session, job_id: str, attempt: int, result=None, size: Optional[int] = None, error: Optional[str] = None):
+    """store the outcome, only while the job is still running under this attempt
+    a run that was re-claimed by another worker in the meantime doesnt overwrite it"""
+    job = db.get(ReportJob, job_id, with_for_update=True)
+    if job is None or job.status != ReportJobStatus.RUNNING or job.attempts != attempt:
+        db.rollback()
+        print(f"⚠️ report job {job_id} attempt {attempt} finished after it was re-claimed, result dropped")
+        return
+    job.status = ReportJobStatus.FAILED if error else ReportJobStatus.DONE
+    job.result = result
+    job.result_bytes = size
+    job.error = error
+    job.finished_at = _now()
+    db.commit()
+
+
+def run_report_job(job_id: str):
+    """rq entrypoint, marks the row running then executes it"""
+    db = JobSessionLocal()
+    try:
+        job = db.get(ReportJob, job_id, with_for_update=True)
+        if job is None or job.status not in (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING):
+            db.rollback()
+            return
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = _now()
+        job.attempts += 1
+        attempt = job.attempts
+        db.commit()
+    finally:
+        db.close()
+    _execute(job_id, attempt)
+
+
+def claim_next_job() -> Optional[Tuple[str, int]]:
+    """db backend, take the oldest queued job (or one whose worker died) without blocking other workers
+    returns (job id, attempt), the attempt fences the result write in _finish"""
+    stale_before = _now() - timedelta(seconds=REPORT_JOB_TIMEOUT_SECONDS)
+    db = JobSessionLocal()
+    try:
+        job = db.execute(
+            select(ReportJob)
+            .where(
+                ReportJob.backend == "db",
+                ReportJob.attempts < REPORT_JOB_MAX_ATTEMPTS,
+                or_(
+                    ReportJob.status == ReportJobStatus.QUEUED,
+                    (ReportJob.status == ReportJobStatus.RUNNING) & (ReportJob.started_at < stale_before),
+                ),
+            )
+            .order_by(ReportJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = _now()
+        job.attempts += 1
+        claimed = (job.id, job.attempts)
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def run_next_job() -> bool:
+    """claim n run one db job, False when the queue was empty"""
+    claimed = claim_next_job()
+    if claimed is None:
+        return False
+    _execute(*claimed)
+    return True
+
+
+def purge_report_jobs() -> int:
+    """scheduled, drops old finished jobs n fails ones stuck running past every retry"""
+    db = JobSessionLocal()
+    try:
+        now = _now()
+        db.query(ReportJob).filter(
+            ReportJob.status == ReportJobStatus.RUNNING,
+            # rq doesnt retry, db jobs get claimed again until they run out of attempts
+            or_(ReportJob.backend == "rq", ReportJob.attempts >= REPORT_JOB_MAX_ATTEMPTS),
+            ReportJob.started_at < now - timedelta(seconds=REPORT_JOB_TIMEOUT_SECONDS),
+        ).update(
+            {"status": ReportJobStatus.FAILED, "error": "worker timed out", "finished_at": now},
+            synchronize_session=False,
+        )
+        purged = db.execute(
+            delete(ReportJob).where(
+                ReportJob.status.in_([ReportJobStatus.DONE, ReportJobStatus.FAILED]),
+                ReportJob.finished_at < now - timedelta(hours=REPORT_JOB_RESULT_TTL_HOURS),
+            )
+        ).rowcount
+        db.commit()
+        return purged
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ report job purge failed: {e}")
+        raise
+    finally:
+        db.close()
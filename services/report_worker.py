@@ -0,0 +1,46 @@
+"""db backed report job worker, runs outside the web process:
+
+    python -m <package>.services.report_worker [--burst]
+
+with redis use `rq worker reports` instead, both execute services.report_jobs.run_report_job"""
+import argparse
+import signal
+import time
+
+from ..system_vars import REPORT_JOB_POLL_SECONDS
+from .logger_queue import log_writer
+from .report_jobs import run_next_job
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run queued report jobs")
+    parser.add_argument("--burst", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    log_writer.start()
+    print("👷 report worker started")
+    try:
+        while not _stopping:
+            # the job in hand always finishes, a stop only ends the loop between jobs
+            if run_next_job():
+                continue
+            if args.burst:
+                break
+            time.sleep(REPORT_JOB_POLL_SECONDS)
+    finally:
+        log_writer.stop()
+        print("🛑 report worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from ..system_vars import (
+    ROLLUP_REBUILD_INTERVAL_MINUTES, SNAPSHOT_INTERVAL_MINUTES, KPI_SNAPSHOT_HOUR, DATA_QUALITY_BACKFILL_BATCH,
+    NBV_RECOMPUTE_HOUR, NBV_RECOMPUTE_BATCH, NBV_RECOMPUTE_PAUSE_MS, NBV_RECOMPUTE_RETRY_MINUTES,
+)
+from .asset_rollups import rebuild_rollups
+from .report_jobs import purge_report_jobs
+from .asset_snapshot import write_asset_snapshot, pa
+from .kpi_snapshots import write_kpi_snapshot
+from .data_quality import backfill_data_quality
+from .nbv_recompute import recompute_nbv, resume_nbv
+
+
+# one in process scheduler for the periodic maintenance jobs, jobs that must not overlap
+# across workers take a pg advisory lock themselves
+scheduler = BackgroundScheduler(
+    timezone="UTC",
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 300},
+)
+
+
+def _register_jobs():
+    if ROLLUP_REBUILD_INTERVAL_MINUTES > 0:
+        scheduler.add_job(
+            rebuild_rollups,
+            "interval",
+            minutes=ROLLUP_REBUILD_INTERVAL_MINUTES,
+            id="asset_rollup_rebuild",
+            replace_existing=True,
+            next_run_time=datetime.now(timezone.utc),  # once at boot too, picks up writes made outside the app
+        )
+    if SNAPSHOT_INTERVAL_MINUTES > 0 and pa is not None:
+        scheduler.add_job(
+            write_asset_snapshot,
+            "interval",
+            minutes=SNAPSHOT_INTERVAL_MINUTES,
+            id="asset_snapshot",
+            replace_existing=True,
+        )
+    if KPI_SNAPSHOT_HOUR >= 0:
+        scheduler.add_job(
+            write_kpi_snapshot,
+            "cron",
+            hour=KPI_SNAPSHOT_HOUR,
+            id="kpi_snapshot",
+            replace_existing=True,
+        )
+    if NBV_RECOMPUTE_HOUR >= 0:
+        scheduler.add_job(
+            recompute_nbv,
+            "cron",
+            hour=NBV_RECOMPUTE_HOUR,
+            kwargs={"batch": NBV_RECOMPUTE_BATCH, "pause_ms": NBV_RECOMPUTE_PAUSE_MS},
+            id="nbv_recompute",
+            replace_existing=True,
+        )
+    if NBV_RECOMPUTE_RETRY_MINUTES > 0:
+        scheduler.add_job(
+            resume_nbv,
+            "interval",
+            minutes=NBV_RECOMPUTE_RETRY_MINUTES,
+            kwargs={"batch": NBV_RECOMPUTE_BATCH, "pause_ms": NBV_RECOMPUTE_PAUSE_MS},
+            id="nbv_recompute_resume",
+            replace_existing=True,
+            next_run_time=datetime.now(timezone.utc),  # once at boot too, a crash mid run carries on here
+        )
+    # one shot at boot, only rows the listener never saw have no flags
+    scheduler.add_job(
+        backfill_data_quality,
+        kwargs={"batch": DATA_QUALITY_BACKFILL_BATCH},
+        id="data_quality_backfill",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        purge_report_jobs,
+        "interval",
+        hours=1,
+        id="report_job_purge",
+        replace_existing=True,
+    )
+
+
+def start_scheduler():
+    if scheduler.running:
+        return
+    _register_jobs()
+    scheduler.start()
+    print("⏰ scheduler started:", ", ".join(job.id for job in scheduler.get_jobs()) or "no jobs")
+
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+
+
+def scheduler_status():
+    return {
+        "running": scheduler.running,
+        "jobs": [
+            {"id": job.id, "next_run_time": job.next_run_time, "trigger": str(job.trigger)}
+            for job in scheduler.get_jobs()
+        ],
+    }
@@ -0,0 +1,191 @@
+"""the report aggregates computed over the parquet snapshot with arrow / numpy kernels instead of sql,
+same output shapes as the live /api/v1/r/reports endpoints"""
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from .asset_snapshot import pa, load_snapshot
+from .location_service import county_name_for
+from .report_aggregates import AGE_BRACKETS
+
+try:
+    import pyarrow.compute as pc
+except ImportError:
+    pc = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+AGE_EDGES = (1, 3, 5, 10)  # bracket upper bounds, same cut points as agg.age_bracket
+SAMPLES_PER_BRACKET = 5
+
+
+def check_source(source: str) -> bool:
+    """report ?source= flag, True when the snapshot should be used"""
+    if source not in ("live", "snapshot"):
+        raise HTTPException(status_code=400, detail="source must be live or snapshot")
+    return source == "snapshot"
+
+
+def require_snapshot(need_numpy: bool = False):
+    """(table, meta) or a 503 saying why the snapshot cant be used"""
+    if pa is None or (need_numpy and np is None):
+        raise HTTPException(status_code=503, detail="Snapshot reports need pyarrow and numpy installed, use source=live")
+    table, meta = load_snapshot()
+    if table is None:
+        raise HTTPException(status_code=503, detail="No asset snapshot has been written yet, use source=live")
+    return table, meta
+
+
+def snapshot_info(meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"source": "snapshot", "snapshot_generated_at": (meta or {}).get("generated_at")}
+
+
+def filter_assets(table, department_id: Optional[str] = None, category: Optional[str] = None,
+                  date_from: Optional[date] = None, date_to: Optional[date] = None, *extra):
+    """the agg.asset_filters clauses as one arrow mask, nulls drop out like they do in sql"""
+    conds = list(extra)
+    if department_id:
+        conds.append(pc.equal(table["department_id"], department_id))
+    if category:
+        # either the display value or the enum name, the live filter takes both
+        conds.append(pc.or_(pc.equal(table["category"], category), pc.equal(table["category_code"], category)))
+    if date_from:
+        conds.append(pc.greater_equal(table["acquisition_date"], pa.scalar(date_from, pa.date32())))
+    if date_to:
+        conds.append(pc.less_equal(table["acquisition_date"], pa.scalar(date_to, pa.date32())))
+    if not conds:
+        return table
+    mask = conds[0]
+    for cond in conds[1:]:
+        mask = pc.and_(mask, cond)
+    return table.filter(mask)
+
+
+def group_counts(table, key: str, default=None, skip_null: bool = False) -> Dict[Any, Dict[str, Any]]:
+    """{key: {count, value}} via arrow hash aggregation"""
+    out = table.group_by(key).aggregate([("id", "count"), ("value", "sum")])
+    buckets = {}
+    for k, count, value in zip(out[key].to_pylist(), out["id_count"].to_pylist(), out["value_sum"].to_pylist()):
+        if k is None and skip_null:
+            continue
+        buckets[default if k is None else k] = {"count": count, "value": value or 0.0}
+    return buckets
+
+
+def _total(table) -> Dict[str, Any]:
+    return {"count": table.num_rows, "value": pc.sum(table["value"]).as_py() or 0.0}
+
+
+def asset_summary(department_id: Optional[str] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    table, meta = require_snapshot()
+    table = filter_assets(table, department_id, None, date_from, date_to)
+    total = _total(table)
+    return {
+        "total_assets": total["count"],
+        "total_value": float(total["value"]),
+        "by_category": group_counts(table, "category"),
+        "by_status": group_counts(table, "status"),
+        "by_condition": group_counts(table, "condition", default="unknown"),
+        "by_department": group_counts(table, "department_name", skip_null=True),
+        "generated_at": datetime.now(),
+        "filters_applied": {
+            "department_id": department_id,
+            "date_from": date_from,
+            "date_to": date_to
+        },
+        **snapshot_info(meta),
+    }
+
+
+def geographic_distribution():
+    table, meta = require_snapshot()
+    county_list = [
+        {"county": county_name_for(code) or "Unknown", "asset_count": data["count"], "total_value": float(data["value"])}
+        for code, data in group_counts(table, "county_code").items()
+    ]
+    county_list.sort(key=lambda x: x["total_value"], reverse=True)
+    entity_list = [
+        {"entity_type": entity, "asset_count": data["count"], "total_value": float(data["value"])}
+        for entity, data in group_counts(table, "entity_type", skip_null=True).items()
+    ]
+    entity_list.sort(key=lambda x: x["total_value"], reverse=True)
+    return {
+        "summary": {
+            "total_assets": table.num_rows,
+            "counties_covered": len(county_list),
+            "entity_types": len(entity_list)
+        },
+        "by_county": county_list,
+        "by_entity_type": entity_list,
+        "generated_at": datetime.now(),
+        **snapshot_info(meta),
+    }
+
+
+def asset_age_analysis(department_id: Optional[str] = None, today: Optional[date] = None):
+    """ages as one numpy array, brackets by digitize n bincount instead of a case per row"""
+    table, meta = require_snapshot(need_numpy=True)
+    today = today or date.today()
+    table = filter_assets(table, department_id, None, None, None, pc.is_valid(table["acquisition_date"]))
+
+    days = pc.days_between(table["acquisition_date"], pa.scalar(today, pa.date32()))
+    ages = days.to_numpy().astype("float64") / 365.25
+    values = table["value"].fill_null(0).to_numpy()
+    bracket = np.digitize(ages, AGE_EDGES)
+
+    counts = np.bincount(bracket, minlength=len(AGE_BRACKETS))
+    sums = np.bincount(bracket, weights=values, minlength=len(AGE_BRACKETS))
+
+    ids = table["id"].to_pylist()
+    tags = table["tag_number"].to_pylist()
+    descriptions = table["description"].to_pylist()
+
+    by_age_bracket = {}
+    for i, name in enumerate(AGE_BRACKETS):
+        picks = np.flatnonzero(bracket == i)[:SAMPLES_PER_BRACKET]
+        by_age_bracket[name] = {
+            "count": int(counts[i]),
+            "value": float(sums[i]),
+            "sample_assets": [
+                {
+                    "id": ids[j],
+                    "tag_number": tags[j],
+                    "description": descriptions[j],
+                    "age_years": round(float(ages[j]), 1),
+                    "value": float(values[j]),
+                }
+                for j in picks
+            ],
+        }
+
+    useful = table["useful_life_years"].cast(pa.float64()).to_numpy()
+    remaining = useful - ages
+    with np.errstate(invalid="ignore"):
+        eol = ~np.isnan(useful) & (useful != 0) & (remaining > 0) & (remaining <= 2)
+    approaching_eol = [
+        {
+            "id": ids[j],
+            "tag_number": tags[j],
+            "description": descriptions[j],
+            "age_years": round(float(ages[j]), 1),
+            "useful_life_years": int(useful[j]),
+            "remaining_years": round(float(remaining[j]), 1),
+        }
+        for j in np.flatnonzero(eol)
+    ]
+
+    return {
+        "summary": {
+            "total_assets": table.num_rows,
+            "approaching_end_of_life": len(approaching_eol)
+        },
+        "by_age_bracket": by_age_bracket,
+        "approaching_end_of_life": approaching_eol,
+        "generated_at": datetime.now(),
+        **snapshot_info(meta),
+    }
@@ -1,7 +1,80 @@
-from .schemas.main import UserStatus
+import os
+from .schemas.main import UserStatus, ActionType
 
 ACCESS_TOKEN_EXPIERY = 60
 
+# principal cache for get_current_user/check_token, per worker
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_ENTRIES = 5000
+
+# password hashing, changing BCRYPT_ROUNDS rehashes each user on their next login
+BCRYPT_ROUNDS = 12
+HASH_POOL_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+HASH_MAX_CONCURRENCY = HASH_POOL_WORKERS * 2
+HASH_MAX_QUEUE = 200
+
+# activity log writer, COPY batches from a bounded buffer, spills to disk while the db is down
+LOG_BUFFER_CAPACITY = 20000
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_INTERVAL = 2.0 # seconds
+LOG_HIGH_WATER = 16000 # past this debug/info logs are sampled
+LOG_BUSY_SAMPLE_EVERY = 10 # keep 1 in 10 while busy
+LOG_BACKPRESSURE_TIMEOUT = 0.5 # seconds a caller waits on a full buffer before spilling
+# per action share of debug/info logs that get written, warnings n above are always kept
+# opt in, "view:0.25,export:0.5" (action:rate), unlisted actions are all written
+LOG_ACTION_SAMPLE_RATES = {
+    ActionType(action.strip()): float(rate)
+    for action, rate in (
+        pair.split(":", 1) for pair in os.getenv("LOG_ACTION_SAMPLE_RATES", "").split(",") if pair.strip()
+    )
+}
+LOG_SPILL_DIR = os.getenv("LOG_SPILL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "log_spill"))
+
+# compiled abac policy index, reloads on version bump or after this long (picks up edits made outside the app)
+ABAC_INDEX_TTL_SECONDS = 300
+
+# asset rollups get deltas per flush, full rebuild this often corrects any drift (0 disables)
+ROLLUP_REBUILD_INTERVAL_MINUTES = int(os.getenv("ROLLUP_REBUILD_INTERVAL_MINUTES", "60"))
+
+# nightly executive kpi snapshot, hour of day in utc it runs at (-1 disables)
+KPI_SNAPSHOT_HOUR = int(os.getenv("KPI_SNAPSHOT_HOUR", "0"))
+
+# assets scored per batch (one commit each) by the data quality backfill that runs at startup
+DATA_QUALITY_BACKFILL_BATCH = int(os.getenv("DATA_QUALITY_BACKFILL_BATCH", "5000"))
+
+# nightly net book value recompute, hour of day in utc (-1 disables), assets per chunk (one short
+# transaction each, rows someone else has locked are skipped) n the pause between chunks
+NBV_RECOMPUTE_HOUR = int(os.getenv("NBV_RECOMPUTE_HOUR", "1"))
+NBV_RECOMPUTE_BATCH = int(os.getenv("NBV_RECOMPUTE_BATCH", "1000"))
+NBV_RECOMPUTE_PAUSE_MS = int(os.getenv("NBV_RECOMPUTE_PAUSE_MS", "50"))
+# how often (and once at boot) a crashed or failed recompute is picked up again (0 disables)
+NBV_RECOMPUTE_RETRY_MINUTES = int(os.getenv("NBV_RECOMPUTE_RETRY_MINUTES", "15"))
+
+# cached dashboard reports, dropped early by writes in their dept/category, otherwise after the ttl
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "120"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "500"))
+
+# background report jobs, "rq" needs redis, "db" uses the report_jobs table as the queue, "auto" picks rq when redis answers
+REPORT_JOB_BACKEND = os.getenv("REPORT_JOB_BACKEND", "auto")
+REPORT_JOB_QUEUE = os.getenv("REPORT_JOB_QUEUE", "reports")
+REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", "1800"))
+REPORT_JOB_MAX_ATTEMPTS = 3
+REPORT_JOB_POLL_SECONDS = float(os.getenv("REPORT_JOB_POLL_SECONDS", "2"))
+REPORT_JOB_RESULT_TTL_HOURS = int(os.getenv("REPORT_JOB_RESULT_TTL_HOURS", "72"))
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+
+# streamed exports, rows fetched per round trip n how many can hold a reporting connection at once
+EXPORT_FETCH_SIZE = 2000
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+# parquet snapshot of the register for analytics / ?source=snapshot reports, needs pyarrow (0 interval disables)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+SNAPSHOT_INTERVAL_MINUTES = int(os.getenv("SNAPSHOT_INTERVAL_MINUTES", "360"))
+SNAPSHOT_BATCH_ROWS = 50000
+
 #response params
 httponly=True
 secure=False
@@ -0,0 +1,39 @@
+"""the app is imported as a package (relative imports), from whatever the checkout dir is called
+db settings only need to exist, nothing here connects"""
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(ROOT)
+
+for key, value in {"DB_HOST": "localhost", "DB_USER": "test", "DB_PASSWORD": "test", "DB_NAME": "test"}.items():
+    os.environ.setdefault(key, value)
+if os.path.dirname(ROOT) not in sys.path:
+    sys.path.insert(0, os.path.dirname(ROOT))
+
+
+def app_module(name: str):
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+@pytest.fixture
+def depreciation():
+    return app_module("services.depreciation")
+
+
+@pytest.fixture
+def agg():
+    return app_module("services.report_aggregates")
+
+
+@pytest.fixture
+def data_quality():
+    return app_module("services.data_quality")
+
+
+@pytest.fixture
+def models():
+    return app_module("models")
@@ -0,0 +1,77 @@
+"""flags_for (the orm listener) n FLAGS_SQL (the backfill) have to agree on every row"""
+import enum
+import itertools
+import json
+import sqlite3
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+COLUMNS = ("acquisition_cost", "acquisition_date", "responsible_officer_id",
+           "department_id", "location", "serial_number", "category")
+
+VALUES = {
+    "acquisition_cost": [None, 0, 1500],
+    "acquisition_date": [None, date(2020, 1, 1)],
+    "responsible_officer_id": [None, "", "u1"],
+    "department_id": [None, "", "d1"],
+    "location": [None, {}, [], "", {"county": "Nairobi"}],
+    "serial_number": [None, "", "SN-1"],
+}
+# category is NOT NULL on assets
+CATEGORIES = ("LAND", "BUILDINGS", "MOTOR_VEHICLES")
+
+
+def _stored(column, value):
+    """what the row holds in the db, location as json text, dates as iso, enums by name"""
+    if isinstance(value, enum.Enum):
+        return value.name
+    if column == "location" and value is not None:
+        return json.dumps(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def sql_flags(flags_sql, assets):
+    """FLAGS_SQL evaluated on sqlite, location::text there is just the stored json text"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE assets (n INTEGER, {', '.join(COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO assets VALUES (?, {', '.join('?' for _ in COLUMNS)})",
+        [(i, *(_stored(c, getattr(a, c)) for c in COLUMNS)) for i, a in enumerate(assets)],
+    )
+    sql = flags_sql.replace("::text", "")
+    return [f for (f,) in conn.execute(f"SELECT {sql} FROM assets ORDER BY n")]
+
+
+def orm_like(values):
+    return SimpleNamespace(**dict(zip(COLUMNS, values)))
+
+
+@pytest.fixture
+def assets(models):
+    values = {**VALUES, "category": [models.AssetCategory[c] for c in CATEGORIES]}
+    return [orm_like(v) for v in itertools.product(*(values[c] for c in COLUMNS))]
+
+
+def test_python_and_sql_flags_agree(data_quality, assets):
+    assert [data_quality.flags_for(a) for a in assets] == sql_flags(data_quality.FLAGS_SQL, assets)
+
+
+def test_serial_exempt_categories(data_quality, models):
+    land = orm_like((1, date(2020, 1, 1), "u1", "d1", {"county": "x"}, None, models.AssetCategory.LAND))
+    car = orm_like((1, date(2020, 1, 1), "u1", "d1", {"county": "x"}, None, models.AssetCategory.MOTOR_VEHICLES))
+    assert data_quality.flags_for(land) == 0
+    assert data_quality.missing_fields(data_quality.flags_for(car)) == ["serial_number"]
+
+
+def test_score_n_flag_lookup(data_quality):
+    bits = data_quality.FIELD_BITS
+    assert data_quality.score_for(0) == 100
+    assert data_quality.score_for(sum(bits.values())) == 0
+    assert data_quality.score_for(bits["location"] | bits["department"]) == round(4 / 6 * 100, 2)
+    missing_cost = data_quality.flags_missing("acquisition_cost")
+    assert all(f & bits["acquisition_cost"] for f in missing_cost)
+    assert len(missing_cost) == 1 << (len(bits) - 1)
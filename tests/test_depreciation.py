@@ -0,0 +1,116 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+AS_OF = date(2024, 1, 1)
+
+
+def asset(**fields):
+    row = dict(
+        acquisition_cost=Decimal("1000.00"), depreciation_rate=None, useful_life_years=None,
+        acquisition_date=date(2020, 1, 1), depreciation_method=None, useful_life_units=None, units_used=None,
+    )
+    row.update(fields)
+    return SimpleNamespace(**row)
+
+
+def both_paths(depreciation, rows, monkeypatch):
+    vectorised = depreciation.depreciate(rows, AS_OF)
+    monkeypatch.setattr(depreciation, "np", None)
+    looped = depreciation.depreciate(rows, AS_OF)
+    monkeypatch.undo()
+    return vectorised, looped
+
+
+def edge_cases(models):
+    M = models.DepreciationMethod
+    return {
+        "straight_line": [
+            asset(depreciation_rate=Decimal("10")),
+            asset(useful_life_years=4),
+            asset(useful_life_years=0),  # no rate n zero life, nothing to depreciate by
+            asset(depreciation_rate=Decimal("150")),  # clipped to 100%
+            asset(depreciation_rate=Decimal("12.5"), acquisition_date=date(2030, 6, 1)),  # future
+            asset(depreciation_rate=Decimal("10"), acquisition_date=None),
+            asset(acquisition_cost=None, depreciation_rate=Decimal("10")),
+        ],
+        "reducing_balance": [
+            asset(depreciation_method=M.REDUCING_BALANCE, depreciation_rate=Decimal("25")),
+            asset(depreciation_method=M.REDUCING_BALANCE, depreciation_rate=None, useful_life_years=5),
+            asset(depreciation_method=M.REDUCING_BALANCE, depreciation_rate=Decimal("33.33"), acquisition_date=date(2031, 1, 1)),
+            asset(depreciation_method=M.REDUCING_BALANCE, depreciation_rate=Decimal("100")),
+        ],
+        "units_of_use": [
+            asset(depreciation_method=M.UNITS_OF_USE, useful_life_units=Decimal("100000"), units_used=Decimal("25000")),
+            asset(depreciation_method=M.UNITS_OF_USE, useful_life_units=Decimal("0"), units_used=Decimal("500")),
+            asset(depreciation_method=M.UNITS_OF_USE, useful_life_units=None, units_used=None),
+            asset(depreciation_method=M.UNITS_OF_USE, useful_life_units=Decimal("10"), units_used=Decimal("50")),
+            asset(depreciation_method=M.UNITS_OF_USE, useful_life_units=Decimal("10"), units_used=Decimal("3"),
+                  acquisition_date=date(2030, 1, 1)),
+        ],
+    }
+
+
+@pytest.mark.parametrize("method", ["straight_line", "reducing_balance", "units_of_use"])
+def test_numpy_and_loop_agree(depreciation, models, monkeypatch, method):
+    if depreciation.np is None:
+        pytest.skip("numpy not installed")
+    rows = edge_cases(models)[method]
+    vectorised, looped = both_paths(depreciation, rows, monkeypatch)
+    assert vectorised == looped
+
+
+@pytest.mark.parametrize("method", ["straight_line", "reducing_balance", "units_of_use"])
+def test_cents_add_up(depreciation, models, method):
+    rows = edge_cases(models)[method]
+    out = depreciation.depreciate(rows, AS_OF)
+    for row, acc, nbv in zip(rows, out["accumulated_depreciation"], out["net_book_value"]):
+        assert acc + nbv == (row.acquisition_cost or Decimal("0.00"))
+        assert acc.as_tuple().exponent == -2 and nbv.as_tuple().exponent == -2
+        assert Decimal("0.00") <= acc <= (row.acquisition_cost or Decimal("0.00"))
+    totals = out["totals"]
+    assert totals["accumulated_depreciation"] == sum(out["accumulated_depreciation"])
+    assert totals["net_book_value"] == sum(out["net_book_value"])
+    assert totals["cost"] == totals["accumulated_depreciation"] + totals["net_book_value"]
+
+
+def test_known_values(depreciation, models):
+    rows = [*edge_cases(models)["straight_line"][:2], *edge_cases(models)["units_of_use"][:2]]
+    out = depreciation.depreciate(rows, AS_OF)
+    assert out["net_book_value"] == [Decimal("600.00"), Decimal("0.00"), Decimal("750.00"), Decimal("1000.00")]
+    assert out["annual_depreciation"][0] == Decimal("100.00")
+
+
+def test_future_acquisition_is_not_depreciated(depreciation, models):
+    rows = [r for rows in edge_cases(models).values() for r in rows if r.acquisition_date and r.acquisition_date > AS_OF]
+    out = depreciation.depreciate(rows, AS_OF)
+    assert out["accumulated_depreciation"] == [Decimal("0.00")] * len(rows)
+
+
+def test_random_portfolio_paths_agree(depreciation, models, monkeypatch):
+    if depreciation.np is None:
+        pytest.skip("numpy not installed")
+    import random
+    rng = random.Random(7)
+    methods = [None, *models.DepreciationMethod]
+    rows = [
+        asset(
+            acquisition_cost=Decimal(rng.randint(0, 10 ** 9)) / 100,
+            depreciation_rate=rng.choice([None, Decimal(rng.randint(0, 100)), Decimal("33.33")]),
+            useful_life_years=rng.choice([None, 0, 3, 10]),
+            acquisition_date=rng.choice([None, date(rng.randint(1990, 2030), rng.randint(1, 12), 1)]),
+            depreciation_method=rng.choice(methods),
+            useful_life_units=rng.choice([None, Decimal(0), Decimal(1000)]),
+            units_used=rng.choice([None, Decimal(300), Decimal(5000)]),
+        )
+        for _ in range(2000)
+    ]
+    vectorised, looped = both_paths(depreciation, rows, monkeypatch)
+    assert vectorised == looped
+
+
+def test_empty(depreciation):
+    out = depreciation.depreciate([], AS_OF)
+    assert out["net_book_value"] == [] and out["totals"]["cost"] == Decimal("0.00")
@@ -2,7 +2,7 @@ from .models import User, TokenBase,PasswordResetToken
 from fastapi import HTTPException, status, Depends, Request
 from typing import Optional
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import secrets
 import random
 from jose import jwt,JWTError
@@ -11,6 +11,8 @@ from passlib.context import CryptContext
 from datetime import datetime,timedelta, timezone
 from .database import get_db
 from .system_vars import ACCESS_TOKEN_EXPIERY
+from .services.principal_cache import principal_cache
+from .services.password_hasher import password_hasher
 from fastapi.security import OAuth2PasswordBearer
 
 
@@ -22,9 +24,26 @@ SECRET_KEY = "jncksndjc34jrnfkj3493n49DNKcjijno5KMLkMkmL9c9JCInoc"
 ALGORITHM = "HS256"
 
 def authenticate_user(email: str, password: str,db : Session):
+    """for def routes, async routes use authenticate_user_async"""
     user = db.query(User).filter(User.email == email).first()
-    if not user or not pwd_context.verify(password, user.password_hash):  # type: ignore
+    if not user:
+        return False
+    ok, new_hash = password_hasher.verify_sync(password, user.password_hash)
+    if not ok:
+        return False
+    if new_hash:
+        user.password_hash = new_hash # cost changed, saved with the callers commit
+    return user
+
+async def authenticate_user_async(email: str, password: str,db : Session):
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return False
+    ok, new_hash = await password_hasher.verify(password, user.password_hash)
+    if not ok:
         return False
+    if new_hash:
+        user.password_hash = new_hash
     return user
 
 
@@ -148,12 +167,14 @@ def revoke_tokens(request: Request, db: Session) -> str:
 
     db.query(TokenBase).filter(TokenBase.user_id == user_id).delete()
     db.commit()
+    principal_cache.invalidate_user(user_id)
     return "bye"
 
 
 def revoke_tokens_byid(user_id:str, db:Session):
     db.query(TokenBase).filter(TokenBase.user_id == user_id).delete()
     db.commit()
+    principal_cache.invalidate_user(user_id)
 
 
 
@@ -165,8 +186,9 @@ def check_token(token: str, db: Session) -> bool:
         if token_type != "access":
             return False
         
-       
-
+        cached = principal_cache.get(jti) if jti else None
+        if cached and cached.token_valid:
+            return True
 
         token_in_db = db.query(TokenBase).filter_by(jti=jti, revoked=False).first()
         if not token_in_db:
@@ -177,6 +199,7 @@ def check_token(token: str, db: Session) -> bool:
 
             return False
 
+        principal_cache.entry_for(jti, token_in_db.user_id, payload.get("exp")).token_valid = True
         return True
 
     except JWTError:
@@ -200,15 +223,27 @@ def get_user_email(token: str, db: Session) -> str | None:
     
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
 
-    user_id = get_user_id(token, db)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        payload = {}
+    user_id = payload.get("id")
  
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized request")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # cached snapshot merges into this session without any sql, role included
+    jti = payload.get("jti")
+    cached = principal_cache.get(jti) if jti else None
+    if cached and cached.user is not None:
+        return db.merge(cached.user, load=False)
+
+    user = db.query(User).options(joinedload(User.role)).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not foundd")
-    
+
+    if jti:
+        principal_cache.entry_for(jti, user_id, payload.get("exp")).set_user(user)
     return user
 
 